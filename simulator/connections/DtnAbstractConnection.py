@@ -1,6 +1,9 @@
 import abc
 import numpy as np
 import pandas as pd
+from simulator.core.DtnBundle import Bundle
+from simulator.core.DtnBundleLedger import DtnBundleLedger
+from simulator.core.DtnConnectionMonitor import DtnConnectionMonitor
 from simulator.core.DtnCore import Simulable, TimeCounter
 from simulator.core.DtnSemaphore import DtnSemaphore
 
@@ -31,11 +34,16 @@ class DtnAbstractConnection(Simulable, metaclass=abc.ABCMeta):
         # Propagation delay
         self.prop_delay = None
 
-        # List of messages that are lost
-        self.lost = []
+        # Record of bundles that are lost, and of other messages that are lost (e.g. LTP
+        # segments) as ``(time, mid, dv, type)``
+        self.lost = DtnBundleLedger()
+        self.lost_messages = []
 
-        # Monitor when data departs
-        self.sent = {}
+        # Monitor of the transmitted messages. None if connections are not monitored
+        globs = self.config['globals']
+        self.tx_monitor = None
+        if self.monitor and globs.conn_monitor != 'off':
+            self.tx_monitor = DtnConnectionMonitor(env, globs.conn_monitor, every=globs.conn_monitor_every)
 
     @property
     def cid(self):
@@ -46,11 +54,27 @@ class DtnAbstractConnection(Simulable, metaclass=abc.ABCMeta):
         return sum(d['outduct'].total_datarate(self.dest.nid) for d in self.ducts.values())
 
     def list_lost(self):
-        return pd.DataFrame([b.to_dict() for b in self.lost]) \
-                             if self.monitor else pd.DataFrame()
+        return self.lost.to_frame() if self.monitor else pd.DataFrame()
+
+    def list_lost_messages(self):
+        return pd.DataFrame.from_records(self.lost_messages, columns=('time', 'mid', 'dv', 'type')) \
+                                         if self.monitor else pd.DataFrame()
+
+    def record_lost(self, message):
+        # If no monitoring, return
+        if not self.monitor: return
+
+        # Bundles are recorded with all their exported variables
+        if isinstance(message, Bundle):
+            self.lost.append(message)
+        else:
+            self.lost_messages.append((self.t, str(message.mid), message.num_bits, message.__class__.__name__))
 
     def list_sent(self):
-        return pd.DataFrame.from_dict(self.sent, orient='index').reset_index()
+        return self.tx_monitor.to_frame() if self.tx_monitor is not None else pd.DataFrame()
+
+    def list_tx_stats(self):
+        return self.tx_monitor.stats() if self.tx_monitor is not None else pd.DataFrame()
 
     def initialize(self, start_connection=True):
         # Fill out the ducts structure. This is used to compute the total
@@ -90,7 +114,7 @@ class DtnAbstractConnection(Simulable, metaclass=abc.ABCMeta):
         # If the connection is not active, return. This will effectively
         # drop the message here
         if self.active == False:
-            self.lost.append(message)
+            self.record_lost(message)
             return
 
         # This will be a non-blocking call since a connection can propagate
@@ -99,7 +123,7 @@ class DtnAbstractConnection(Simulable, metaclass=abc.ABCMeta):
 
     def do_transmit(self, peer_duct, message, BER, direction):
         # Monitor the start of transmission
-        self.monitor_tx_start(message)
+        token = self.monitor_tx_start(message)
 
         # Do the actual transmission (This is a blocking call)
         try:
@@ -109,7 +133,7 @@ class DtnAbstractConnection(Simulable, metaclass=abc.ABCMeta):
             self.disp('{} does not reach destination. Connection is closed while propagating', message)
 
             # Store lost message
-            self.lost.append(message)
+            self.record_lost(message)
 
             # Finish transmission here if error
             return
@@ -121,7 +145,7 @@ class DtnAbstractConnection(Simulable, metaclass=abc.ABCMeta):
         if MER > 0: message.has_errors = (np.random.random() < MER)
 
         # Monitor end of transmission
-        self.monitor_tx_end(message)
+        self.monitor_tx_end(message, token)
 
         # Put the message in the destination node
         # Note: This is a non-blocking call since que in_queue
@@ -150,10 +174,13 @@ class DtnAbstractConnection(Simulable, metaclass=abc.ABCMeta):
         raise TransmissionError(err)
 
     def monitor_tx_start(self, message):
-        self.sent[str(message.mid)] = {'departure': self.t, 'dv': message.num_bits, 'type': message.__class__.__name__}
+        """ Monitor the start of a transmission. Returns the token for ``monitor_tx_end`` """
+        if self.tx_monitor is None: return None
+        return self.tx_monitor.tx_start(message)
 
-    def monitor_tx_end(self, message):
-        self.sent[str(message.mid)]['arrival'] = self.t
+    def monitor_tx_end(self, message, token):
+        if self.tx_monitor is None: return
+        self.tx_monitor.tx_end(message, token)
 
     def __repr__(self):
         return '<{}: {}-{} ({})>'.format(self.__class__.__name__, self.orig.nid,
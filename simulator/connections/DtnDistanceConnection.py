@@ -1,7 +1,5 @@
 from .DtnAbstractConnection import DtnAbstractConnection, TransmissionError
-import numpy as np
 from simulator.utils.basic_utils import Counter
-from simulator.utils.math_utils import find_consecutive
 
 class DtnDistanceConnection(DtnAbstractConnection):
 
@@ -30,21 +28,14 @@ class DtnDistanceConnection(DtnAbstractConnection):
         # Call parent function
         super(DtnDistanceConnection, self).initialize_contacts_and_ranges()
 
-        # Get distances for this connection
-        self.times = self.mobility_model.times
-        try:
-            self.dist = self.mobility_model.dist[self.orig.nid, self.dest.nid]
-        except KeyError:
-            self.dist = self.mobility_model.dist[self.dest.nid, self.orig.nid]
-
-        # Find intervals of time during which this connection is open
-        # ints is now a list of lists: [[ts0, te0], [ts1, te1], ...]
-        ints = find_consecutive(self.dist <= self.max_dist, val=True)
+        # Get the intervals of time during which this connection is open
+        # ints is a list of tuples: [(ts0, te0, avg distance 0), ...]
+        contacts = self.mobility_model.contacts(self.max_dist)
+        ints = contacts.get((self.orig.nid, self.dest.nid),
+                            contacts.get((self.dest.nid, self.orig.nid), []))
 
         # Dictionary of contacts indexed by cid: {cid: (start time, end time, avg propagation delay)
-        self.contacts = {next(self.cid_counter): (self.times[ts], self.times[te],
-                                                  np.mean(self.dist[ts:te])/3e8)
-                                                  for ts, te in ints}
+        self.contacts = {next(self.cid_counter): (ts, te, d/3e8) for ts, te, d in ints}
 
     def run(self):
         # If the no contacts, exit
@@ -215,7 +215,7 @@ class DtnScheduledBroadcastConnection(DtnAbstractConnection):
         # If the peer duct's parent is not the list of current destinations, then this message
         # is effectively lost since all routers will discard it.
         if peer_duct.parent.nid not in self.current_dests:
-            self.lost.append(message)
+            self.record_lost(message)
 
         # Find all ducts where this message should be delivered
         for dest in self.current_dests:
@@ -240,7 +240,7 @@ class DtnScheduledBroadcastConnection(DtnAbstractConnection):
         self.disp('{} starts being propagated', message)
 
         # Monitor the start of transmission
-        self.monitor_tx_start(message)
+        token = self.monitor_tx_start(message)
 
         # Create a new UUID for this message
         m_uuid = uuid1()
@@ -248,9 +248,9 @@ class DtnScheduledBroadcastConnection(DtnAbstractConnection):
         # Put the messages in transit
         for duct in valid_ducts:
             self.in_transit[duct.parent.nid].add(m_uuid)
-            self.env.process(self.tx_to_neighbor(m_uuid, message, duct, BER, direction))
+            self.env.process(self.tx_to_neighbor(m_uuid, message, duct, BER, direction, token))
 
-    def tx_to_neighbor(self, m_uuid, message, duct, BER, direction):
+    def tx_to_neighbor(self, m_uuid, message, duct, BER, direction, token=None):
         # The duct's parent is the destination of this connection.
         # (duct.neighbor == self.orig)
         dest = duct.parent.nid
@@ -263,11 +263,11 @@ class DtnScheduledBroadcastConnection(DtnAbstractConnection):
 
         # If the uuid is not in the in-transit map, this message got lost
         if m_uuid not in self.in_transit[dest]:
-            self.lost.append(message)
+            self.record_lost(message)
             return
 
         # Monitor end of transmission
-        self.monitor_tx_end(message)
+        self.monitor_tx_end(message, token)
 
         # Remove the record for this message
         self.in_transit[dest].remove(m_uuid)
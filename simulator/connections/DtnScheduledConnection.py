@@ -2,7 +2,6 @@
 
 import numpy as np
 from simulator.connections.DtnAbstractConnection import DtnAbstractConnection, TransmissionError
-from simulator.utils.DtnIO import prepare_contact_plan
 
 class DtnScheduledConnection(DtnAbstractConnection):
     """ A connection propagates a data unit from a transmitting node to a receiving
@@ -12,7 +11,9 @@ class DtnScheduledConnection(DtnAbstractConnection):
         2) A non-blocking transmit method, since multiple data units can be sent at
            the same time.
         3) A propagation time manager that sets the state of the connection (green vs.
-           red as a function of the contact plan).
+           red as a function of the contact plan). The state is computed from the contact
+           plan when a message is transmitted, so no events are needed to open and close
+           the connection.
 
         .. Tip:: A convergence layer that wants to transmit using a DtnConnection must first
                  do ``yield self.conn.active.green`` to ensure the connection is open (see
@@ -35,39 +36,47 @@ class DtnScheduledConnection(DtnAbstractConnection):
         # Current contact id as specified in the contact plan
         self.contact_id = None
 
-        # Contact plan for this connection
+        # Contacts of this connection (see ``ContactTimeline``)
         self.contact_plan = None
 
     def initialize_contacts_and_ranges(self):
         # Call parent
         super().initialize_contacts_and_ranges()
 
-        # Prepare the contact plan
-        self.contact_plan = prepare_contact_plan(self.orig.nid,
-                                                 self.dest.nid,
-                                                 self.mobility_model.contacts_df)
+        # Get the contacts for this connection
+        self.contact_plan = self.mobility_model.contact_timelines.timeline(self.orig.nid,
+                                                                           self.dest.nid)
 
     def run(self):
-        # If no contact plan available, exit
-        if self.contact_plan is None: yield self.env.exit()
-
-        # If contact plan has not valid entries, exit
-        if self.contact_plan.empty: yield self.env.exit()
-
-        # Iterate over range intervals
-        for cid, row in self.contact_plan.iterrows():
-            # Wait until the contact starts
-            yield self.env.timeout(max(0.0, row['dtstart']))
-
-            # Open the connection
-            self.open_connection(row['range'])
-
-            # Wait until the contact ends
-            yield self.env.timeout(row['duration'])
-
-            # Close the connection
+        # The connection is opened/closed on demand (see ``update_state``)
+        yield self.env.exit()
+
+    def update_state(self):
+        """ Open or close the connection depending on the contact active at this time """
+        # If no contact plan available, the connection is always closed
+        cp = self.contact_plan
+        if cp is None: return
+
+        # Find the current (or next) contact
+        i = np.searchsorted(cp.t_close, self.t, side='right')
+
+        # If the contact has started, open the connection
+        if i < len(cp) and cp.t_open[i] <= self.t:
+            if self.contact_id != cp.cid[i]:
+                self.contact_id = cp.cid[i]
+                self.open_connection(cp.range[i])
+            return
+
+        # Otherwise, close it
+        if self.active:
+            self.contact_id = None
             self.close_connection()
 
+    def transmit(self, peer_duct, message, BER, direction='fwd'):
+        # Update the state of the connection before transmitting
+        self.update_state()
+        super().transmit(peer_duct, message, BER, direction=direction)
+
     def set_contact_properties(self, prop):
         ''' Set properties of the current contact. '''
         self.prop_delay = {self.dest.nid: prop}
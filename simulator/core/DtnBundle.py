@@ -1,24 +1,34 @@
-from copy import deepcopy
+from operator import attrgetter
 from simulator.core.DtnCore import Message
 
 
 critical_priority = 0
 bulk_priority     = 0
 
-class Bundle(Message):
-    # Counter for the bundle id
-    bid_counter   = 0
-
-    # Counter for the bundle copy id {bid: cid, bid: cid, ...}
-    copy_counters = {}
+# Flags of the containers a bundle shares with its clones (see ``Bundle.clone``)
+_SHARED_VISITED = 1
+_SHARED_EBLOCKS = 2
 
-    # Counter for the flow id
-    fid_counter   = 0
+class Bundle(Message):
+    """ A bundle. Bundles use ``__slots__`` to reduce their memory footprint, so only
+        the attributes listed there can be set.
+
+        .. Tip:: Bundles are copied with ``clone`` (``copy.deepcopy`` also uses it). The
+                 ``visited`` list and ``eblocks`` dictionary of a clone are shared with the
+                 original bundle until one of them modifies them (copy-on-write). Therefore,
+                 use ``add_visited`` and ``set_eblock`` to modify them, never modify them
+                 in place.
+    """
+    __slots__ = ('bid', 'cid', 'fid', 'orig', 'dest', 'eid', 'data_type', 'data_vol', 'allowable_lat',
+                 'critical', 'TTL', 'priority', 'excluded', 'arrived', 'dropped', 'arrival_time',
+                 'creation_time', 'latency', 'prop_delay', 'has_errors', 'drop_reason', 'route',
+                 'data', '_visited', '_eblocks', '_shared', '_copies')
 
     # Variables to export into a dictionary. See ``to_dict``
-    export_vars   = ['fid', 'bid', 'cid', 'orig', 'dest', 'data_vol', 'data_type', 'critical', 'visited',
+    export_vars   = ('fid', 'bid', 'cid', 'orig', 'dest', 'data_vol', 'data_type', 'critical', 'visited',
                      'arrived', 'dropped', 'arrival_time', 'creation_time', 'latency', 'allowable_lat',
-                     'prop_delay', 'drop_reason', 'priority']
+                     'prop_delay', 'drop_reason', 'priority')
+    export_getter = attrgetter(*export_vars)
 
     def __init__(self, env, orig, dest, data_type, data_vol, latency, critical,
                  fid=None, eid=0, TTL=float('inf'), priority=bulk_priority):
@@ -26,7 +36,7 @@ class Bundle(Message):
         super(Bundle, self).__init__()
 
         # Set the bundle ids
-        self.set_bundle_ids(fid)
+        self.set_bundle_ids(env, fid)
 
         # Set bundle properties
         self.orig          = orig
@@ -40,7 +50,6 @@ class Bundle(Message):
         self.priority      = critical_priority if critical else priority
 
         # Initialize other properties
-        self.visited  = []
         self.excluded = []
         self.arrived  = False
         self.dropped  = False
@@ -50,8 +59,11 @@ class Bundle(Message):
         self.prop_delay    = 0
         self.drop_reason   = ''                 # Only filled if ``dropped = True``
 
-        # Dictionary of extension blocks
-        self.eblocks = {}
+        # List of visited nodes and dictionary of extension blocks. Not shared with
+        # any other bundle yet.
+        self._visited = []
+        self._eblocks = {}
+        self._shared  = 0
 
     @classmethod
     def from_flow(cls, env, flow):
@@ -65,21 +77,17 @@ class Bundle(Message):
 
         return bundle
 
-    def set_bundle_ids(self, fid=None):
-        # Create bundle unique ID
-        self.__class__.bid_counter += 1
-        self.bid = self.__class__.bid_counter
+    def set_bundle_ids(self, env, fid=None):
+        # Create bundle unique ID. Ids are allocated by the simulation environment
+        self.bid = next(env.bundle_ids)
 
-        # Create a bundle copy ID
-        self.__class__.copy_counters[self.bid] = 0
+        # Create a bundle copy ID. The counter of copies is shared by all clones
+        # of this bundle.
+        self._copies = [0]
         self.cid = 0
 
-        # If the flow id is provided, just use it
-        if fid: self.fid = fid; return
-
-        # Otherwise, create a new one
-        self.__class__.fid_counter += 1
-        self.fid = self.__class__.bid_counter
+        # If the flow id is provided, just use it. Otherwise, use the bundle id
+        self.fid = fid if fid else self.bid
 
     def __hash__(self):
         """ To compute the hash of a bundle, hash a tuple consisting on the bundle id and the copy id
@@ -95,32 +103,74 @@ class Bundle(Message):
     def num_bits(self):
         return self.data_vol
 
-    def copy(self, t):
-        new_bundle = deepcopy(self)
-        new_bundle.creation_time = t
-        return new_bundle
+    @property
+    def visited(self):
+        return self._visited
 
-    def __deepcopy__(self, memo):
-        # Create new bundle object
+    @visited.setter
+    def visited(self, value):
+        self._visited = value
+        self._shared &= ~_SHARED_VISITED
+
+    @property
+    def eblocks(self):
+        return self._eblocks
+
+    @eblocks.setter
+    def eblocks(self, value):
+        self._eblocks = value
+        self._shared &= ~_SHARED_EBLOCKS
+
+    def add_visited(self, nid):
+        """ Add a node to the list of visited nodes """
+        if self._shared & _SHARED_VISITED: self.visited = list(self._visited)
+        self._visited.append(nid)
+
+    def set_eblock(self, key, value):
+        """ Set the value of an extension block """
+        if self._shared & _SHARED_EBLOCKS: self.eblocks = dict(self._eblocks)
+        self._eblocks[key] = value
+
+    def clone(self):
+        """ Create a copy of this bundle with a new copy id. The ``visited`` list and
+            ``eblocks`` dictionary are shared until they are modified.
+        """
+        # Create new bundle object and copy all attributes that are set
         cls        = self.__class__
         new_bundle = cls.__new__(cls)
-        memo[id(self)] = new_bundle
+        for k in cls.__slots__:
+            try:
+                setattr(new_bundle, k, getattr(self, k))
+            except AttributeError:
+                pass
+
+        # The list of excluded contacts is modified in place, copy it
+        new_bundle.excluded = list(self.excluded)
 
-        # Deepcopy all attributes
-        for k, v in self.__dict__.items():
-            setattr(new_bundle, k, deepcopy(v, memo))
+        # Both bundles must copy the shared containers before modifying them
+        self._shared = new_bundle._shared = _SHARED_VISITED | _SHARED_EBLOCKS
 
         # Increase the copy counter
-        self.__class__.copy_counters[self.bid] += 1
-        new_bundle.cid = self.__class__.copy_counters[self.bid]
+        self._copies[0] += 1
+        new_bundle.cid = self._copies[0]
 
         return new_bundle
 
+    def copy(self, t):
+        new_bundle = self.clone()
+        new_bundle.creation_time = t
+        return new_bundle
+
+    def __deepcopy__(self, memo):
+        new_bundle = self.clone()
+        memo[id(self)] = new_bundle
+        return new_bundle
+
     def to_dict(self):
-        return {k: getattr(self, k) for k in self.__class__.export_vars}
+        return dict(zip(self.__class__.export_vars, self.__class__.export_getter(self)))
 
     def __repr__(self):
         return 'Bundle {}'.format(self.mid)
 
     def __str__(self):
-        return str(self.to_dict())
\ No newline at end of file
+        return str(self.to_dict())
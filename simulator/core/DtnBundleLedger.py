@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from simulator.core.DtnBundle import Bundle
+
+class DtnBundleLedger(object):
+    """ Append-only record of bundles in columnar format. Each call to ``append`` stores
+        the exported variables of a bundle (see ``Bundle.export_vars``) at that moment,
+        so the bundle object does not need to be kept alive until the end of the
+        simulation. Rows are buffered and stored in chunks of ``chunk_size`` rows, with
+        one array per column.
+
+        Usage examples:
+
+            1) To create the ledger: ``ledger = DtnBundleLedger()``
+            2) To record a bundle:   ``ledger.append(bundle)``
+            3) To get the records:   ``df = ledger.to_frame()``
+
+        .. Tip:: The list of visited nodes is stored as a string, i.e. the format in which
+                 the reports export it.
+    """
+    def __init__(self, chunk_size=4096):
+        # Exported variables and function to get them from a bundle
+        self.columns = Bundle.export_vars
+        self.getter  = Bundle.export_getter
+        self.chunk_size = chunk_size
+
+        # Position of the visited nodes in a row
+        self.visited_pos = self.columns.index('visited')
+
+        # Stored chunks. ``chunks[i][j]`` is the array of column ``j`` in chunk ``i``
+        self.chunks = []
+
+        # Rows that have not been stored in a chunk yet
+        self.rows = []
+
+        # Total number of rows
+        self.num_rows = 0
+
+    def __len__(self):
+        return self.num_rows
+
+    def __bool__(self):
+        return self.num_rows != 0
+
+    def __iter__(self):
+        """ Iterate over the records as dictionaries """
+        for chunk in self.chunks:
+            for row in zip(*chunk):
+                yield dict(zip(self.columns, row))
+        for row in self.rows:
+            yield dict(zip(self.columns, row))
+
+    def append(self, bundle):
+        # Get the exported variables. Convert the visited nodes to string since the
+        # list can still change
+        row = list(self.getter(bundle))
+        row[self.visited_pos] = str(row[self.visited_pos])
+
+        # Store the row
+        self.rows.append(row)
+        self.num_rows += 1
+
+        # If the buffer is full, store it as a chunk
+        if len(self.rows) >= self.chunk_size:
+            self.chunks.append(self.to_chunk(self.rows))
+            self.rows = []
+
+    def to_chunk(self, rows):
+        return [_compact(col) for col in zip(*rows)]
+
+    def column(self, name):
+        """ Return all values of a column as an array """
+        j      = self.columns.index(name)
+        chunks = self.chunks + ([self.to_chunk(self.rows)] if self.rows else [])
+        if not chunks: return np.array([])
+        return np.concatenate([chunk[j] for chunk in chunks])
+
+    def sum(self, name):
+        return self.column(name).sum() if self.num_rows > 0 else 0
+
+    def to_frame(self):
+        """ Return all records as a data frame with one column per exported variable """
+        if self.num_rows == 0: return pd.DataFrame()
+        df = pd.DataFrame({c: self.column(c) for c in self.columns}, columns=self.columns)
+        return df.infer_objects()
+
+def _compact(values):
+    """ Store a column of values as an array. Numeric and boolean columns use the
+        appropriate data type, all other columns are stored as objects.
+    """
+    arr    = np.empty(len(values), dtype='object')
+    arr[:] = values
+    values = pd.Series(arr).infer_objects().values
+    return values if values.dtype.kind in 'biuf' else arr
@@ -0,0 +1,160 @@
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+from simulator.core.DtnBundle import Bundle
+
+# Upper edges of the bins of the transit time histograms [sec]
+_delay_edges = [10.0**e for e in range(-6, 7)]
+
+class DtnConnectionMonitor(object):
+    """ Monitor of the messages transmitted through a connection. Depending on ``level``,
+        it keeps:
+
+            1) ``aggregate``: Number and volume of messages sent and arrived, and a histogram
+               of their transit time, per message type.
+            2) ``sampled``: Same as ``aggregate``, plus a record of one in every ``every``
+               messages sent.
+            3) ``full``: Same as ``aggregate``, plus a record of every message sent.
+
+        Records are stored in chunks of ``chunk_size`` rows, with one array per column.
+        Messages are not referenced once they have been recorded.
+
+        Usage examples:
+
+            1) When a message departs: ``token = monitor.tx_start(message)``
+            2) When it arrives:        ``monitor.tx_end(message, token)``
+            3) To get the records:     ``df = monitor.to_frame()``
+
+        .. Tip:: Arrivals are counted once per receiving node, so for broadcast connections
+                 a message can arrive more than once. Its record keeps the last arrival time.
+    """
+    def __init__(self, env, level, every=1, chunk_size=4096):
+        self.env   = env
+        self.level = level
+        self.every = 1 if level == 'full' else every
+        self.chunk_size = chunk_size
+
+        # Whether records are kept
+        self.records = level in ('sampled', 'full')
+
+        # Message types. ``codes[class name] = type code``
+        self.types = []
+        self.codes = {}
+
+        # Aggregate counters and histograms indexed by type code
+        self.num_sent    = []
+        self.dv_sent     = []
+        self.num_arrived = []
+        self.dv_arrived  = []
+        self.hist        = []
+
+        # Stored record chunks, as a dictionary of arrays per chunk, and number of
+        # messages sent and recorded
+        self.chunks   = []
+        self.count    = 0
+        self.num_rows = 0
+
+    def __len__(self):
+        return self.num_rows
+
+    def type_code(self, message):
+        name = message.__class__.__name__
+        code = self.codes.get(name)
+        if code is not None: return code
+
+        # Add a new message type
+        code = self.codes[name] = len(self.types)
+        self.types.append(name)
+        self.num_sent.append(0)
+        self.dv_sent.append(0.0)
+        self.num_arrived.append(0)
+        self.dv_arrived.append(0.0)
+        self.hist.append([0]*(len(_delay_edges)+1))
+
+        return code
+
+    def tx_start(self, message):
+        """ Monitor the departure of a message. Returns the token to pass to ``tx_end`` """
+        # Update counters
+        t    = self.env.now
+        code = self.type_code(message)
+        self.num_sent[code] += 1
+        self.dv_sent[code]  += message.num_bits
+
+        # Check if this message has to be recorded
+        self.count += 1
+        if not self.records or (self.count-1) % self.every != 0: return (t, code, -1)
+
+        # Create a new chunk if necessary
+        row, pos = self.num_rows, self.num_rows % self.chunk_size
+        if pos == 0: self.chunks.append(self.new_chunk())
+        chunk = self.chunks[-1]
+
+        # Record the message. Bundles are identified by their id and copy id, any other
+        # message by its object id
+        if isinstance(message, Bundle):
+            chunk['id'][pos], chunk['copy'][pos] = message.bid, message.cid
+        else:
+            chunk['id'][pos], chunk['copy'][pos] = id(message), -1
+        chunk['departure'][pos] = t
+        chunk['dv'][pos]        = message.num_bits
+        chunk['type'][pos]      = code
+        self.num_rows += 1
+
+        return (t, code, row)
+
+    def tx_end(self, message, token):
+        """ Monitor the arrival of a message """
+        # Update counters
+        t, code, row = token
+        self.num_arrived[code] += 1
+        self.dv_arrived[code]  += message.num_bits
+        self.hist[code][bisect_right(_delay_edges, self.env.now - t)] += 1
+
+        # Record the arrival time
+        if row >= 0:
+            self.chunks[row // self.chunk_size]['arrival'][row % self.chunk_size] = self.env.now
+
+    def new_chunk(self):
+        n = self.chunk_size
+        return {'id': np.zeros(n, dtype='int64'), 'copy': np.zeros(n, dtype='int64'),
+                'departure': np.zeros(n), 'dv': np.zeros(n), 'type': np.zeros(n, dtype='int64'),
+                'arrival': np.full(n, np.nan)}
+
+    def column(self, name):
+        """ Return all values of a column of the records as an array """
+        if self.num_rows == 0: return np.array([])
+        return np.concatenate([chunk[name] for chunk in self.chunks])[:self.num_rows]
+
+    def to_frame(self):
+        """ Return the records as a data frame with columns ``index`` (the message id),
+            ``departure``, ``dv``, ``type`` and ``arrival``
+        """
+        if self.num_rows == 0: return pd.DataFrame()
+
+        # Format message ids as in ``Message.mid``
+        ids, copies = self.column('id').tolist(), self.column('copy').tolist()
+        mids = [str((i, c)) if c >= 0 else str((hex(i), 0)) for i, c in zip(ids, copies)]
+
+        return pd.DataFrame({'index': mids,
+                             'departure': self.column('departure'),
+                             'dv': self.column('dv'),
+                             'type': np.array(self.types, dtype=object)[self.column('type')],
+                             'arrival': self.column('arrival')})
+
+    def stats(self):
+        """ Return the aggregate counters and transit time histogram of each message type.
+            Histogram column ``delay<x`` counts the arrivals with transit time below ``x``
+            seconds (and above the previous bin).
+        """
+        if not self.types: return pd.DataFrame()
+
+        # Counters
+        df = pd.DataFrame({'type': self.types, 'num_sent': self.num_sent, 'dv_sent': self.dv_sent,
+                           'num_arrived': self.num_arrived, 'dv_arrived': self.dv_arrived})
+
+        # Histograms
+        cols = ['delay<{:g}'.format(e) for e in _delay_edges] + ['delay>={:g}'.format(_delay_edges[-1])]
+        hist = pd.DataFrame(self.hist, columns=cols)
+
+        return pd.concat([df, hist], axis=1)
@@ -78,7 +78,30 @@ class Simulable(object):
     def __repr__(self):
         return self.__str__()
 
+def run_now(generator):
+    """ Run a SimPy generator that is known not to block (e.g. it only puts elements in
+        unbounded queues) and return its value. Raises RuntimeError if it yields an event.
+    """
+    try:
+        next(generator)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError(f'{generator} blocked while being run synchronously')
+
+def timeout_at(env, t):
+    """ Timeout that fires exactly at simulation time ``t``, or now if ``t`` has passed.
+        The delay is corrected for round-off errors so that ``env.now + delay == t``.
+    """
+    delay = max(t - env.now, 0)
+    if delay > 0:
+        while env.now + delay < t: delay = np.nextafter(delay, np.inf)
+        while env.now + delay > t: delay = np.nextafter(delay, -np.inf)
+    return env.timeout(delay)
+
 class Message(object, metaclass=abc.ABCMeta):
+    # No instance dictionary by default, so that subclasses can use ``__slots__``
+    __slots__ = ()
+
     def __init__(self):
         # Total propagation delay suffered by this Message
         # during transmission
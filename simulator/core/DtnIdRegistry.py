@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+class DtnIdRegistry(object):
+    """ Simulation-wide registry of node identifiers. Each name is mapped to a dense
+        integer (0, 1, 2, ...) in the order it is registered, so that routing algorithms
+        can work with integer arrays and bitsets instead of strings. Names are still
+        used in all public data structures and reports.
+
+        Only nodes are registered. Contacts are already identified by the integer index
+        (``cid``) of the contact plan. ``Bundle.visited``, the keys of ``DtnNode.queues``
+        and ``env.connections``, and connection ids keep using names: they are part of
+        the interface of routers, selectors and reports, and Python caches the hash of
+        strings, so integers would save little in a dictionary lookup. Routers encode
+        names when they need arrays (see ``nodes``).
+
+        Usage examples:
+
+            1) To register a node: ``code = ids.add_node('N1')``
+            2) To encode a set of nodes: ``codes = ids.nodes(bundle.visited)``
+    """
+    def __init__(self):
+        # Node names and codes. ``node_names[code] -> name``, ``node_codes[name] -> code``
+        self.node_names = []
+        self.node_codes = {}
+
+    @property
+    def num_nodes(self):
+        return len(self.node_names)
+
+    def add_node(self, nid):
+        """ Register a node. Returns its code. Registering a node twice has no effect """
+        if nid not in self.node_codes:
+            self.node_codes[nid] = len(self.node_names)
+            self.node_names.append(nid)
+        return self.node_codes[nid]
+
+    def add_nodes(self, nids):
+        for nid in nids: self.add_node(nid)
+
+    def node(self, nid):
+        """ Code of a node, or -1 if it is not registered """
+        return self.node_codes.get(nid, -1)
+
+    def nodes(self, nids):
+        """ Codes of a list of nodes as an integer array. Unregistered nodes are dropped """
+        codes = self.node_codes
+        return np.array([codes[n] for n in nids if n in codes], dtype='int64')
@@ -1,15 +1,10 @@
 from collections import OrderedDict
-from heapq import heappush
 from simulator.core.DtnPriorityQueue import DtnPriorityQueue
 
 class DtnPriorityDict(DtnPriorityQueue):
 
-    def new_priority_level(self, priority):
-        # Register the new priority level
-        heappush(self.priorities, priority)
-
-        # Create a new queue for this priority level
-        self.items[priority] = OrderedDict()
+    def new_level(self):
+        return OrderedDict()
 
     def keys(self):
         # Initialize variables
@@ -22,14 +17,19 @@ class DtnPriorityDict(DtnPriorityQueue):
         return k
 
     def remove(self, mid, priority):
-        return self.items[priority].pop(mid)
+        item = self.items[priority].pop(mid)
+        self.count_out(item, priority)
+        return item
 
     def add_to_queue(self, item, priority, where):
         if   where == 'left':  self.items[priority][item.data.mid] = item
         elif where == 'right': raise NotImplementedError
         else: raise RuntimeError('"where" can only be "left" or "right"')
+        self.count_in(item, priority)
 
     def get_from_queue(self, priority, where):
-        if   where == 'left':  return self.items[priority].popitem(last=True)
-        elif where == 'right': return self.items[priority].popitem(last=False)
-        else: raise RuntimeError('"where" can only be "left" or "right"')
\ No newline at end of file
+        if   where == 'left':  mid, item = self.items[priority].popitem(last=True)
+        elif where == 'right': mid, item = self.items[priority].popitem(last=False)
+        else: raise RuntimeError('"where" can only be "left" or "right"')
+        self.count_out(item, priority)
+        return mid, item
\ No newline at end of file
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from bisect import insort
 from collections import defaultdict, deque
-from heapq import heappush
 import pandas as pd
 import simpy
 from simulator.core.DtnCore import LoadMonitor, Simulable, TimeCounter
@@ -39,8 +39,17 @@ class DtnPriorityQueue(Simulable):
         .. Danger:: When putting/getting an element in the queue, if ``yield from`` is not used, then nothing
                     will happen, even if the capacity for the queue is set to infinity. If that is the case,
                     the ``put`` method will never block, but you still need to ``yield from`` it.
+
+        .. Tip:: If the capacity is infinite (the default), the queue does not use SimPy events to
+                 count its elements (see ``DtnQueue``). ``put_nowait`` can then be used to add an
+                 element from outside a SimPy process.
+
+        .. Tip:: The number of items and bits in each priority level are updated with every
+                 operation, so ``len``, ``backlog_bits`` and finding the next non-empty level do not
+                 depend on the number of priority levels. Provide ``size`` (a function that returns
+                 the size of an item in bits) to track the bits.
     """
-    def __init__(self, env, capacity=float('inf')):
+    def __init__(self, env, capacity=float('inf'), size=None):
         # Call parent constructor
         super().__init__(env)
 
@@ -48,22 +57,42 @@ class DtnPriorityQueue(Simulable):
         self.items = {}
 
         # List of priority levels (least is better). It always stays sorted by using
-        # a heappush operation when a new priority level is registered
+        # an insort operation when a new priority level is registered
         self.priorities = []
 
+        # Function to compute the size of an item in bits
+        self.size = size
+
+        # Number of items and bits per priority level, and in total
+        self.counts    = {}
+        self.bits      = {}
+        self.num_items = 0
+        self.num_bits  = 0.0
+
+        # Position of each priority level in ``self.priorities``, and bitmap with
+        # the positions of the non-empty levels set
+        self.ranks    = {}
+        self.nonempty = 0
+
         # Monitor for the number of elements in the queue. If no elements are
-        # present in the queue, it will stop the get method.
-        self.stop = simpy.Container(env, init=0, capacity=capacity)
+        # present in the queue, it will stop the get method. Only needed if the
+        # capacity is finite, since otherwise a put never blocks.
+        self.stop = None
+        if capacity < float('inf'):
+            self.stop = simpy.Container(env, init=0, capacity=capacity)
+
+        # Events of the consumers waiting for the queue to be non-empty (unbounded queues only)
+        self.waiters = []
 
     def __len__(self):
         """ Returns the total number of elements in this queue across
             all priorities
         """
-        return sum(len(q) for q in self.items.values())
+        return self.num_items
 
     def __bool__(self):
         """ Returns true if at least there is one element in any priority level """
-        return any(self.items.values())
+        return self.num_items != 0
 
     @property
     def stored(self):
@@ -72,6 +101,9 @@ class DtnPriorityQueue(Simulable):
         return df
 
     def put(self, item, priority, where='left'):
+        # If the queue is unbounded, the put never blocks
+        if self.stop is None: return self.put_nowait(item, priority, where=where)
+
         # Count the new addition. If there is not enough capacity, this will block
         yield self.stop.put(1)
 
@@ -81,49 +113,154 @@ class DtnPriorityQueue(Simulable):
         # Add the element to the appropriate queue
         self.add_to_queue(item, priority, where)
 
-    def get(self, where='right', check_empty=True):
+    def put_nowait(self, item, priority, where='left'):
+        """ Add an element to an unbounded queue without blocking. It does not need to be
+            called from a SimPy process.
+        """
+        if self.stop is not None:
+            raise RuntimeError('put_nowait is only available for queues with infinite capacity')
+
+        # If this priority level is not known, add create new queue
+        if priority not in self.items: self.new_priority_level(priority)
+
+        # Add the element to the appropriate queue
+        self.add_to_queue(item, priority, where)
+
+        # Wake up the consumers waiting for this queue
+        self.notify()
+
+    def notify(self):
+        # Wake up all waiting consumers. They check again if there is anything left
+        # in the queue when they resume.
+        waiters, self.waiters = self.waiters, []
+        for event in waiters:
+            if not event.triggered: event.succeed()
+
+    def wait(self, check_empty):
         # Wait until there is at least one element in the queue. Only do it if the queue is
         # empty. This allows the calling function to either ``data = yield from queue.get()``
         # or to (1) ``yield queue.is_empty(); data = yield from queue.get()``
-        if check_empty: yield self.is_empty()
+        if not check_empty: return
+
+        # Bounded queue: Get one element from the counter
+        if self.stop is not None:
+            yield self.is_empty()
+            return
+
+        # Unbounded queue: Only create an event if the queue is empty
+        while not self:
+            event = self.is_empty()
+            try:
+                yield event
+            except simpy.Interrupt:
+                # The consumer stopped waiting, do not leave its event in the waiters
+                if event in self.waiters: self.waiters.remove(event)
+                raise
+
+    def get(self, where='right', check_empty=True):
+        # Wait until there is at least one element in the queue
+        yield from self.wait(check_empty)
+
+        # Get the non-empty priority level with the highest priority
+        priority = self.first_priority()
+        if priority is None: return
 
-        # Iterate over the queues in priority order. Recall that self.priorities
-        # is always sorted
-        for priority in self.priorities:
-            # If this priority level is empty, continue
-            if not any(self.items[priority]): continue
+        # Get the next element in this priority level
+        return self.get_from_queue(priority, where=where)
 
-            # Get the next element in this priority level
-            return self.get_from_queue(priority, where=where)
+    def backlog_bits(self, priority=None):
+        """ Number of bits stored in a priority level, or in the entire queue if
+            ``priority`` is None. Requires ``size`` to be provided.
+        """
+        if priority is None: return self.num_bits
+        return self.bits.get(priority, 0.0)
+
+    def first_priority(self):
+        """ Returns the non-empty priority level with the highest priority (i.e. least
+            value), or None if the queue is empty
+        """
+        if self.nonempty == 0: return None
+        return self.priorities[(self.nonempty & -self.nonempty).bit_length() - 1]
 
     def new_priority_level(self, priority):
         # Register the new priority level
-        heappush(self.priorities, priority)
+        insort(self.priorities, priority)
+        self.counts[priority] = 0
+        self.bits[priority]   = 0.0
+
+        # The positions of the priority levels may have changed. Recompute them
+        self.ranks    = {p: i for i, p in enumerate(self.priorities)}
+        self.nonempty = sum(1 << self.ranks[p] for p in self.priorities if self.counts[p] > 0)
 
         # Create a new queue for this priority level
-        self.items[priority] = deque()
+        self.items[priority] = self.new_level()
+
+    def new_level(self):
+        return deque()
+
+    def count_in(self, item, priority):
+        """ Update the counters after adding ``item`` to a priority level """
+        bits = self.size(item) if self.size else 0.0
+        self.counts[priority] += 1
+        self.bits[priority]   += bits
+        self.num_items += 1
+        self.num_bits  += bits
+        self.nonempty  |= 1 << self.ranks[priority]
+
+    def count_out(self, item, priority):
+        """ Update the counters after removing ``item`` from a priority level """
+        bits = self.size(item) if self.size else 0.0
+        self.counts[priority] -= 1
+        self.bits[priority]   -= bits
+        self.num_items -= 1
+        self.num_bits  -= bits
+
+        # If this level is now empty, clear its bit. Also reset the bit counters to avoid
+        # accumulating rounding errors.
+        if self.counts[priority] == 0:
+            self.bits[priority] = 0.0
+            self.nonempty &= ~(1 << self.ranks[priority])
+        if self.num_items == 0:
+            self.num_bits = 0.0
 
     def popleft(self, priority, check_empty=True):
         """ Pop from the beginning of the queue.
             NOTE: This pops from the left, ``get`` pops from the right
         """
         # Wait until there is at least one element in the queue
-        if check_empty: yield self.is_empty()
+        yield from self.wait(check_empty)
 
         # Return the item in this priority level
-        return self.items[priority].popleft()
+        item = self.items[priority].popleft()
+        self.count_out(item, priority)
+        return item
 
     def is_empty(self):
-        return self.stop.get(1)
+        # Bounded queue: Event triggered when the counter has one element
+        if self.stop is not None: return self.stop.get(1)
+
+        # Unbounded queue: Event triggered now if the queue is not empty, or when
+        # the next element arrives otherwise
+        event = self.env.event()
+        if self: return event.succeed()
+
+        # Drop the events that nobody waits for anymore (e.g. the timeout of
+        # ``queue.is_empty() | env.timeout(2)`` happened first)
+        if self.waiters: self.waiters = [e for e in self.waiters if e.callbacks]
+        self.waiters.append(event)
+        return event
 
     def add_to_queue(self, item, priority, where):
         if   where == 'left':  self.items[priority].appendleft(item)
         elif where == 'right': self.items[priority].append(item)
         else: raise RuntimeError('"where" can only be "left" or "right"')
+        self.count_in(item, priority)
 
     def get_from_queue(self, priority, where):
-        if where == 'left':  return self.items[priority].popleft()
-        if where == 'right': return self.items[priority].pop()
-        raise RuntimeError('"where" can only be "left" or "right"')
+        if   where == 'left':  item = self.items[priority].popleft()
+        elif where == 'right': item = self.items[priority].pop()
+        else: raise RuntimeError('"where" can only be "left" or "right"')
+        self.count_out(item, priority)
+        return item
 
 
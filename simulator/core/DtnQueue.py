@@ -36,6 +36,11 @@ class DtnQueue(Simulable):
                     will happen, even if the capacity for the queue is set to infinity. So, to put an
                     element in the queue you **must** ``yield from`` it. If you have set capacity to
                     infinity, then this operation will never block, but that is the expected behavior
+
+        .. Tip:: If the capacity is infinite (the default), the queue does not use SimPy events to
+                 count its elements. Items are added synchronously, ``get`` returns immediately if the
+                 queue is not empty, and an event is only created when a consumer has to wait. In
+                 this case, ``put_nowait`` can be used to add an element from outside a SimPy process.
     """
     def __init__(self, env, capacity=float('inf')):
         super().__init__(env)
@@ -44,8 +49,14 @@ class DtnQueue(Simulable):
         self.items = deque()
         
         # Monitor for the number of elements in the queue. If no elements are 
-        # present in the queue, it will stop the get method.
-        self.stop = simpy.Container(env, init=0, capacity=capacity)
+        # present in the queue, it will stop the get method. Only needed if the
+        # capacity is finite, since otherwise a put never blocks.
+        self.stop = None
+        if capacity < float('inf'):
+            self.stop = simpy.Container(env, init=0, capacity=capacity)
+
+        # Events of the consumers waiting for the queue to be non-empty (unbounded queues only)
+        self.waiters = []
 
     def __len__(self):
         """ Returns the number of elements in this queue """
@@ -81,28 +92,79 @@ class DtnQueue(Simulable):
         return pd.DataFrame.from_dict(d, orient='index')
         
     def put(self, item, where='left'):
+        # If the queue is unbounded, the put never blocks
+        if self.stop is None: return self.put_nowait(item, where=where)
+
         # Count the new addition. If there is not enough capacity, this will block
         yield self.stop.put(1)
         
         # Add an item to the queue
+        self.add_to_queue(item, where)
+
+    def put_nowait(self, item, where='left'):
+        """ Add an element to an unbounded queue without blocking. It does not need to be
+            called from a SimPy process.
+        """
+        if self.stop is not None:
+            raise RuntimeError('put_nowait is only available for queues with infinite capacity')
+
+        # Add an item to the queue
+        self.add_to_queue(item, where)
+
+        # Wake up the consumers waiting for this queue
+        self.notify()
+
+    def get_nowait(self):
+        """ Get the next element of an unbounded queue without blocking. The queue
+            must not be empty.
+        """
+        if self.stop is not None:
+            raise RuntimeError('get_nowait is only available for queues with infinite capacity')
+        return self.items.pop()
+
+    def add_to_queue(self, item, where):
         if where == 'left':    self.items.appendleft(item)
         elif where == 'right': self.items.append(item)
         else: raise RuntimeError('"where" can only be "left" or "right"')
 
-    def get(self, check_empty=True):
+    def notify(self):
+        # Wake up all waiting consumers. They check again if there is anything left
+        # in the queue when they resume.
+        waiters, self.waiters = self.waiters, []
+        for event in waiters:
+            if not event.triggered: event.succeed()
+
+    def wait(self, check_empty):
         # Wait until there is at least one element in the queue. Only do it if the queue is
         # empty. This allows the calling function to either ``data = yield from queue.get()``
         # or to (1) ``yield queue.is_empty(); data = yield from queue.get()``
-        if check_empty: yield self.is_empty()
+        if not check_empty: return
+
+        # Bounded queue: Get one element from the counter
+        if self.stop is not None:
+            yield self.is_empty()
+            return
+
+        # Unbounded queue: Only create an event if the queue is empty
+        while not self.items:
+            event = self.is_empty()
+            try:
+                yield event
+            except simpy.Interrupt:
+                # The consumer stopped waiting, do not leave its event in the waiters
+                if event in self.waiters: self.waiters.remove(event)
+                raise
+
+    def get(self, check_empty=True):
+        # Wait until there is at least one element in the queue
+        yield from self.wait(check_empty)
 
         # Get the next item
         return self.items.pop()
 
     def get_all(self, check_empty=True):
-        # Wait until there is at least one element in the queue. Only do it if the queue is
-        # empty. This allows the calling function to either ``data = yield from queue.get()``
-        # or to (1) ``yield queue.is_empty(); data = yield from queue.get()``
-        if check_empty: yield self.is_empty()
+        # Wait until there is at least one element in the queue
+        yield from self.wait(check_empty)
 
         # Copy the items of the queue into a new list
         data = list(self.items)
@@ -114,7 +176,19 @@ class DtnQueue(Simulable):
         return data
 
     def is_empty(self):
-        return self.stop.get(1)
+        # Bounded queue: Event triggered when the counter has one element
+        if self.stop is not None: return self.stop.get(1)
+
+        # Unbounded queue: Event triggered now if the queue is not empty, or when
+        # the next element arrives otherwise
+        event = self.env.event()
+        if self.items: return event.succeed()
+
+        # Drop the events that nobody waits for anymore (e.g. the timeout of
+        # ``queue.is_empty() | env.timeout(2)`` happened first)
+        if self.waiters: self.waiters = [e for e in self.waiters if e.callbacks]
+        self.waiters.append(event)
+        return event
 
     def __str__(self):
         return '<DtnQueue>'
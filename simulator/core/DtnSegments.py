@@ -1,5 +1,4 @@
 import abc
-from collections import defaultdict
 import numpy as np
 from .DtnCore import Message
 
@@ -73,10 +72,6 @@ class LtpDataSegment(LtpSegment):
 class LtpReportSegment(LtpSegment):
     """ An LTP Report Segment (see page 17, rfc 5326) """
 
-    # Static variable to keep track of report serial numbers
-    # It is a dictionary indexed by checkpoint serial number
-    report_counter = defaultdict(int)
-
     def __init__(self, session_id):
         # Call parent constructor
         super(LtpReportSegment, self).__init__("RS", session_id)
@@ -0,0 +1,102 @@
+from heapq import heappush, heappop, heapify
+from itertools import count
+from simulator.core.DtnCore import Simulable, timeout_at
+
+class DtnTimer(object):
+    """ A timer created by ``DtnTimerService.schedule``. Call ``cancel`` to stop it """
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled', 'service')
+
+    def __init__(self, service, deadline, callback, args):
+        self.service   = service
+        self.deadline  = deadline
+        self.callback  = callback
+        self.args      = args
+        self.cancelled = False
+
+    def cancel(self):
+        if self.cancelled: return
+        self.cancelled = True
+        self.service.num_cancelled += 1
+
+class DtnTimerService(Simulable):
+    """ Cancellable timers that share the simulation event loop. Timers are stored in a heap
+        ordered by deadline and cancelled timers are removed lazily, so cancelling a timer
+        is O(1). Only one wake-up per distinct deadline is scheduled in the environment, and
+        timers that are cancelled before the earliest deadline is reached never trigger one.
+
+        Usage examples:
+
+            1) To start a timer: ``timer = env.timers.schedule(10, callback, arg1, arg2)``
+            2) To stop it: ``timer.cancel()``
+
+        .. Tip:: Callbacks are regular functions, not SimPy processes. If a callback needs
+                 to wait for something, it must start a process.
+    """
+    def __init__(self, env):
+        super().__init__(env)
+
+        # Heap of (deadline, sequence number, timer)
+        self.heap    = []
+        self.counter = count()
+
+        # Number of cancelled timers still in the heap
+        self.num_cancelled = 0
+
+        # Deadlines for which a wake-up is already scheduled
+        self.armed = set()
+
+    def __len__(self):
+        """ Number of active timers """
+        return len(self.heap) - self.num_cancelled
+
+    def schedule(self, delay, callback, *args):
+        """ Call ``callback(*args)`` after ``delay`` seconds. Returns a ``DtnTimer`` """
+        # Create the timer and store it
+        timer = DtnTimer(self, self.t + delay, callback, args)
+        heappush(self.heap, (timer.deadline, next(self.counter), timer))
+
+        # Make sure the environment wakes up in time for it
+        self.arm()
+
+        return timer
+
+    def arm(self):
+        # Remove cancelled timers at the top of the heap
+        self.purge()
+
+        # If there are no timers, or a wake-up is already scheduled before the next
+        # deadline, there is nothing to do
+        if not self.heap: return
+        deadline = self.heap[0][0]
+        if any(t <= deadline for t in self.armed): return
+
+        # Schedule a wake-up
+        self.armed.add(deadline)
+        timeout_at(self.env, deadline).callbacks.append(self.fire)
+
+    def purge(self):
+        # Pop cancelled timers from the top of the heap
+        while self.heap and self.heap[0][2].cancelled:
+            heappop(self.heap)
+            self.num_cancelled -= 1
+
+        # If most of the heap are cancelled timers, rebuild it
+        if self.num_cancelled > 64 and 2*self.num_cancelled > len(self.heap):
+            self.heap = [e for e in self.heap if not e[2].cancelled]
+            heapify(self.heap)
+            self.num_cancelled = 0
+
+    def fire(self, event):
+        # Run all timers that are due. This wake-up stays armed meanwhile, so timers started
+        # by the callbacks do not schedule wake-ups of their own
+        while self.heap and self.heap[0][0] <= self.t:
+            _, _, timer = heappop(self.heap)
+            if timer.cancelled:
+                self.num_cancelled -= 1
+                continue
+            timer.cancelled = True
+            timer.callback(*timer.args)
+
+        # This wake-up is over, schedule the next one
+        self.armed.discard(self.t)
+        self.arm()
@@ -43,6 +43,9 @@ class DtnAbstractDuctLTP(DtnAbstractDuct, metaclass=abc.ABCMeta):
         # The radio for this duct
         self.radio = None
 
+        # Timers of each LTP session. {session_id: {key: DtnTimer}}
+        self.session_timers = {}
+
     def initialize(self, peer, *args, radio='', **kwargs):
         # Call parent initialization
         super(DtnAbstractDuctLTP, self).initialize(peer, **kwargs)
@@ -65,6 +68,22 @@ class DtnAbstractDuctLTP(DtnAbstractDuct, metaclass=abc.ABCMeta):
     def is_session(self, session_id):
         return session_id in self.ltp_queues
 
+    def start_timer(self, session_id, key, delay, callback, *args):
+        """ Start a timer for an LTP session (see ``DtnTimerService``). If the session
+            already has a timer with the same ``key``, it is cancelled.
+        """
+        timers = self.session_timers.setdefault(session_id, {})
+        if key in timers: timers[key].cancel()
+        timers[key] = self.env.timers.schedule(delay, callback, *args)
+
+    def cancel_timer(self, session_id, key):
+        timer = self.session_timers.get(session_id, {}).pop(key, None)
+        if timer is not None: timer.cancel()
+
+    def cancel_timers(self, session_id):
+        """ Cancel all timers of an LTP session. Call it when the session ends """
+        for timer in self.session_timers.pop(session_id, {}).values(): timer.cancel()
+
     def total_datarate(self, dest):
         return self.radio.datarate
 
@@ -74,6 +74,9 @@ class DtnInductLTP(DtnAbstractDuctLTP):
         self.pending_ack.pop(session_id)
         self.ltp_queues.pop(session_id)
 
+        # Stop all timers of this session
+        self.cancel_timers(session_id)
+
     def run_ltp_session(self, session_id):
         """ Wait for segments to reconstruct a block. If a checkpoint is created,
             respond with a Report Segment
@@ -157,7 +160,7 @@ class DtnInductLTP(DtnAbstractDuctLTP):
             self.pending_ack[session_id][rs.id] = rs
 
             # Start the timer for the report segment
-            self.env.process(self.start_report_timer(session_id, rs.id))
+            self.start_report_timer(session_id, rs.id)
 
             # If you have received all data in the block, you are ready to exit
             success = received >= to_receive
@@ -203,10 +206,14 @@ class DtnInductLTP(DtnAbstractDuctLTP):
         # Mark this report segment as no longer pending acknowledgment
         del self.pending_ack[session_id][segment.report_id]
 
+        # Its timer is no longer needed
+        self.cancel_timer(session_id, segment.report_id)
+
     def start_report_timer(self, session_id, rid):
-        # Wait until timer expires
-        yield self.env.timeout(self.report_timer)
+        # Start the timer for this report segment
+        self.start_timer(session_id, rid, self.report_timer, self.report_timeout, session_id, rid)
 
+    def report_timeout(self, session_id, rid):
         # If this session no longer exists, return
         if not self.is_session(session_id): return
 
@@ -223,7 +230,7 @@ class DtnInductLTP(DtnAbstractDuctLTP):
         self.radio.put(self.neighbor, rs, self.peer, self.transmit_mode)
 
         # Start the timer for the report segment
-        self.env.process(self.start_report_timer(session_id, rs.id))
+        self.start_report_timer(session_id, rs.id)
 
     def __str__(self):
         return "<LtpInduct {}-{}>".format(self.neighbor, self.parent.nid)
\ No newline at end of file
@@ -91,6 +91,9 @@ class DtnInductMBLTP(DtnAbstractDuctMBLTP):
         self.pending_ack.pop(session_id)
         self.ltp_queues.pop(session_id)
 
+        # Stop all timers of this session
+        self.cancel_timers(session_id)
+
     def run_ltp_session(self, session_id):
         """ Wait for segments to reconstruct a block. If a checkpoint is created,
                     respond with a Report Segment
@@ -197,7 +200,7 @@ class DtnInductMBLTP(DtnAbstractDuctMBLTP):
             self.pending_ack[session_id][rs.id] = rs
 
             # Start the timer for the report segment
-            self.env.process(self.start_report_timer(session_id, rs.id))
+            self.start_report_timer(session_id, rs.id)
 
             # If this is the first checkpoint and you have succeeded, then deliver the
             # block because you haven't done so previously. In any other case, you have
@@ -273,10 +276,14 @@ class DtnInductMBLTP(DtnAbstractDuctMBLTP):
         # Mark this report segment as no longer pending acknowledgment
         del self.pending_ack[session_id][segment.report_id]
 
+        # Its timer is no longer needed
+        self.cancel_timer(session_id, segment.report_id)
+
     def start_report_timer(self, session_id, rid):
-        # Wait until timer expires
-        yield self.env.timeout(self.report_timer)
+        # Start the timer for this report segment
+        self.start_timer(session_id, rid, self.report_timer, self.report_timeout, session_id, rid)
 
+    def report_timeout(self, session_id, rid):
         # If this session no longer exists, return
         if not self.is_session(session_id): return
 
@@ -293,7 +300,7 @@ class DtnInductMBLTP(DtnAbstractDuctMBLTP):
         self.send_through_all(rs)
 
         # Start the timer for the report segment
-        self.env.process(self.start_report_timer(session_id, rs.id))
+        self.start_report_timer(session_id, rs.id)
 
     def send_through_all(self, segment):
         """ Send a copy of this segment through all the bands """
@@ -95,7 +95,7 @@ class DtnOutductLTP(DtnAbstractDuctLTP):
 
         # Start the session timer. If the transaction has not been completed by then
         # the bundles in this block need to be re-routed
-        self.env.process(self.start_session_timer(session_id))
+        self.start_session_timer(session_id)
 
         # Start the process for managing this LTP session
         # Note: This is a non-blocking call since you can have multiple LTP sessions
@@ -109,6 +109,9 @@ class DtnOutductLTP(DtnAbstractDuctLTP):
         self.checkpoint_counter.pop(session_id)
         self.ltp_queues.pop(session_id)
 
+        # Stop all timers of this session
+        self.cancel_timers(session_id)
+
         return block
 
     def run_ltp_session(self, session_id, size):
@@ -135,7 +138,7 @@ class DtnOutductLTP(DtnAbstractDuctLTP):
                 for s in segments: self.radio.put(self.neighbor, s, self.peer, self.transmit_mode)
 
                 # Start the timer for the checkpoint report receive
-                self.env.process(self.start_checkpoint_timer(session_id, checkpoint))
+                self.start_checkpoint_timer(session_id, checkpoint)
 
                 # Mark do_send as false, to avoid re-sending these segments if the report
                 # segment has errors
@@ -245,10 +248,12 @@ class DtnOutductLTP(DtnAbstractDuctLTP):
 
         return to_tx, to_tx[-1]
 
-    def start_checkpoint_timer(self, session_id, old_checkpoint):
-        # Wait until timer expires
-        yield self.env.timeout(self.checkpoint_timer)
+    def start_checkpoint_timer(self, session_id, checkpoint):
+        # Start the timer. It replaces the timer of the previous checkpoint
+        self.start_timer(session_id, 'checkpoint', self.checkpoint_timer,
+                         self.checkpoint_timeout, session_id, checkpoint)
 
+    def checkpoint_timeout(self, session_id, old_checkpoint):
         # If this session id is no longer present, then this LTP session has
         # already ended. Just return
         if not self.is_session(session_id): return
@@ -268,12 +273,13 @@ class DtnOutductLTP(DtnAbstractDuctLTP):
         self.radio.put(self.neighbor, old_checkpoint, self.peer, self.transmit_mode)
 
         # Start the timer for the checkpoint report receive
-        self.env.process(self.start_checkpoint_timer(session_id, old_checkpoint))
+        self.start_checkpoint_timer(session_id, old_checkpoint)
 
     def start_session_timer(self, session_id):
         # Wait for 1 day, after that you should have succeeded
-        yield self.env.timeout(24 * 60 * 60)
+        self.start_timer(session_id, 'session', 24 * 60 * 60, self.session_timeout, session_id)
 
+    def session_timeout(self, session_id):
         # If this session already ended successfully, skip
         if not self.is_session(session_id): return
 
@@ -106,6 +106,9 @@ class DtnOutductMBLTP(DtnAbstractDuctMBLTP):
         self.checkpoint_counter.pop(session_id)
         self.ltp_queues.pop(session_id)
 
+        # Stop all timers of this session
+        self.cancel_timers(session_id)
+
         # Return the block in case you have to put it to the limbo
         # because this session failed
         return block
@@ -134,7 +137,7 @@ class DtnOutductMBLTP(DtnAbstractDuctMBLTP):
                 for s in segments: self.send_through_all(s)
 
                 # Start the timer for the checkpoint report receive
-                self.env.process(self.start_checkpoint_timer(session_id, checkpoint))
+                self.start_checkpoint_timer(session_id, checkpoint)
 
                 # Mark do_send as false, to avoid re-sending these segments if the report
                 # segment has errors
@@ -256,10 +259,12 @@ class DtnOutductMBLTP(DtnAbstractDuctMBLTP):
         self.checkpoint_counter[session_id] += 1
         return self.checkpoint_counter[session_id]
 
-    def start_checkpoint_timer(self, session_id, old_checkpoint):
-        # Wait until timer expires
-        yield self.env.timeout(self.checkpoint_timer)
+    def start_checkpoint_timer(self, session_id, checkpoint):
+        # Start the timer. It replaces the timer of the previous checkpoint
+        self.start_timer(session_id, 'checkpoint', self.checkpoint_timer,
+                         self.checkpoint_timeout, session_id, checkpoint)
 
+    def checkpoint_timeout(self, session_id, old_checkpoint):
         # If this session id is no longer present, then this LTP session has
         # already ended. Just return
         if not self.is_session(session_id): return
@@ -279,7 +284,7 @@ class DtnOutductMBLTP(DtnAbstractDuctMBLTP):
         self.send_through_all(old_checkpoint)
 
         # Start the timer for the checkpoint report receive
-        self.env.process(self.start_checkpoint_timer(session_id, old_checkpoint))
+        self.start_checkpoint_timer(session_id, old_checkpoint)
 
     def do_ack(self, segment):
         """ Re-implement to enable reception of Report Segments """
@@ -1,3 +1,4 @@
+from simulator.core.DtnBundleLedger import DtnBundleLedger
 from .DtnAbstractEndpoint import DtnAbstractEndpoint
 
 class DtnDefaultEndpoint(DtnAbstractEndpoint):
@@ -13,16 +14,20 @@ class DtnDefaultEndpoint(DtnAbstractEndpoint):
         return bool(self.data)
 
     def __iter__(self):
+        """ Iterate over the bundles that arrived as dictionaries (see ``Bundle.to_dict``) """
         return iter(self.data)
 
+    def to_frame(self):
+        return self.data.to_frame()
+
     def initialize(self):
-        # All bundles will live in this list
-        self.data = []
+        # All bundles are recorded in this ledger
+        self.data = DtnBundleLedger()
 
     def put(self, item):
         # If node is dead, skip
         if not self.is_alive:
             return
 
-        # Store in list
+        # Record bundle
         self.data.append(item)
\ No newline at end of file
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 
 from simulator.environments.DtnAbstractSimEnvironment import SimEnvironment
+from itertools import count
 import numpy as np
 import pandas as pd
 import os
 from pathlib import Path
 import random
+from simulator.core.DtnIdRegistry import DtnIdRegistry
+from simulator.core.DtnTimerService import DtnTimerService
 from simulator.utils.DtnUtils import load_class_dynamically
 from warnings import warn
 
@@ -32,6 +35,12 @@ class DtnSimEnviornment(SimEnvironment):
         # Variable to store all results
         self.all_results = {}
 
+        # Allocator of bundle ids. Ids are unique within this simulation
+        self.bundle_ids = count(1)
+
+        # Timers shared by all simulation elements (e.g. LTP timers)
+        self.timers = DtnTimerService(self)
+
         # Create all nodes
         self.nodes = {}
         for nid, node in self.config['network'].nodes.items():
@@ -42,6 +51,11 @@ class DtnSimEnviornment(SimEnvironment):
             # Create node object
             self.nodes[nid] = clazz(self, nid, props)
 
+        # Create the registry of node ids. Nodes are registered in the
+        # order they are defined in the configuration file.
+        self.ids = DtnIdRegistry()
+        self.ids.add_nodes(self.nodes)
+
         # Create all connections
         self.connections = {}
         for cid, con in self.config['network'].connections.items():
@@ -114,6 +128,12 @@ class DtnSimEnviornment(SimEnvironment):
         for model in self.mobility_models.values():
             model.initialize()
 
+            # Register the nodes in the contact plan of this model
+            cp = getattr(model, 'contacts_df', None)
+            if cp is None: continue
+            self.ids.add_nodes(cp.orig)
+            self.ids.add_nodes(cp.dest)
+
     def set_simulation_seed(self):
         if self.seed is None: return
         np.random.seed(self.seed)
@@ -1,5 +1,7 @@
 import abc
+import numpy as np
 import pandas as pd
+from simulator.core.DtnBundleLedger import DtnBundleLedger
 from simulator.core.DtnCore import Simulable
 
 class DtnAbstractGenerator(Simulable, metaclass=abc.ABCMeta):
@@ -9,6 +11,11 @@ class DtnAbstractGenerator(Simulable, metaclass=abc.ABCMeta):
            this generator and then call ``self.env.process(self.run())``
         2) The ``run`` method should create Bundles and then call ``self.parent.forward(bundle)``
            Also, call the ``self.monitor_new_bundle`` to record the generation of bundles
+
+        .. Tip:: Generators with high bundle rates can release their bundles in batches (see
+                 ``batch_bundles`` and ``run_batches``). Then, all bundles to the same destination
+                 generated within ``batch_step`` seconds are released as one bundle that carries
+                 their data. This is an aggregation of bundles, not a fluid model of the flow.
     """
     # Each generator creates bundles for flow identified by a ``fid``. This is unique across all
     # generators. NOTE: The ``DtnMarkovBundleGenerator`` behaves differently
@@ -28,8 +35,8 @@ class DtnAbstractGenerator(Simulable, metaclass=abc.ABCMeta):
         # If no monitoring, return
         if self.monitor == False: return
 
-        # Counter for bundles sent
-        self.sent = []
+        # Record of bundles sent
+        self.sent = DtnBundleLedger()
 
     def reset(self):
         # Reset static variables
@@ -67,10 +74,54 @@ class DtnAbstractGenerator(Simulable, metaclass=abc.ABCMeta):
             idx = pd.MultiIndex(levels=[[],[]], labels=[[],[]], names=['bid', 'cid'])
             df  = pd.DataFrame(index=idx)
         else:
-            df = pd.DataFrame([b.to_dict() for b in self.sent]) if self.monitor else pd.DataFrame()
+            df = self.sent.to_frame()
             df.set_index(['bid', 'cid'], drop=True, inplace=True)
         return df
 
+    def batch_capacity(self, bundle_size):
+        """ Maximum number of bundles of ``bundle_size`` bits in a batch. It is given by the
+            ``batch_max_volume`` property or, if not provided, by the smallest contact of the
+            contact plan that can carry one bundle. Therefore, a batch never exceeds the
+            capacity of a contact that its bundles could have used.
+
+            .. Warning:: Call it once the simulation runs, the contact plan is not available
+                         when the generators are initialized.
+        """
+        # Get the maximum volume of a batch
+        max_vol = self.props.batch_max_volume
+        if max_vol is None:
+            cp  = getattr(self.parent.mobility_model, 'contacts_df', None)
+            cap = cp['capacity'] if cp is not None and 'capacity' in cp else pd.Series([])
+            cap = cap[cap >= bundle_size]
+            max_vol = cap.min() if len(cap) > 0 else np.inf
+
+        return max(1, int(max_vol // bundle_size)) if np.isfinite(max_vol) else np.inf
+
+    def run_batches(self, batches, new_bundle):
+        """ Release one bundle per batch (see ``batch_bundles``).
+
+            :param batches: List of ``(time, count, destination)`` with the time at which each batch
+                            is released, its number of bundles and their destination
+            :param new_bundle: Function ``new_bundle(n, dest)`` that creates the bundle that carries
+                               the data of ``n`` bundles to ``dest``
+        """
+        for t, n, dest in batches:
+            # Wait until the batch is complete
+            yield self.env.timeout(max(t - self.t, 0))
+
+            # If the node is dead, exit
+            if not self.is_alive: return
+
+            # Create a new bundle and record it
+            bundle = new_bundle(n, dest)
+            self.monitor_new_bundle(bundle)
+
+            # Log the new bundle creation
+            self.disp('{} is created at node {} ({} bundles)', bundle, self.parent.nid, n)
+
+            # Schedule routers of bundle
+            self.parent.forward(bundle)
+
     def monitor_new_bundle(self, bundle):
         if self.monitor == False: return
         self.sent.append(bundle)
@@ -86,4 +137,42 @@ class DtnAbstractGenerator(Simulable, metaclass=abc.ABCMeta):
         """ Return the total data volume in [bits] generated
             during the simulation
         """
-        return sum(b.data_vol for b in self.sent) if self.monitor else -1
\ No newline at end of file
+        return self.sent.sum('data_vol') if self.monitor else -1
+
+def batch_bundles(times, dests, step, max_count=np.inf):
+    """ Group the bundles of a flow in batches. A batch has the bundles to the same destination
+        released within a segment of ``step`` seconds, up to ``max_count`` bundles.
+
+        :param times: Sorted release times of the bundles
+        :param dests: Destination of each bundle
+        :param step: Duration of a segment in [sec]
+        :param max_count: Maximum number of bundles in a batch
+        :return: List of ``(time, count, destination)`` sorted by time. A batch is released
+                 at the time of its last bundle.
+    """
+    # Initialize variables
+    times = np.asarray(times, dtype=float)
+    dests = pd.Series(dests, dtype=object)
+    if len(times) == 0: return []
+
+    # Segment of each bundle. Segments are aligned with the start of the flow
+    seg = np.floor((times - times[0]) / step).astype('int64')
+
+    # Split the bundles of each destination
+    batches = []
+    for dest, idx in dests.groupby(dests, sort=False).indices.items():
+        # Find the first bundle of each batch
+        t, s  = times[idx], seg[idx]
+        first = np.ones(len(t), dtype=bool)
+        first[1:] = s[1:] != s[:-1]
+        if np.isfinite(max_count):
+            pos    = np.arange(len(t))
+            first |= (pos - np.maximum.accumulate(np.where(first, pos, 0))) % int(max_count) == 0
+
+        # Store the batches
+        start = np.flatnonzero(first)
+        last  = np.append(start[1:], len(t)) - 1
+        batches.extend(zip(t[last], np.diff(np.append(start, len(t))), [dest]*len(start)))
+
+    # Sort the batches by release time
+    return sorted(batches, key=lambda b: b[0])
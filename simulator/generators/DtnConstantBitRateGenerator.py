@@ -1,6 +1,6 @@
 import numpy as np
 from simulator.core.DtnBundle import Bundle
-from simulator.generators.DtnAbstractGenerator import DtnAbstractGenerator
+from simulator.generators.DtnAbstractGenerator import DtnAbstractGenerator, batch_bundles
 
 class DtnConstantBitRateGenerator(DtnAbstractGenerator):
 
@@ -16,6 +16,9 @@ class DtnConstantBitRateGenerator(DtnAbstractGenerator):
         self.bundle_lat = self.props.bundle_TTL
         self.critical   = self.props.critical
 
+        # Duration of the batch segments. If None, bundles are generated one by one
+        self.batch_step = self.props.batch_step
+
         # Get origin and destination
         self.orig = self.parent.nid
         self.dest = self.props.destination
@@ -24,7 +27,7 @@ class DtnConstantBitRateGenerator(DtnAbstractGenerator):
         self.assign_fid()
 
         # Run generator
-        self.env.process(self.run())
+        self.env.process(self.run() if self.batch_step is None else self.run_batched())
 
     def run(self):
         # How often a bundle should be released
@@ -54,6 +57,23 @@ class DtnConstantBitRateGenerator(DtnAbstractGenerator):
             # If you exceed this generator's duration, exit
             if self.t >= self.tstart+self.duration: break
 
+    def run_batched(self):
+        # How often a bundle should be released and number of bundles in the flow
+        dt = self.bundle_sz / self.datarate
+        n  = max(1, int(np.ceil(self.duration / dt)))
+
+        # Draw the destination of every bundle and group them in batches
+        dests   = self.destination()
+        batches = batch_bundles(self.tstart + dt*np.arange(n), [next(dests) for _ in range(n)],
+                                self.batch_step, self.batch_capacity(self.bundle_sz))
+
+        # Function to create the bundle of a batch
+        def new_bundle(n, dest):
+            return Bundle(self.env, self.orig, dest, self.data_type, n*self.bundle_sz,
+                          self.bundle_lat, self.critical, fid=self.fid, TTL=self.bundle_lat)
+
+        yield from self.run_batches(batches, new_bundle)
+
     def predicted_data_vol(self):
         return self.datarate*self.duration
 
@@ -11,7 +11,7 @@ from pathlib import Path
 from simulator.core.DtnBundle import Bundle
 from simulator.utils.DtnIO import load_traffic_file
 from simulator.utils.DtnUtils import shift_traffic
-from simulator.generators.DtnAbstractGenerator import DtnAbstractGenerator
+from simulator.generators.DtnAbstractGenerator import DtnAbstractGenerator, batch_bundles
 
 # ============================================================================================================
 # === DEFINE LATENCY CATEGORIES - THESE ARE CONSTANT
@@ -190,6 +190,9 @@ class DtnMarkovBundleGenerator(DtnAbstractGenerator):
         # Initialize variables
         self.traffic_file = self.config['globals'].indir / props.file
 
+        # Duration of the batch segments. If None, bundles are generated one by one
+        self.batch_step = props.batch_step
+
     def reset(self):
         # Reset static variables
         super().reset()
@@ -203,7 +206,8 @@ class DtnMarkovBundleGenerator(DtnAbstractGenerator):
         self.flows = self.__class__._all_flows[self.parent.nid]
 
         # Iterate over all flows for this generator
-        for _, flow in self.flows.items(): self.env.process(self.run(flow))
+        for _, flow in self.flows.items():
+            self.env.process(self.run(flow) if self.batch_step is None else self.run_batched(flow))
 
     def load_flows(self):
         # Load generators file
@@ -254,6 +258,20 @@ class DtnMarkovBundleGenerator(DtnAbstractGenerator):
             # Schedule routers of bundle
             self.parent.forward(new_bundle)
 
+    def run_batched(self, flow):
+        # Group bundles in batches. All bundles of a flow have the same destination
+        n       = len(flow['Bundles'])
+        batches = batch_bundles(flow['Bundles'], [flow['Dest']]*n, self.batch_step,
+                                self.batch_capacity(flow['BundleSize']))
+
+        # Function to create the bundle of a batch
+        def new_bundle(n, dest):
+            bundle = Bundle.from_flow(self.env, flow)
+            bundle.data_vol = n*flow['BundleSize']
+            return bundle
+
+        yield from self.run_batches(batches, new_bundle)
+
     def predicted_data_vol(self):
         """ Predicted data volume in [bits] """
         return sum(f['DataRate']*((f['EndTime']-f['StartTime']).total_seconds())
@@ -1,5 +1,7 @@
 import abc
 from simulator.core.DtnCore import Simulable
+from simulator.routers.contact_graph import ContactGraph
+from simulator.utils.DtnContactTimelines import ContactTimelines
 
 class DtnAbstractMobilityModel(Simulable, metaclass=abc.ABCMeta):
     """ An abstract mobility model """
@@ -11,6 +13,36 @@ class DtnAbstractMobilityModel(Simulable, metaclass=abc.ABCMeta):
         # Store properties
         self.props = props
 
+        # Contact graph index and the contact plan it was built from. Built on first use
+        self._contact_graph    = None
+        self._contact_graph_df = None
+
+        # Contact timelines index and the contact plan it was built from. Built on first use
+        self._contact_timelines    = None
+        self._contact_timelines_df = None
+
+    @property
+    def contact_graph(self):
+        """ Contact graph index of the contact plan. It is shared by all routers that use
+            this mobility model and rebuilt if the contact plan changes. Node codes are
+            the ones in the simulation id registry.
+        """
+        if self._contact_graph is None or self._contact_graph_df is not self.contacts_df:
+            self._contact_graph    = ContactGraph(self.contacts_df, ids=self.env.ids)
+            self._contact_graph_df = self.contacts_df
+        return self._contact_graph
+
+    @property
+    def contact_timelines(self):
+        """ Contacts of the contact plan grouped by link (see ``ContactTimelines``). It is
+            shared by all connections and neighbor managers that use this mobility model
+            and rebuilt if the contact plan changes.
+        """
+        if self._contact_timelines is None or self._contact_timelines_df is not self.contacts_df:
+            self._contact_timelines    = ContactTimelines(self.contacts_df)
+            self._contact_timelines_df = self.contacts_df
+        return self._contact_timelines
+
     @abc.abstractmethod
     def initialize(self, *args, **kwargs):
         pass
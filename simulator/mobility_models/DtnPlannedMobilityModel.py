@@ -7,7 +7,8 @@
 """
 
 from .DtnAbstractMobilityModel import DtnAbstractMobilityModel
-import pandas as pd
+from simulator.utils.DtnIO import read_contact_table, check_contact_plan, cache_key
+from simulator.utils.DtnIO import load_table_cache, save_table_cache, resolve_cache_dir
 
 class DtnPlannedMobilityModel(DtnAbstractMobilityModel):
     """ Differences between Planned and Scheduled Mobility Model:
@@ -28,17 +29,20 @@ class DtnPlannedMobilityModel(DtnAbstractMobilityModel):
         # Initialize paths
         indir = self.config['globals'].indir
         self.contact_file = indir / self.props.contacts
+        self.cache_dir = resolve_cache_dir(self.config['globals'], self.props.contact_cache)
 
     def initialize(self):
+        # If the contact plan is cached, just load it
+        key = cache_key('planned', self.contact_file, self.epoch) if self.cache_dir else None
+        cp  = load_table_cache(self.cache_dir / f'{key}.npy') if key else None
+        if cp is not None:
+            self.contacts_df = cp
+            return
+
         # Read the file
-        if self.contact_file.suffix == '.xlsx':
-            cp = pd.read_excel(self.contact_file)
-        elif self.contact_file.suffix == '.csv':
-            converters = {'tstart': lambda x: pd.to_datetime(x),
-                          'tend': lambda x: pd.to_datetime(x)}
-            cp = pd.read_csv(self.contact_file, sep=',', index_col=0, converters=converters)
-        else:
+        if self.contact_file.suffix not in ('.xlsx', '.csv'):
             raise IOError(f'Contact plan {self.contact_file} cannot be loaded.')
+        cp = read_contact_table(self.contact_file, index_col=0 if self.contact_file.suffix == '.csv' else None)
 
         # Transform to relative time
         cp.tstart = (cp.tstart - self.epoch).dt.total_seconds()
@@ -46,21 +50,12 @@ class DtnPlannedMobilityModel(DtnAbstractMobilityModel):
         cp['capacity'] = cp.duration * cp.rate
 
         # Check validity
-        self.check_cp_validity(cp)
+        check_contact_plan(cp)
 
         # Sort columns as expected by DtnCgrBasicRouter
         cp = cp[['orig', 'dest', 'tstart', 'tend', 'duration',
                  'range', 'rate', 'capacity']]
 
-        # Save data
-        self.contacts_df = cp
-
-    def check_cp_validity(self, cp):
-        if (cp.tstart < 0).any() or (cp.tend < 0).any():
-            raise ValueError('Contact plan cannot have contacts starting or ending before 0 sec.'
-                             'This is most likely caused by a mismatch between the contact/range file'
-                             'and the simulation epoch.')
-        if (cp.rate < 0).any():
-            raise ValueError('Contact plan cannot have a contact with a data rate < 0')
-        if (cp.range < 0).any():
-            raise ValueError('Contact plan cannot have a contact with a range  < 0')
\ No newline at end of file
+        # Cache and save data
+        if key: save_table_cache(cp, self.cache_dir / f'{key}.npy')
+        self.contacts_df = cp
\ No newline at end of file
@@ -1,12 +1,18 @@
-from collections import defaultdict
 from .DtnAbstractMobilityModel import DtnAbstractMobilityModel
 import numpy as np
 import pandas as pd
-import itertools
-from scipy.spatial.distance import pdist
+from scipy.spatial import cKDTree
 
 class DtnRandomWaypointMobilityModel(DtnAbstractMobilityModel):
+    """ Random waypoint mobility model. Each node picks a random target in the scenario,
+        waits for a random amount of time, travels to it in a straight line at a random
+        speed, and repeats. Node motion is simulated with steps of ``time_step`` seconds.
 
+        The trajectory of each node is stored as a sequence of piecewise-linear segments,
+        one per target (see ``segments``). Node positions at any time are interpolated
+        from them on demand (see ``positions``), and contacts between nodes are found by
+        solving for the times at which their distance crosses a threshold (see ``contacts``).
+    """
     def __init__(self, env, props):
         # Call parent constructor
         super(DtnRandomWaypointMobilityModel, self).__init__(env, props)
@@ -21,98 +27,325 @@ class DtnRandomWaypointMobilityModel(DtnAbstractMobilityModel):
         self.dt       = props.time_step
         self.until    = props.until
 
-        # Get the positions of all nodes over time
-        self.pos   = self.compute_positions()
-        self.times = pd.unique(self.pos.index.get_level_values(0))
+        # Get the trajectories of all nodes
+        self.segments = self.compute_segments()
 
-        # Get the pairwise distance between all positions
-        self.dist  = self.compute_distances()
+        # Get the trajectories as times and positions at which the node velocity changes
+        self.knots = self.compute_knots()
 
-    def compute_positions(self):
-        # Initialize variables
-        pos = defaultdict(dict)
+        # Contacts computed so far, indexed by maximum distance
+        self._contacts = {}
 
-        # Create function to get random node target
-        tgt_x_fun = lambda: np.random.uniform(low=0, high=self.x_max)
-        tgt_y_fun = lambda: np.random.uniform(low=0, high=self.y_max)
+    def initialize(self, *args, **kwargs):
+        pass
 
-        # Create function to get random node speed
-        vel_fun = lambda: np.random.uniform(low=self.v_min, high=self.v_max)
+    def compute_segments(self):
+        """ Compute the trajectory of all nodes. Random values are drawn in the same order
+            as a step-by-step simulation of the nodes would (node by node, and within each
+            node target by target), so a given seed always yields the same trajectories.
 
-        # Create function to get random node wait time
-        wait_fun = lambda: np.random.uniform(low=self.wait_min, high=self.wait_max)
+            :return: Data frame with one row per segment, sorted by node and start time:
+                     ``node``, ``tstart`` (start time), ``x`` and ``y`` (start point),
+                     ``wait`` (time static at the start point) and ``vx`` and ``vy``
+                     (velocity once the node starts moving).
+        """
+        # Initialize variables
+        segs = []
 
         # Iterate over nodes
-        for i, node in enumerate(self.env.nodes):
-            # Get initial position, direction and travel distance
-            cur_x, cur_y = tgt_x_fun(), tgt_y_fun()
-            new_x, new_y = tgt_x_fun(), tgt_y_fun()
-            wait, vel    = wait_fun(), vel_fun()
-            time = 0.0
+        for node in self.env.nodes:
+            t, x, y, w, vx, vy = self.node_segments()
+            seg = pd.DataFrame({'tstart': t, 'x': x, 'y': y, 'wait': w, 'vx': vx, 'vy': vy})
+            seg.insert(0, 'node', node)
+            segs.append(seg)
+
+        return pd.concat(segs, ignore_index=True)
+
+    def node_segments(self):
+        # Initialize variables
+        dt, until = self.dt, self.until
+        state     = np.random.get_state()
+        draws     = _RandomDraws(self)
+        segs      = []
+
+        # Get initial position, target, wait time and speed
+        x, y   = draws.point()
+        tgt    = draws.target()
+
+        # This node has a 50% chance of starting on a wait period or on a movement period
+        if draws.uniform() <= 0.5: tgt[2] = 0.0
 
-            # This node has a 50% chance of starting on a wait
-            # period or on a movement period
-            if np.random.uniform() <= 0.5: wait = 0.0
+        # Iterate over targets
+        t = 0.0
+        while True:
+            tx, ty, wait, vel = tgt
 
-            # Compute initial direction to travel
-            ang = np.arctan2(new_y - cur_y, new_x - cur_x)
+            # Number of time steps spent waiting and moving towards the target
+            nw = int(np.ceil(wait/dt)) if wait > 0 else 0
+            ang = np.arctan2(ty-y, tx-x)
+            dx, dy = vel*dt*np.cos(ang), vel*dt*np.sin(ang)
+            nm = self.num_steps(x, y, tx, ty, dx, dy, vel*dt)
 
-            # Perform simulation
-            while time <= self.until:
-                # Record current position
-                pos[time, node]['x'] = cur_x
-                pos[time, node]['y'] = cur_y
+            # Store this segment
+            segs.append((t, x, y, nw*dt, vel*np.cos(ang), vel*np.sin(ang)))
 
-                # Update time
-                time += self.dt
+            # If the target is reached after the end of the simulated period, stop
+            if np.isinf(nm) or t + (nw+nm-1)*dt > until: break
 
-                # If you need to wait, remain static
-                if wait > 0:
-                    wait -= self.dt
-                    continue
+            # Move to the target and select a new one
+            t   += (nw+nm)*dt
+            x, y = self.clip(x+nm*dx, y+nm*dy)
+            tgt  = draws.target()
 
-                # Update position
-                dx, dy = vel * self.dt * np.cos(ang), vel * self.dt * np.sin(ang)
-                cur_x, cur_y = cur_x + dx, cur_y + dy
+        # Consume exactly the random values that have been used
+        np.random.set_state(state)
+        np.random.random_sample(draws.num_used)
 
-                # Ensure that you stay within bounds
-                cur_x = max(0, min(cur_x, self.x_max))
-                cur_y = max(0, min(cur_y, self.y_max))
+        return [np.array(v, dtype=float) for v in zip(*segs)]
 
-                # If you are far from your next destination continue
-                if np.sqrt((new_x-cur_x)**2 + (new_y-cur_y)**2) > vel*self.dt:
-                    continue
+    def num_steps(self, x, y, tx, ty, dx, dy, step):
+        """ Number of time steps until a node moving from (x, y) with displacement (dx, dy)
+            per step is within one step of the target (tx, ty).
+        """
+        # A static node never reaches its target
+        if step <= 0: return np.inf
 
-                # Select a new position to move to
-                new_x, new_y = tgt_x_fun(), tgt_y_fun()
+        # Distance to the target after n steps
+        def dist(n):
+            px, py = self.clip(x+n*dx, y+n*dy)
+            return np.hypot(tx-px, ty-py)
 
-                # Decide how long to wait for and how fast to travel
-                wait, vel = wait_fun(), vel_fun()
+        # Estimate the number of steps and correct for rounding errors
+        n = max(1, int(np.ceil(np.hypot(tx-x, ty-y)/step - 1)))
+        while n > 1 and dist(n-1) <= step: n -= 1
+        while dist(n) > step: n += 1
 
-                # Compute the new direction to travel
-                ang = np.arctan2(new_y-cur_y, new_x-cur_x)
+        return n
 
-        # Transform data frame
-        pos = pd.DataFrame.from_dict(pos, orient='index')
-        pos.index.rename(('time', 'node'), inplace=True)
+    def clip(self, x, y):
+        """ Ensure that a position is within the scenario bounds """
+        return np.clip(x, 0, self.x_max), np.clip(y, 0, self.y_max)
 
-        return pos
+    def compute_knots(self):
+        """ Trajectory of each node as the times and positions at which its velocity
+            changes, i.e. the start and end of every wait period. Nodes move in a straight
+            line between consecutive knots. The last knot is always at ``until``.
 
-    def compute_distances(self):
+            :return dict: {node: (t, x, y)}
+        """
         # Initialize variables
-        N     = len(self.env.nodes)
-        nodes = list(self.env.nodes)
-        combs =  itertools.combinations(range(N), 2)
-        combs = [(nodes[i], nodes[j]) for i, j in combs]
-
-        # Depack for faster processing and compute distances. This is essentially
-        # doing a groupby('time'), but much faster
-        pos_idx = self.pos.index
-        pos_vls = self.pos.values
-        dist = np.zeros((len(combs), len(self.times)))
-        for t in self.times: dist[:, int(t)] = pdist(pos_vls[pos_idx.get_loc(t), :])
-
-        # Dictionary such that dist['N1','N2'] = time series of distances
-        dist = {(o, d): dist[i, :] for i, (o, d) in enumerate(combs)}
-
-        return dist
\ No newline at end of file
+        knots = {}
+
+        # Iterate over nodes
+        for node, seg in self.segments.groupby('node', sort=False):
+            # Start and end of the wait periods. Remove empty wait periods
+            t = np.stack((seg.tstart.values, seg.tstart.values + seg.wait.values), axis=1).ravel()
+            x = np.repeat(seg.x.values, 2)
+            y = np.repeat(seg.y.values, 2)
+            keep = np.ones(len(t), dtype=bool)
+            keep[1::2] = seg.wait.values > 0
+
+            # Remove knots after the end of the simulated period
+            keep &= t < self.until
+            t, x, y = t[keep], x[keep], y[keep]
+
+            # Add the position at the end of the simulated period
+            last = seg.iloc[np.searchsorted(seg.tstart.values, self.until, side='right') - 1]
+            dt   = max(self.until - last.tstart - last.wait, 0)
+            xu, yu = self.clip(last.x + last.vx*dt, last.y + last.vy*dt)
+
+            knots[node] = (np.append(t, self.until), np.append(x, xu), np.append(y, yu))
+
+        return knots
+
+    def positions(self, times, nodes=None):
+        """ Interpolate the positions of a set of nodes. Nodes remain static after ``until``.
+
+            :param array times: Time instants
+            :param list nodes: Nodes ids. Defaults to all nodes
+            :return: Tuple (x, y) of arrays of shape (number of nodes, number of times)
+        """
+        # Initialize variables
+        nodes = list(self.env.nodes) if nodes is None else nodes
+        times = np.asarray(times, dtype=float)
+        x, y  = np.zeros((len(nodes), len(times))), np.zeros((len(nodes), len(times)))
+
+        # Interpolate the trajectory of each node
+        for i, node in enumerate(nodes):
+            t, kx, ky = self.knots[node]
+            x[i, :], y[i, :] = np.interp(times, t, kx), np.interp(times, t, ky)
+
+        return x, y
+
+    def contacts(self, max_dist):
+        """ Contacts between all pairs of nodes, i.e. the periods of time during which
+            they are within ``max_dist`` of each other. Contacts are computed once and
+            shared by all connections with the same ``max_dist``.
+
+            :param float max_dist: Maximum distance between nodes in contact
+            :return dict: {(node 1, node 2): [(start time, end time, average distance), ...]}
+        """
+        if max_dist not in self._contacts:
+            self._contacts[max_dist] = self.compute_contacts(max_dist)
+        return self._contacts[max_dist]
+
+    def compute_contacts(self, max_dist, knots_per_window=32, knots_per_chunk=1024):
+        """ Find contacts between all pairs of nodes. Between two consecutive knots of
+            any trajectory, all nodes move in a straight line, so the squared distance
+            between two nodes is a quadratic function of time and the times at which it
+            crosses ``max_dist`` are found exactly.
+
+            To avoid checking all pairs of nodes, time is split into windows and only the
+            pairs of nodes whose bounding boxes within a window are closer than ``max_dist``
+            are checked. These pairs are found with a KD-tree.
+
+            :param float max_dist: Maximum distance between nodes in contact
+            :param int knots_per_window: Number of knots in a window
+            :param int knots_per_chunk: Number of knots for which positions are interpolated
+                                        at once. Bounds the memory used.
+            :return dict: See ``contacts``
+        """
+        # Initialize variables
+        nodes    = list(self.env.nodes)
+        grid     = np.unique(np.concatenate([self.knots[n][0] for n in nodes]))
+        contacts = []
+
+        # Iterate over chunks of knots. Consecutive chunks share one knot
+        for c0 in range(0, max(len(grid)-1, 1), knots_per_chunk):
+            # Get the position of all nodes at all knots in this chunk
+            t    = grid[c0:c0+knots_per_chunk+1]
+            x, y = self.positions(t, nodes=nodes)
+
+            # Iterate over windows. Consecutive windows share one knot
+            for w0 in range(0, max(len(t)-1, 1), knots_per_window):
+                w = slice(w0, w0+knots_per_window+1)
+                contacts.append(_window_contacts(t[w], x[:, w], y[:, w], max_dist))
+
+        # Merge the contacts of all windows
+        i, j, ts, te, rng = _merge_contacts(*[np.concatenate(v) for v in zip(*contacts)])
+        if len(ts) == 0: return {}
+
+        # Dictionary such that contacts['N1','N2'] = list of contacts
+        rows = list(zip(ts.tolist(), te.tolist(), rng.tolist()))
+        cuts = np.flatnonzero((np.diff(i) != 0) | (np.diff(j) != 0)) + 1
+        return {(nodes[i[a]], nodes[j[a]]): rows[a:b]
+                for a, b in zip(np.r_[0, cuts], np.r_[cuts, len(rows)])}
+
+class _RandomDraws(object):
+    """ Random values for ``DtnRandomWaypointMobilityModel``. Values are drawn in blocks
+        and handed out in order. ``num_used`` is the number of values consumed so far.
+    """
+    def __init__(self, model, block_size=256):
+        self.model      = model
+        self.block_size = block_size
+        self.values     = np.zeros(0)
+        self.num_used   = 0
+
+    def next(self, n):
+        # Draw more values if necessary
+        if self.num_used + n > len(self.values):
+            block = np.random.random_sample(max(n, self.block_size))
+            self.values = np.concatenate((self.values, block))
+
+        # Hand out the next values
+        vals = self.values[self.num_used:self.num_used+n]
+        self.num_used += n
+
+        return vals
+
+    def uniform(self):
+        return self.next(1)[0]
+
+    def point(self):
+        """ Random point in the scenario """
+        m    = self.model
+        u, v = self.next(2)
+        return m.x_max*u, m.y_max*v
+
+    def target(self):
+        """ Random target, wait time and speed """
+        m = self.model
+        x, y = self.point()
+        w, v = self.next(2)
+        return [x, y, m.wait_min + (m.wait_max-m.wait_min)*w, m.v_min + (m.v_max-m.v_min)*v]
+
+def _window_contacts(t, x, y, max_dist):
+    """ Find the periods of time during which pairs of nodes are within ``max_dist`` of
+        each other in a window of time. Nodes must move in a straight line between
+        consecutive times ``t``.
+
+        :param array t: Times (K)
+        :param array x: Position of all nodes (N x K)
+        :param array y: Position of all nodes (N x K)
+        :return tuple: Node index pairs, start and end times of the periods, and
+                       integral of the distance over them
+    """
+    # Bounding box of each node in this window
+    xmin, xmax = x.min(axis=1), x.max(axis=1)
+    ymin, ymax = y.min(axis=1), y.max(axis=1)
+    half = 0.5*np.hypot(xmax-xmin, ymax-ymin)
+
+    # Find pairs of nodes whose bounding boxes may be closer than max_dist
+    tree  = cKDTree(np.stack((0.5*(xmin+xmax), 0.5*(ymin+ymax)), axis=1))
+    pairs = tree.query_pairs(max_dist + 2*half.max(), output_type='ndarray')
+    i, j  = pairs[:, 0], pairs[:, 1]
+
+    # Keep the pairs whose bounding boxes are closer than max_dist
+    gx = np.maximum(0, np.maximum(xmin[j]-xmax[i], xmin[i]-xmax[j]))
+    gy = np.maximum(0, np.maximum(ymin[j]-ymax[i], ymin[i]-ymax[j]))
+    ok = gx**2 + gy**2 <= max_dist**2
+    i, j = i[ok], j[ok]
+
+    # Relative position at the start and end of each interval between knots
+    rx, ry = x[i, :] - x[j, :], y[i, :] - y[j, :]
+    x0, y0 = rx[:, :-1], ry[:, :-1]
+    dx, dy = rx[:, 1:] - x0, ry[:, 1:] - y0
+
+    # Solve |r0 + dr*s|^2 = max_dist^2 for s in [0, 1]
+    a    = dx**2 + dy**2
+    b    = 2*(x0*dx + y0*dy)
+    c    = x0**2 + y0**2 - max_dist**2
+    disc = np.sqrt(np.maximum(b**2 - 4*a*c, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s0 = np.where(a > 0, (-b-disc)/(2*a), 0)
+        s1 = np.where(a > 0, (-b+disc)/(2*a), 1)
+    inside = np.where(a > 0, b**2 - 4*a*c >= 0, c <= 0)
+    s0, s1 = np.clip(s0, 0, 1), np.clip(s1, 0, 1)
+    inside &= s1 > s0
+
+    # Start and end times of each period within range
+    pi, ki = np.nonzero(inside)
+    ta, tb = t[ki], t[ki+1]
+    ts = np.where(s0[pi, ki] == 0, ta, ta + s0[pi, ki]*(tb-ta))
+    te = np.where(s1[pi, ki] == 1, tb, ta + s1[pi, ki]*(tb-ta))
+
+    # Integral of the distance over each period (Simpson's rule)
+    dist = lambda s: np.hypot(x0[pi, ki] + dx[pi, ki]*s, y0[pi, ki] + dy[pi, ki]*s)
+    s0, s1 = s0[pi, ki], s1[pi, ki]
+    dint = (te-ts)/6 * (dist(s0) + 4*dist(0.5*(s0+s1)) + dist(s1))
+
+    return i[pi], j[pi], ts, te, dint
+
+def _merge_contacts(i, j, ts, te, dint):
+    """ Merge consecutive periods of time within range into contacts. Returns the node
+        index pairs, start and end times, and average distance of each contact.
+    """
+    # Sort periods by pair of nodes and start time
+    k = np.lexsort((ts, j, i))
+    i, j, ts, te, dint = i[k], j[k], ts[k], te[k], dint[k]
+    if len(ts) == 0: return i, j, ts, te, dint
+
+    # A new contact starts if the pair changes or if it starts after the previous one ended
+    new = np.ones(len(ts), dtype=bool)
+    new[1:] = (i[1:] != i[:-1]) | (j[1:] != j[:-1]) | (ts[1:] > te[:-1])
+    first = np.flatnonzero(new)
+
+    # Aggregate the periods of each contact
+    te   = np.maximum.reduceat(te, first)
+    dint = np.add.reduceat(dint, first)
+    i, j, ts = i[first], j[first], ts[first]
+
+    # Remove contacts that last zero seconds
+    ok = te > ts
+
+    return i[ok], j[ok], ts[ok], te[ok], dint[ok]/(te[ok]-ts[ok])
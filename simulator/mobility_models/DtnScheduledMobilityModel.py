@@ -1,6 +1,6 @@
 from .DtnAbstractMobilityModel import DtnAbstractMobilityModel
 import pandas as pd
-from simulator.utils.DtnIO import load_ezmonte_data
+from simulator.utils.DtnIO import load_ezmonte_data, resolve_cache_dir
 
 class DtnScheduledMobilityModel(DtnAbstractMobilityModel):
 
@@ -12,11 +12,13 @@ class DtnScheduledMobilityModel(DtnAbstractMobilityModel):
         indir = self.config['globals'].indir
         self.contact_file = indir / self.props.contacts
         self.ranges_file = indir / self.props.ranges
+        self.cache_dir = resolve_cache_dir(self.config['globals'], self.props.contact_cache)
 
     def initialize(self, *args, **kwargs):
         # Load data from ezmonte
         print('Loading contact plan and range intervals')
-        cp, ri = load_ezmonte_data(self.contact_file, self.ranges_file, self.epoch)
+        cp, ri = load_ezmonte_data(self.contact_file, self.ranges_file, self.epoch,
+                                   cache_dir=self.cache_dir)
 
         # Compute the data rate for every link
         dr = [(*cid, conn.total_datarate) for cid, conn in self.env.connections.items()]
@@ -26,15 +28,10 @@ class DtnScheduledMobilityModel(DtnAbstractMobilityModel):
         cp = pd.merge(cp, dr, how='left', left_on=('orig', 'dest'), right_index=True)
         cp['capacity'] = (cp.tend - cp.tstart) * cp.rate
 
-        # Check validity of generated contact plan
-        if (cp.tstart < 0).any() or (cp.tend < 0).any():
-            raise ValueError('Contact plan cannot have contacts starting or ending before 0 sec.'
-                             'This is most likely caused by a mismatch between the contact/range file'
-                             'and the simulation epoch.')
+        # Check validity of the data rates. The rest of the contact plan is validated
+        # when it is loaded
         if (cp.rate < 0).any():
             raise ValueError('Contact plan cannot have a contact with a data rate < 0')
-        if (cp.range < 0).any():
-            raise ValueError('Contact plan cannot have a contact with a range  < 0')
 
         # Store dataframes
         self.contacts_df = cp
@@ -1,11 +1,10 @@
 from collections import defaultdict, deque
-from copy import deepcopy
+import numpy as np
 import simpy
-from simulator.core.DtnCore import Simulable
+from simulator.core.DtnCore import Simulable, run_now, timeout_at
 from simulator.core.DtnLock import DtnLock
 from simulator.core.DtnSemaphore import DtnSemaphore
 from simulator.nodes.DtnOverbookeableQueue import DtnOverbookeableQueue
-from simulator.utils.DtnIO import prepare_contact_plan
 
 class DtnCgrNeighborManager(Simulable):
     """ Implements the following functions:
@@ -13,6 +12,10 @@ class DtnCgrNeighborManager(Simulable):
             1) Open/close queue given the contact plan
             2) Transmit overdue mechanism when a bundle exits 
             3) Re-routers of bundles due to overbooking
+
+        .. Tip:: Contacts are only opened and closed while there is traffic for this
+                 neighbor. Otherwise, the manager sleeps until a bundle is put into it
+                 and skips all contacts that ended in the meantime.
     """
     def __init__(self, env, parent, neighbor):
         super().__init__(env)
@@ -32,6 +35,10 @@ class DtnCgrNeighborManager(Simulable):
         # Store bundles that should be processed in future contacts
         self.future         = defaultdict(deque)
         self.future_backlog = defaultdict(int)
+        self.num_future     = 0
+
+        # Event to wake up the connection monitor when it is sleeping
+        self.wakeup = None
 
         # Lock to ensure that all operations related to putting one bundle in
         # the queue are "atomic"
@@ -42,10 +49,9 @@ class DtnCgrNeighborManager(Simulable):
         self.outduct_sem = DtnSemaphore(env)
 
     def initialize(self):
-        # Store the contact plan for this manager
-        self.cp = prepare_contact_plan(self.parent.nid,
-                                       self.neighbor,
-                                       self.parent.mobility_model.contacts_df)
+        # Store the contacts for this manager (see ``ContactTimeline``)
+        self.cp = self.parent.mobility_model.contact_timelines.timeline(self.parent.nid,
+                                                                        self.neighbor)
 
         # Create the process that monitors the connection's semaphore
         # and start/stops the queue_extractor when it opens/closes
@@ -66,7 +72,19 @@ class DtnCgrNeighborManager(Simulable):
     def capacity(self):
         return self.queue.capacity
 
+    @property
+    def has_traffic(self):
+        """ True if there are bundles in the queue or waiting for future contacts """
+        return bool(self.queue.queue) or self.num_future > 0
+
+    def wake(self):
+        """ Wake up the connection monitor if it is sleeping """
+        if self.wakeup is not None and not self.wakeup.triggered: self.wakeup.succeed()
+
     def put(self, rt_record, priority, where='left'):
+        # Make sure the connection monitor is running
+        self.wake()
+
         # Get the contact id for the contact to be used. If this rt_record
         # comes from CGR routing, this will be specified because you have
         # a contact plan. If this rt_record comes from static routing, the
@@ -78,11 +96,29 @@ class DtnCgrNeighborManager(Simulable):
         if cid != self.current_cid:
             self.future[cid].appendleft(rt_record)
             self.future_backlog[cid] += rt_record.bundle.data_vol
+            self.num_future += 1
+            return
+
+        # In direct forwarding mode, if no other bundle is being put in the queue, do the
+        # put operation now. It never blocks since the queue has infinite capacity. If no
+        # contact is active, use a process instead so that a contact that starts at this
+        # same instant is set up before the bundle is put in the queue.
+        if self.parent.direct_dispatch and not self.put_lock.keys and self.current_cid is not None:
+            self.put_now(rt_record, priority, where)
             return
 
         # Process the put operation
         self.env.process(self.do_put(rt_record, priority, where))
-        
+
+    def put_now(self, rt_record, priority, where):
+        # Put the bundle in the queue. Returns the bundles removed to make room for it
+        to_reroute = run_now(self.queue.put(rt_record, priority, where=where))
+        self.wake()
+
+        # Re-route bundles
+        for record in to_reroute:
+            self.reroute(record, reason='overbooked')
+
     def do_put(self, rt_record, priority, where):
         # Only one bundle can be put into the queue at a time. Otherwise, you
         # have race conditions (e.g. you make room for a bundle but before you
@@ -93,6 +129,7 @@ class DtnCgrNeighborManager(Simulable):
         # The second argument tells you which bundles were removed to make room
         # for this one.
         to_reroute = yield from self.queue.put(rt_record, priority, where=where)
+        self.wake()
         
         # Re-route bundles
         for record in to_reroute:
@@ -127,7 +164,7 @@ class DtnCgrNeighborManager(Simulable):
         # Fragment the bundle if necessary
         if capacity < bundle.data_vol:
             # Create a copy of this bundle with the data that does not fit
-            new_record = deepcopy(rt_record)
+            new_record = rt_record.clone()
             new_record.bundle.data_vol = bundle.data_vol - capacity
             rt_record.bundle.data_vol = capacity
 
@@ -167,19 +204,35 @@ class DtnCgrNeighborManager(Simulable):
         if self.cp is None: yield self.env.exit()
 
         # If contact plan has not valid entries, exit
-        if self.cp.empty: yield self.env.exit()
+        if len(self.cp) == 0: yield self.env.exit()
+
+        # Initialize variables
+        cp = self.cp
+        t_open, t_close = cp.t_open, cp.t_close
+        i, n = 0, len(cp)
 
         # Iterate over range intervals
-        for cid, row in self.cp.iterrows():
-            # Wait until the contact starts
-            yield self.env.timeout(max(0.0, row['dtstart']))
+        while i < n:
+            # If there is no traffic for this neighbor, sleep until there is and skip
+            # all contacts that have ended in the meantime
+            woken = not self.has_traffic
+            if woken:
+                self.wakeup = self.env.event()
+                yield self.wakeup
+                self.wakeup = None
+                i = max(i, np.searchsorted(t_close, self.t, side='right'))
+                if i >= n: break
+
+            # Wait until the contact starts. If it has already started, open it now
+            # so that it is set up before the bundles that woke up the manager are put
+            if not woken or t_open[i] > self.t: yield timeout_at(self.env, t_open[i])
 
             # Set the current contact properties
-            self.current_cid      = cid
-            self.current_dr       = row['rate']
-            self.current_range    = row['range']
-            self.queue.capacity   = row['duration']*self.current_dr
-            self.queue.next_close = row['tend']
+            self.current_cid      = cp.cid[i]
+            self.current_dr       = cp.rate[i]
+            self.current_range    = cp.range[i]
+            self.queue.capacity   = cp.duration[i]*self.current_dr
+            self.queue.next_close = cp.tend[i]
             self.queue.data_rate  = self.current_dr
 
             # If there are bundles waiting for this contact, process them immediately
@@ -189,7 +242,7 @@ class DtnCgrNeighborManager(Simulable):
             self.outduct_sem.turn_green()
 
             # Wait until the contact ends
-            yield self.env.timeout(row['duration'])
+            yield timeout_at(self.env, t_close[i])
 
             # Delete current contact properties
             self.current_cid      = None
@@ -202,6 +255,9 @@ class DtnCgrNeighborManager(Simulable):
             # Turn the outduct semaphore red
             self.outduct_sem.turn_red()
 
+            # Move to the next contact
+            i += 1
+
     def vacate_backlog(self):
         # Check if there is backlog for this contact
         if self.current_cid not in self.future:
@@ -211,6 +267,7 @@ class DtnCgrNeighborManager(Simulable):
         while self.future[self.current_cid]:
             rt_record = self.future[self.current_cid].pop()
             self.future_backlog[self.current_cid] -= rt_record.bundle.data_vol
+            self.num_future -= 1
             self.put(rt_record, rt_record.priority)
         
     def queue_extractor(self):
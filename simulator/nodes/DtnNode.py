@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from collections import defaultdict
-from copy import deepcopy
 import importlib
 import pandas as pd
+from simulator.core.DtnBundleLedger import DtnBundleLedger
 from simulator.core.DtnQueue import DtnQueue
 from simulator.core.DtnCore import Simulable
 from simulator.utils.DtnUtils import load_class_dynamically
@@ -36,9 +36,14 @@ class DtnNode(Simulable):
 
         # Queue for the limbo
         self.limbo_queue = DtnQueue(env)
+
+        # If True, bundles are routed as soon as they are handed to the node (see
+        # ``dispatch``). Flag to know if a bundle is being routed at this moment.
+        self.direct_dispatch = props.forward_mode == 'direct'
+        self.dispatching     = False
         
         # Create variables to store results
-        self.dropped = []
+        self.dropped = DtnBundleLedger()
 
     def reset(self):
         # Reset node elements
@@ -68,8 +73,9 @@ class DtnNode(Simulable):
         # environment.
         self.initialize_radios()
 
-        # Now that you have created everything, start the forward and limbo managers
-        self.env.process(self.forward_manager())
+        # Now that you have created everything, start the forward and limbo managers.
+        # In direct forwarding mode, there is no need for a forward manager.
+        if not self.direct_dispatch: self.env.process(self.forward_manager())
         self.env.process(self.limbo_manager())
 
     def initialize_bundle_generators(self):
@@ -260,7 +266,32 @@ class DtnNode(Simulable):
             # this delay will be preserved here. To have non-blocking behavior, use
             # ``self.env.process(self.process_bundle(item[0], first_time=item[1])``
             self.process_bundle(bundle, first_time=first_time)
-        
+
+    def dispatch(self, item):
+        """ Route a bundle synchronously (direct forwarding mode). If this node is already
+            routing a bundle (e.g. a bundle is re-routed while routing another one), the item
+            waits in the input queue and it is routed after the items that arrived before it.
+
+            :param tuple item: (bundle, first_time)
+        """
+        # Add the item to the input queue. If another bundle is being routed, you are done
+        self.in_queue.put_nowait(item)
+        if self.dispatching: return
+
+        # Route all bundles in the input queue in the order they arrived
+        self.dispatching = True
+        try:
+            while self.in_queue:
+                bundle, first_time = self.in_queue.get_nowait()
+                self.process_bundle(bundle, first_time=first_time)
+        finally:
+            self.dispatching = False
+
+    def enqueue(self, item):
+        """ Hand a (bundle, first_time) item to the forwarding mechanism. This never blocks """
+        if self.direct_dispatch: self.dispatch(item)
+        else: self.in_queue.put_nowait(item)
+
     def process_bundle(self, bundle, first_time=True):
         """ Process this bundle in the node. This entails:
                 1) If this node is the destination, you are done
@@ -282,7 +313,7 @@ class DtnNode(Simulable):
             return
 
         # Add this node in the list of visited nodes (NOTE: must be done before ``find_routes``)
-        if first_time: bundle.visited.append(self.nid)
+        if first_time: bundle.add_visited(self.nid)
 
         # Reset the list of excluded contacts
         if first_time: bundle.excluded = []
@@ -312,8 +343,8 @@ class DtnNode(Simulable):
             # Log this successful routers event
             self.disp('{} is routed towards {}', record.bundle, record.contact['dest'])
 
-            # Get the record to forward. If critical and first time, deepcopy it
-            to_fwd = deepcopy(record) if bundle.critical and first_time else record
+            # Get the record to forward. If critical and first time, clone it
+            to_fwd = record.clone() if bundle.critical and first_time else record
 
             # Pass the bundle to the appropriate neighbor manager
             self.store_routed_bundle(to_fwd)
@@ -354,6 +385,11 @@ class DtnNode(Simulable):
             .. Tip:: This function never blocks despite the ``yield from`` because
                      the input queue has infinite capacity
         """
+        # In direct forwarding mode, route the bundle now
+        if self.direct_dispatch:
+            self.dispatch((bundle, True))
+            return
+
         self.env.process(self.do_forward(bundle))
 
     def do_forward(self, bundle):
@@ -371,17 +407,14 @@ class DtnNode(Simulable):
         if contact_ids is not None:
             if not isinstance(contact_ids, (list, tuple)): contact_ids = (contact_ids,)
             bundle.excluded.extend(contact_ids)
-        self.env.process(self.do_limbo(bundle))
 
-    def do_limbo(self, bundle):
-        # If you do not have a limbo wait finite, wait for a second here.
-        # Otherwise you will try to re-route the bundle at the same instant
-        # in time, thus creating an infinite loop
+        # Add to the limbo queue. If you do not have a limbo wait finite, wait for a
+        # second here using a timer. Otherwise you will try to re-route the bundle at
+        # the same instant in time, thus creating an infinite loop
         if self.props.limbo_wait == float('inf'):
-            yield self.env.timeout(1)
-
-        # Add to the limbo queue
-        yield from self.limbo_queue.put((bundle, False))
+            self.env.timers.schedule(1, self.limbo_queue.put_nowait, (bundle, False))
+        else:
+            self.limbo_queue.put_nowait((bundle, False))
 
     def limbo_manager(self):
         # Initialize variables
@@ -400,8 +433,7 @@ class DtnNode(Simulable):
             items = yield from self.limbo_queue.get_all(check_empty=check_empty)
 
             # Put all items in the input queue
-            for item in items:
-                yield from self.in_queue.put(item)
+            for item in items: self.enqueue(item)
 
     def check_bundle_TTL(self, bundle):
         if self.t-bundle.creation_time < bundle.TTL:
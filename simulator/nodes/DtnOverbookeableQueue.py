@@ -12,8 +12,9 @@ class DtnLockeablePriorityQueue(Simulable):
         # Store the node that contains this manager, it is a node
         self.parent = parent
 
-        # Create a priority queue for this manager
-        self.queue = DtnPriorityQueue(env)
+        # Create a priority queue for this manager. It keeps track of the number of bits
+        # accumulated in the queue
+        self.queue = DtnPriorityQueue(env, size=record_size)
 
         # Create the critical and bulk priority levels
         self.queue.new_priority_level(critical_priority)    # Critical
@@ -26,9 +27,6 @@ class DtnLockeablePriorityQueue(Simulable):
         self.close()
         self.disp('Gate is closed')
 
-        # Total number of bits accumulated in the queue
-        self.backlog = 0.0
-
         # If no need to monitor, return
         if self.monitor == False: return
 
@@ -48,14 +46,19 @@ class DtnLockeablePriorityQueue(Simulable):
     def items(self):
         return self.queue.items
 
+    @property
+    def backlog(self):
+        """ Total number of bits accumulated in the queue """
+        return self.queue.backlog_bits()
+
+    def backlog_bits(self, priority=None):
+        return self.queue.backlog_bits(priority)
+
     def put(self, rt_record, priority, where='left'):
         # Log the arrival
         self.disp('{} with priority {} is put into the manager {}-{}',
                   rt_record.bundle, priority, self.parent.parent.nid, self.parent.neighbor)
 
-        # Add this bundle data volume to the backlog
-        self.backlog += rt_record.bundle.data_vol
-
         # Put in the queue
         yield from self.queue.put(rt_record, priority, where=where)
 
@@ -66,9 +69,6 @@ class DtnLockeablePriorityQueue(Simulable):
         # Log the departure
         self.disp('{} is retrieved from the manager', rt_record.bundle)
 
-        # Subtract this bundle data volume from the backlog
-        self.backlog -= rt_record.bundle.data_vol
-
         return rt_record
 
     def close(self):
@@ -191,3 +191,7 @@ class DtnOverbookeableQueue(DtnLockeablePriorityQueue):
 
         # Return list of bulk bundles to be removed
         return removed
+
+def record_size(rt_record):
+    """ Size of a routing record in the queue [bits] """
+    return rt_record.bundle.data_vol
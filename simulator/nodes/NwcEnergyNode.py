@@ -63,5 +63,4 @@ class NwcEnergyNode(DtnNode):
             self.num_bnd[self.t] = len(items)
 
             # Put all items in the input queue
-            for item in items:
-                yield from self.in_queue.put(item)
\ No newline at end of file
+            for item in items: self.enqueue(item)
\ No newline at end of file
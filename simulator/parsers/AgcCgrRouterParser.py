@@ -0,0 +1,5 @@
+from .DtnCgrBasicRouterParser import DtnCgrBasicRouterParser
+
+class AgcCgrRouterParser(DtnCgrBasicRouterParser):
+    """ Validator for YAML configuration parameters of AgcCgrRouter """
+    pass
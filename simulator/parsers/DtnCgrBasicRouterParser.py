@@ -0,0 +1,22 @@
+from .DtnAbstractParser import DtnAbstractParser
+from enum import Enum
+from typing import List, Set, Union
+
+class CgrEngine(str, Enum):
+    HEAP = 'heap'
+    MASK = 'mask'
+
+class DtnCgrBasicRouterParser(DtnAbstractParser):
+    """ Validator for YAML configuration parameters of DtnCgrBasicRouter """
+    # List of nodes that can be used as relays
+    relays: Union[Set[str], List[str], str] = 'all'
+
+    # Implementation of Dijkstra over the contact graph. ``heap`` uses a priority
+    # queue and the contact graph index, ``mask`` scans the entire contact plan at
+    # every iteration. Both return the same routes.
+    engine: CgrEngine = CgrEngine.HEAP
+
+    # If True, routes are cached per (destination, visited, excluded) and reused
+    # until one of their contacts ends, runs out of capacity or fails. Note that a
+    # cached route is not necessarily the route a new Dijkstra search would return.
+    route_cache: bool = False
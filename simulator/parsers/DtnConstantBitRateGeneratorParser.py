@@ -28,4 +28,12 @@ class DtnConstantBitRateGeneratorParser(DtnAbstractParser):
 
     # Destination node. If none, then the destination of the bundle
     # will be chosen at random from all other nodes in the network
-    destination: Optional[str] = None
\ No newline at end of file
+    destination: Optional[str] = None
+
+    # If provided, release bundles in batches. All bundles to the same destination generated
+    # within ``batch_step`` seconds are released as one bundle that carries their data
+    batch_step: Optional[PositiveFloat] = None
+
+    # Maximum data volume of a batch in [bits]. If None, the capacity of the smallest contact
+    # in the contact plan that can carry one bundle
+    batch_max_volume: Optional[PositiveFloat] = None
@@ -1,6 +1,14 @@
 from .DtnAbstractParser import DtnAbstractParser
+from enum import Enum
 from pathlib import Path
-from pydantic import validator, PositiveFloat
+from pydantic import validator, PositiveFloat, PositiveInt
+from typing import Optional
+
+class ConnMonitorLevel(str, Enum):
+    OFF       = 'off'
+    AGGREGATE = 'aggregate'
+    SAMPLED   = 'sampled'
+    FULL      = 'full'
 
 class DtnGlobalsParser(DtnAbstractParser):
     """ Parser for tag ``globals`` in YAML configuration file """
@@ -16,6 +24,10 @@ class DtnGlobalsParser(DtnAbstractParser):
     # Directory where output files are located
     outdir: str
 
+    # Directory where cached data (e.g. route schedules, contact plans) is stored. Relative
+    # cache paths are resolved against it. If None, the input directory is used
+    cache_dir: Optional[str] = None
+
     # File for logging
     logfile: str = 'Log.log'
 
@@ -28,6 +40,14 @@ class DtnGlobalsParser(DtnAbstractParser):
     # If True, all the results from the monitors will be exported
     export_monitor: bool = False
 
+    # Level of detail of the transmissions monitored in connections (see ``DtnConnectionMonitor``).
+    # Connections are not monitored if ``monitor`` is False
+    conn_monitor: ConnMonitorLevel = ConnMonitorLevel.FULL
+
+    # If ``conn_monitor`` is ``sampled``, one in every ``conn_monitor_every`` transmissions
+    # is recorded
+    conn_monitor_every: PositiveInt = 100
+
     # If True, all validation tests are run
     run_tests: bool = False
 
@@ -37,6 +57,11 @@ class DtnGlobalsParser(DtnAbstractParser):
     # Delta time in [seconds] between every tracking printout
     track_dt: PositiveFloat = 1
 
+    @validator('conn_monitor', pre=True)
+    def validate_conn_monitor(cls, conn_monitor):
+        # YAML parses an unquoted ``off`` as False
+        return 'off' if conn_monitor is False else conn_monitor
+
     @validator('indir')
     def validate_indir(cls, indir):
         # Create a path object
@@ -58,3 +83,8 @@ class DtnGlobalsParser(DtnAbstractParser):
             raise ValueError(f'Output directory {path} does not exist.')
 
         return path
+
+    @validator('cache_dir')
+    def validate_cache_dir(cls, cache_dir):
+        # Create a path object. The directory is created when a cache is first written
+        return Path(cache_dir).absolute()
@@ -11,6 +11,8 @@ class RouterMode(str, Enum):
 class RouterAlgorithm(str, Enum):
     CGR = 'cgr'
     BFS = 'bfs'
+    YEN = 'yen'
+    TREE = 'tree'
 
 class DtnLookupRouterParser(DtnAbstractParser):
     """ Validator for YAML configuration parameters of DtnCGRouter """
@@ -49,6 +51,24 @@ class DtnLookupRouterParser(DtnAbstractParser):
     # Algorithm to use for route computation.
     algorithm: RouterAlgorithm = RouterAlgorithm.BFS
 
+    # Maximum number of routes per (orig, dest) pair. Only used by the ``yen`` algorithm
+    num_routes: PositiveInt = 10
+
+    # Directory where route schedules are cached in binary format, keyed by a hash of their
+    # inputs. Relative paths are resolved against the ``cache_dir`` global setting (see
+    # ``resolve_cache_dir``). If None, no cache is used
+    route_cache: Optional[str] = None
+
+    # If provided, the route schedule is not computed upfront (and the routes file is not
+    # used). Instead, routes are computed for consecutive time windows of this duration
+    # [sec] ahead of the simulation time in a background process.
+    route_window: Optional[PositiveFloat] = None
+
+    # If provided, the routes of a time window only use contacts that start before the end
+    # of the window plus this horizon [sec], e.g. the maximum duration of a route. If None,
+    # all contacts that have not ended at the start of the window are used
+    route_horizon: Optional[PositiveFloat] = None
+
 
 
 
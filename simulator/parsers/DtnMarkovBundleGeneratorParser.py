@@ -0,0 +1,23 @@
+from .DtnAbstractParser import DtnAbstractParser
+from pydantic import PositiveFloat, PositiveInt
+from typing import Optional
+
+class DtnMarkovBundleGeneratorParser(DtnAbstractParser):
+    """ Validator for a Markov bundle generator """
+    # Traffic file (relative to the input directory)
+    file: str
+
+    # Minimum and maximum bundle size in [bits]
+    min_bundle_size: PositiveInt = 1024
+    max_bundle_size: PositiveFloat = 8e9
+
+    # Fraction of the latency of a flow during which its data is accumulated in one bundle
+    latency_fraction: PositiveFloat = 0.5
+
+    # If provided, release bundles in batches. All bundles to the same destination generated
+    # within ``batch_step`` seconds are released as one bundle that carries their data
+    batch_step: Optional[PositiveFloat] = None
+
+    # Maximum data volume of a batch in [bits]. If None, the capacity of the smallest contact
+    # in the contact plan that can carry one bundle
+    batch_max_volume: Optional[PositiveFloat] = None
@@ -1,7 +1,12 @@
 from .DtnAbstractParser import DtnAbstractParser
+from enum import Enum
 from pydantic import validator
 from typing import Any, Dict, List, Optional
 
+class ForwardMode(str, Enum):
+    QUEUE  = 'queue'
+    DIRECT = 'direct'
+
 class DtnNodeParser(DtnAbstractParser):
     """ Parser for DtnNode's YAML configuration parameters """
     # Router type. It must be tag of an element defined in the YAML
@@ -30,6 +35,14 @@ class DtnNodeParser(DtnAbstractParser):
     # there waiting to be re-routed.
     limbo_wait: float = float('inf')
 
+    # How bundles handed to this node are routed. With ``queue`` (default), they are
+    # put in the node's input queue and a SimPy process routes them one at a time.
+    # With ``direct``, they are routed as soon as they are handed to the node, without
+    # creating SimPy processes. Bundles handed to the node while another one is being
+    # routed wait in the input queue, so they are still routed in arrival order. Use
+    # ``queue`` if ``process_bundle`` is overridden to add a forwarding delay.
+    forward_mode: ForwardMode = ForwardMode.QUEUE
+
     @validator('router')
     def validate_router(cls, router, *, values, **kwargs):
         return DtnNodeParser._validate_tag_exitance(cls, router, values)
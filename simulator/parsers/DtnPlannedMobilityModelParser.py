@@ -0,0 +1,12 @@
+from .DtnAbstractParser import DtnAbstractParser
+from typing import Optional
+
+class DtnPlannedMobilityModelParser(DtnAbstractParser):
+    """ Parser for YAML configuration parameters of DtnPlannedMobilityModel """
+    # Excel or csv file listing all contacts, with their range and data rate
+    contacts : str
+
+    # Directory where the contact plan is cached in binary format, keyed by a hash of the
+    # file and the epoch. Relative paths are resolved against the ``cache_dir`` global
+    # setting (see ``resolve_cache_dir``). If None, no cache is used
+    contact_cache: Optional[str] = None
@@ -1,5 +1,6 @@
 from .DtnAbstractParser import DtnAbstractParser
 from pydantic import confloat
+from typing import Optional
 
 class DtnScheduledMobilityModelParser(DtnAbstractParser):
     """ Parser for YAML configuration parameters of DtnScheduledMobilityModel """
@@ -9,3 +10,7 @@ class DtnScheduledMobilityModelParser(DtnAbstractParser):
     # Excel listing all ranges
     ranges : str
 
+    # Directory where the contact plan and ranges are cached in binary format, keyed by a
+    # hash of the files and the epoch. Relative paths are resolved against the ``cache_dir``
+    # global setting (see ``resolve_cache_dir``). If None, no cache is used
+    contact_cache: Optional[str] = None
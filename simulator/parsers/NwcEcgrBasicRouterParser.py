@@ -0,0 +1,5 @@
+from .DtnCgrBasicRouterParser import DtnCgrBasicRouterParser
+
+class NwcEcgrBasicRouterParser(DtnCgrBasicRouterParser):
+    """ Validator for YAML configuration parameters of NwcEcgrBasicRouter """
+    pass
@@ -1,4 +1,3 @@
-import pandas as pd
 from simulator.reports.DtnAbstractReport import DtnAbstractReport, concat_dfs
 
 class DtnArrivedBundlesReport(DtnAbstractReport):
@@ -7,8 +6,8 @@ class DtnArrivedBundlesReport(DtnAbstractReport):
 
     def collect_data(self):
         # Get all the bundles that arrived in this node
-        df = concat_dfs({nid: pd.DataFrame(bundle.to_dict() for bundle in node.endpoints[0])
-                              for nid, node in self.env.nodes.items()}, 'node')
+        df = concat_dfs({nid: node.endpoints[0].to_frame() for nid, node in self.env.nodes.items()},
+                        'node')
 
         # Transform to string to save space. You can use a converter when loading
         if 'visited' in df: df.visited = df.visited.apply(lambda v: str(v))
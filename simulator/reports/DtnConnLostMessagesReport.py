@@ -0,0 +1,10 @@
+from simulator.reports.DtnAbstractReport import DtnAbstractReport, concat_dfs
+
+class DtnConnLostMessagesReport(DtnAbstractReport):
+
+    _alias = 'lost_messages'
+
+    def collect_data(self):
+        # Get the messages other than bundles (e.g. LTP segments) lost in a connection
+        return concat_dfs({cid: conn.list_lost_messages() for cid, conn in self.env.connections.items()},
+                          'connection')
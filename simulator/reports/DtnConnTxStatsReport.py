@@ -0,0 +1,10 @@
+from simulator.reports.DtnAbstractReport import DtnAbstractReport, concat_dfs
+
+class DtnConnTxStatsReport(DtnAbstractReport):
+
+    _alias = 'tx_stats'
+
+    def collect_data(self):
+        # Get the transmission counters and histograms of each connection
+        return concat_dfs({cid: conn.list_tx_stats() for cid, conn in self.env.connections.items()},
+                          'connection')
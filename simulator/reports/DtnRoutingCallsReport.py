@@ -3,16 +3,17 @@ import pandas as pd
 
 class DtnRoutingCallsReport(DtnAbstractReport):
     """ Collects the number of times the routing procedures in all nodes
-        have been executed.
+        have been executed, and how many of them were served from the route cache.
     """
     _alias = 'routing_calls'
 
     def collect_data(self):
-        # Get the battery state for all nodes
-        calls = {nid: node.router.counter for nid, node in self.env.nodes.items()}
+        # Get the number of routing calls and route cache hits/misses for all nodes
+        calls = {nid: (node.router.counter, node.router.cache_hits, node.router.cache_misses)
+                 for nid, node in self.env.nodes.items()}
 
         # Create the dataframe
         df = pd.DataFrame.from_dict(calls, orient='index')
-        df.columns = ['NumRoutingCalls']
+        df.columns = ['NumRoutingCalls', 'NumCacheHits', 'NumCacheMisses']
 
         return df
\ No newline at end of file
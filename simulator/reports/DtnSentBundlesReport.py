@@ -1,10 +1,22 @@
 import pandas as pd
 from simulator.reports.DtnAbstractReport import DtnAbstractReport, concat_dfs
+from simulator.reports.DtnInLimboBundlesReport import DtnInLimboBundlesReport
+from simulator.reports.DtnInOutductBundlesReport import DtnInOutductBundlesReport
+from simulator.reports.DtnInRadioBundlesReport import DtnInRadioBundlesReport
+from simulator.reports.DtnNodeInQueueBundlesReport import DtnNodeInQueueBundlesReport
+from simulator.reports.DtnStoredBundlesReport import DtnStoredBundlesReport
+
+# Reports of the bundles that are still in the network
+in_network_reports = [DtnNodeInQueueBundlesReport, DtnStoredBundlesReport, DtnInLimboBundlesReport,
+                      DtnInOutductBundlesReport, DtnInRadioBundlesReport]
 
 class DtnSentBundlesReport(DtnAbstractReport):
 
     _alias = 'sent'
 
+    # Variables of a bundle that change after it is generated
+    final_vars = ['visited', 'arrived', 'dropped', 'arrival_time', 'latency', 'prop_delay', 'drop_reason']
+
     def collect_data(self):
         # Initialize data
         data = {}
@@ -23,7 +35,28 @@ class DtnSentBundlesReport(DtnAbstractReport):
         # Create the total data frame
         df = concat_dfs(data, 'node')
 
+        # Bundles are recorded when they are generated. Update them with their state at
+        # the end of the simulation
+        if not df.empty: df = self.update_final_state(df)
+
         # Transform to string to save space. You can use a converter when loading
         if 'visited' in df: df.visited = df.visited.apply(lambda v: str(v))
 
-        return df
\ No newline at end of file
+        return df
+
+    def update_final_state(self, df):
+        # Get the bundles that are still in the network, and the lost, dropped and arrived
+        # bundles. If a bundle is in more than one of them, the last one is its final state
+        final = [rep(self.env).collect_data() for rep in in_network_reports] + \
+                [conn.list_lost() for conn in self.env.connections.values()] + \
+                [node.dropped.to_frame() for node in self.env.nodes.values()] + \
+                [node.endpoints[0].to_frame() for node in self.env.nodes.values()]
+        final = [f for f in final if 'bid' in f and 'cid' in f]
+        if not final: return df
+        final = pd.concat(final).drop_duplicates(['bid', 'cid'], keep='last').set_index(['bid', 'cid'])
+
+        # Update the variables that change after a bundle is generated
+        idx = df.index.intersection(final.index)
+        df.loc[idx, self.final_vars] = final.loc[idx, self.final_vars]
+
+        return df.infer_objects()
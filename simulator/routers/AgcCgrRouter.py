@@ -19,7 +19,7 @@ class AgcCgrRouter(DtnCgrBasicRouter):
     def find_routes(self, bundle, first_time, **kwargs):
         # If no AGC extension block, create empty one
         if 'AGC' not in bundle.eblocks:
-            bundle.eblocks['AGC'] = self.parent.nid
+            bundle.set_eblock('AGC', self.parent.nid)
 
         # If it is the first time that you are routing this and you received
         # this bundle erroneously (because of broadcasting), drop it
@@ -33,6 +33,6 @@ class AgcCgrRouter(DtnCgrBasicRouter):
         if records_to_fwd is None: return None, None
 
         # Set the new value for the bundle's AGC extension block
-        bundle.eblocks['AGC'] = records_to_fwd[0].contact['dest']
+        bundle.set_eblock('AGC', records_to_fwd[0].contact['dest'])
 
         return records_to_fwd, cids_to_exclude
\ No newline at end of file
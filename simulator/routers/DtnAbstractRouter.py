@@ -1,5 +1,6 @@
 import abc
 from collections import namedtuple
+from copy import copy
 from simulator.core.DtnCore import Simulable
 
 """ A routing record to be returned by a router when a bundle needs to be
@@ -32,6 +33,14 @@ class RtRecord():
         self.priority = priority
         self.neighbor = neighbor
 
+    def clone(self):
+        """ Copy of this record with a clone of its bundle. The contact and route are
+            shared with this record.
+        """
+        new_record = copy(self)
+        new_record.bundle = self.bundle.clone()
+        return new_record
+
     def to_dict(self):
         if self.bundle is None:
             return {}
@@ -56,6 +65,10 @@ class DtnAbstractRouter(Simulable, metaclass=abc.ABCMeta):
         # Counter for number of times the routing procedure is called
         self.counter = 0
 
+        # Counters for routers that cache routes
+        self.cache_hits   = 0
+        self.cache_misses = 0
+
         # If this router is opportunistic in nature, flag it
         # By default, assume false
         self.opportunistic = False
@@ -1,3 +1,4 @@
+from heapq import heappop, heappush
 import numpy as np
 from simulator.routers.DtnAbstractRouter import DtnAbstractRouter, RtRecord
 
@@ -10,10 +11,14 @@ class DtnCgrBasicRouter(DtnAbstractRouter):
     _cp = None
     _cl = None
 
+    # Contact graph index (see ``simulator.routers.contact_graph``)
+    _graph = None
+
     def reset(self):
         # Reset static variables
-        self.__class__._cp = None
-        self.__class__._cl = None
+        self.__class__._cp    = None
+        self.__class__._cl    = None
+        self.__class__._graph = None
 
     def initialize(self):
         # Get the list of relays
@@ -24,6 +29,12 @@ class DtnCgrBasicRouter(DtnAbstractRouter):
             self.relays     = self.props.relays
             self.non_relays = set(self.env.nodes.keys()) -  set(self.relays)
 
+        # Dijkstra implementation to use (see ``find_best_route``)
+        self.engine = self.props.engine
+
+        # Route cache: {(dest, visited, excluded): (route, contact positions)}
+        self.route_cache = {} if self.props.route_cache else None
+
         # Get the mobility model for this router
         self.mobility_model = self.parent.mobility_model
 
@@ -66,22 +77,37 @@ class DtnCgrBasicRouter(DtnAbstractRouter):
         # Counter of capacity left in a contact
         self.cid_capacity = cp['capacity'].copy()
 
+        # Get the contact graph index and map it to this contact plan. The placeholder
+        # contacts are never part of the graph.
+        graph = self.mobility_model.contact_graph
+        cp['dest_code'] = np.array([graph.codes.get(n, -1) for n in cp['dest']])
+        cp['graph_pos'] = graph.localize(idx)
+
         # Save processed contact plan and contact list
-        self.__class__._cp = cp
+        self.__class__._cp    = cp
+        self.__class__._graph = graph
         self.__class__._cl = self.mobility_model.contacts_df.to_dict(orient='index')
 
     def find_routes(self, bundle, first_time, **kwargs):
         # Increase counter
         self.counter += 1
 
+        # Try to get the route from the cache
+        key   = (bundle.dest, frozenset(bundle.visited), frozenset(bundle.excluded))
+        route = self.get_cached_route(key, bundle.data_vol)
+
         # Get best route
-        try:
-            route = self.find_best_route(self.parent.nid, bundle.dest, bundle.data_vol,
-                                         bundle.visited, bundle.excluded)
-        except Exception as e:
-            print(f'{self.parent.nid}: Exception in router')
-            print(e)
-            route = None
+        if route is None:
+            try:
+                route = self.find_best_route(self.parent.nid, bundle.dest, bundle.data_vol,
+                                             bundle.visited, bundle.excluded)
+            except Exception as e:
+                print(f'{self.parent.nid}: Exception in router')
+                print(e)
+                route = None
+
+            # Store the new route in the cache
+            if route is not None: self.cache_route(key, route)
 
         # If not route was found, return
         if route is None: return None, None
@@ -100,8 +126,55 @@ class DtnCgrBasicRouter(DtnAbstractRouter):
         # Return record
         return [rec], []
 
+    def get_cached_route(self, key, bundle_size):
+        """ Get a route from the cache. The cached route is dropped if one of its contacts
+            has ended or does not have enough capacity left for this bundle.
+        """
+        # If the cache is not used, return
+        if self.route_cache is None: return None
+
+        # If the route is not in the cache, return
+        if key not in self.route_cache:
+            self.cache_misses += 1
+            return None
+
+        # Check if the cached route is still valid
+        route, pos = self.route_cache[key]
+        if route['tend'] <= self.t or (self.__class__._cp['capacity'][pos] < bundle_size).any():
+            del self.route_cache[key]
+            self.cache_misses += 1
+            return None
+
+        # Cache hit
+        self.cache_hits += 1
+        return route
+
+    def cache_route(self, key, route):
+        # If the cache is not used, return
+        if self.route_cache is None: return
+
+        # Store the route along with the positions of its contacts in the contact plan
+        pos = np.flatnonzero(np.in1d(self.__class__._cp['index'], route['contacts']))
+        self.route_cache[key] = (route, pos)
+
+    def route_failed(self, rt_record):
+        """ Called by the neighbor manager when a bundle has to be re-routed. Drop all
+            cached routes that use the contact that failed.
+        """
+        # If the cache is not used, return
+        if self.route_cache is None: return
+
+        # Drop cached routes that go through the failed contact
+        cid = rt_record.contact['cid']
+        for key in [k for k, (r, _) in self.route_cache.items() if cid in r['contacts']]:
+            del self.route_cache[key]
+
     def find_best_route(self, orig, dest, bundle_size, visited, excluded):
         """ Implementation of the Dijkstra algorithm over the contact graph """
+        # If required, use the priority queue implementation
+        if self.engine == 'heap':
+            return self.find_best_route_heap(orig, dest, bundle_size, visited, excluded)
+
         # Get the contact plan. Reset variables
         cp = self.__class__._cp
 
@@ -126,8 +199,12 @@ class DtnCgrBasicRouter(DtnAbstractRouter):
         # enough capacity to accommodate this bundle.
         valid_cids = (~cp['suppressed']) & (cp['tend'] > self.t) & (cp['capacity'] >= bundle_size)
 
-        # Eliminate all contacts going to nodes that have already been visited
-        valid_cids &= ~np.in1d(cp['dest'], visited)
+        # Eliminate all contacts going to nodes that have already been visited. Compare
+        # node codes instead of names.
+        ids = self.env.ids
+        cp['dest_code'][idx1] = ids.node(orig)
+        cp['dest_code'][idx2] = ids.node(dest)
+        valid_cids &= ~np.in1d(cp['dest_code'], ids.nodes(visited))
 
         # Eliminate all excluded contacts
         if excluded: valid_cids &= ~np.in1d(cp['index'], excluded)
@@ -197,6 +274,96 @@ class DtnCgrBasicRouter(DtnAbstractRouter):
         # Build the route and return
         return self.build_route(orig, dest, cp, final_cid, EAT=best_EAT)
 
+    def find_best_route_heap(self, orig, dest, bundle_size, visited, excluded):
+        """ Implementation of the Dijkstra algorithm over the contact graph using a priority
+            queue. Contacts are explored in the same order as in ``find_best_route`` (lowest
+            EAT first, ties broken by position in the contact plan), but the successors of a
+            contact are obtained from the contact graph index instead of scanning the entire
+            contact plan.
+        """
+        # Get the contact plan and contact graph
+        cp    = self.__class__._cp
+        graph = self.__class__._graph
+        codes = graph.codes
+
+        # If the origin or destination are not in the contact plan, no route exists
+        if orig not in codes or dest not in codes: return None
+
+        # Initialize variables
+        cur_idx   = -1
+        c_node    = codes[orig]
+        c_EAT     = self.t
+        d_node    = codes[dest]
+        best_EAT  = np.inf
+        final_cid = None
+        heap      = []
+
+        # Reset the contact plan
+        cp['EAT']         = np.full_like(cp['index'], np.inf, dtype='float')
+        cp['predecessor'] = np.full_like(cp['index'], -np.inf, dtype='float')
+
+        # List of valid contacts. Eliminate suppressed and contacts that have ended or don't have
+        # enough capacity to accommodate this bundle.
+        valid_cids = (~cp['suppressed']) & (cp['tend'] > self.t) & (cp['capacity'] >= bundle_size)
+
+        # Eliminate all excluded contacts
+        if excluded: valid_cids &= ~np.in1d(cp['index'], excluded)
+
+        # Nodes that cannot be the destination of a contact anymore. Initially, all nodes
+        # that have already been visited by this bundle
+        done = np.zeros(len(codes), dtype='bool')
+        done[[codes[n] for n in visited if n in codes]] = True
+
+        while self.is_alive:
+            # No contact to the current node can be valid any more since you don't want loops
+            # in the computed route
+            done[c_node] = True
+
+            # Get this contact neighbors. Neighbors meet the following criteria:
+            # 1) They depart from the current node
+            # 2) The contact is valid and does not go to a node already reached
+            # 3) The current.EAT  < contact.tend (i.e. eliminate contacts that end before data arrives)
+            cids = cp['graph_pos'][graph.span(c_node)]
+            cids = cids[valid_cids[cids] & ~done[cp['dest_code'][cids]] & (cp['tend'][cids] > c_EAT)]
+
+            # Compute early transmission time (ETT) and early arrival time (EAT). Only
+            # keep the neighbors for which the EAT does not get worse.
+            EAT  = np.maximum(cp['tstart'][cids], c_EAT) + cp['owlt'][cids]
+            keep = EAT <= cp['EAT'][cids]
+            cids, EAT = cids[keep], EAT[keep]
+            cp['EAT'][cids] = EAT
+            cp['predecessor'][cids] = cur_idx
+
+            # Check if any paths found up until this point get you to destination.
+            # If so, keep the best one (lowest EAT, then first in the contact plan)
+            to_dest = cp['dest_code'][cids] == d_node
+            if to_dest.any():
+                i = np.lexsort((cids[to_dest], EAT[to_dest]))[0]
+                if EAT[to_dest][i] < best_EAT:
+                    final_cid, best_EAT = cp['index'][cids[to_dest][i]], EAT[to_dest][i]
+
+            # Contacts to the destination never need to be explored further
+            for pos, eat in zip(cids[~to_dest], EAT[~to_dest]): heappush(heap, (eat, pos))
+
+            # Find the next contact to continue the search. Paths with an EAT later than
+            # the best EAT cannot improve the solution. Also skip outdated heap entries.
+            while heap and heap[0][0] < best_EAT:
+                eat, pos = heappop(heap)
+                if eat == cp['EAT'][pos] and not done[cp['dest_code'][pos]]: break
+            else:
+                break
+
+            # Continue search by exploring the contact with lower EAT
+            cur_idx = cp['index'][pos]
+            c_node  = cp['dest_code'][pos]
+            c_EAT   = eat
+
+        # If no path was found, return
+        if final_cid is None: return None
+
+        # Build the route and return
+        return self.build_route(orig, dest, cp, final_cid, EAT=best_EAT)
+
     def build_route(self, orig, dest, cp, final_cid, EAT=-1):
         # Initialize variables
         contacts, rt = [], []
@@ -1,7 +1,9 @@
+import multiprocessing as mp
 import numpy as np
 import pandas as pd
-from simulator.utils.DtnIO import load_route_schedule_file
-from simulator.routers import build_route_list
+from simulator.utils.DtnIO import load_route_schedule_file, cache_key, resolve_cache_dir
+from simulator.utils.DtnIO import load_route_schedule_cache, save_route_schedule_cache
+from simulator.routers import build_route_list, ROUTE_COLUMNS
 from simulator.routers.DtnAbstractRouter import DtnAbstractRouter, RtRecord
 
 class DtnLookupRouter(DtnAbstractRouter):
@@ -17,12 +19,16 @@ class DtnLookupRouter(DtnAbstractRouter):
     _all_contacts = None        # Dictionary indexed by contact id
     _all_ranges   = None        # Dictionary indexed by contact id
 
+    _routes_df     = None       # Dataframe with the routes computed so far (route windows only)
+    _schedule_pool = None       # Pool with the background worker (route windows only)
+
     def __init__(self, env, parent):
         super().__init__(env, parent)
         # Initialize variables
         indir = self.config['globals'].indir
         self.routes_file  = indir / self.props.routes
         self.max_crit     = self.props.max_crit
+        self.cache_dir    = resolve_cache_dir(self.config['globals'], self.props.route_cache)
 
     def reset(self):
         # Reset static variables
@@ -31,6 +37,12 @@ class DtnLookupRouter(DtnAbstractRouter):
         self.__class__._all_routes   = None
         self.__class__._all_contacts = None
         self.__class__._all_ranges   = None
+        self.__class__._routes_df    = None
+
+        # Stop the background worker
+        if self.__class__._schedule_pool is not None:
+            self.__class__._schedule_pool.terminate()
+            self.__class__._schedule_pool = None
 
     def initialize(self):
         # Get list of relays
@@ -46,6 +58,18 @@ class DtnLookupRouter(DtnAbstractRouter):
         # Initialize routes
         self.initialize_routes()
 
+    @property
+    def contact_graph(self):
+        # Contact graph index, only used by the fast route builders
+        if self.props.mode != 'fast': return None
+        return self.mobility_model.contact_graph
+
+    @property
+    def num_routes(self):
+        # Number of routes per (orig, dest) pair, only used by the yen algorithm
+        if self.props.algorithm != 'yen': return None
+        return self.props.num_routes
+
     def initialize_contacts_and_ranges(self):
         # Working on static properties of the class, do it once only
         if self.__class__._all_contacts is not None: return
@@ -70,12 +94,25 @@ class DtnLookupRouter(DtnAbstractRouter):
         # Working on static properties of the class, do it once only
         if self.__class__._all_routes is not None: return
 
+        # If a route window is provided, compute the route schedule incrementally
+        if self.props.route_window is not None:
+            self.initialize_route_windows()
+            return
+
         # If routes file is provided, and re-computation is not forced, just load the file
         if self.props.routes != None and self.props.recompute_routes == False:
-            print('Loading route schedule')
-            routes = load_route_schedule_file(self.routes_file, self.epoch)
+            key    = cache_key(self.routes_file, self.epoch)
+            routes = self.load_cached_route_schedule(key)
+            if routes is None:
+                print('Loading route schedule')
+                routes = load_route_schedule_file(self.routes_file, self.epoch)
+                self.cache_route_schedule(key, routes)
         else:
-            routes = self.build_route_schedule(self.env.do_track)
+            key    = self.build_route_schedule_key()
+            routes = None if self.props.recompute_routes else self.load_cached_route_schedule(key)
+            if routes is None:
+                routes = self.build_route_schedule(self.env.do_track)
+                self.cache_route_schedule(key, routes)
 
         # Validate the route schedule
         routes = self.validate_route_list(routes)
@@ -91,6 +128,81 @@ class DtnLookupRouter(DtnAbstractRouter):
         # Store the routes
         self.__class__._all_routes = routes
 
+    def initialize_route_windows(self):
+        """ Compute the route schedule for consecutive time windows of duration ``route_window``.
+            The first window is computed now so that bundles can be routed right away. The next
+            windows are computed ahead of the simulation time in a background process, and
+            merged into the route schedule when the simulation reaches them.
+        """
+        # Compute the routes for the first window
+        t0, dt = self.t, self.props.route_window
+        routes = _build_route_window(*self.route_window_inputs(t0, t0+dt))
+
+        # Store the routes for the first window
+        self.merge_route_window(routes)
+
+        # Start the background worker and the process that merges the next windows
+        self.__class__._schedule_pool = mp.Pool(1)
+        self.env.process(self.run_route_windows(t0+dt, dt))
+
+    def route_window_inputs(self, t_start, t_end):
+        # Get the contacts that have not ended at the start of this window and their ranges.
+        # Routes that start in this window can use contacts up to ``route_horizon`` after it
+        cp = self._contacts_df
+        cp = cp.loc[cp.tend > t_start]
+        if self.props.route_horizon is not None: cp = cp.loc[cp.tstart < t_end + self.props.route_horizon]
+        cp = cp.copy()
+        ri = self._ranges_df.loc[self._ranges_df.cid.isin(cp.index)]
+
+        # Arguments for ``_build_route_window``
+        nodes = list(self.env.nodes.keys())
+        kwds  = {'relays': self.relays, 'max_speed': self.props.max_speed, 'verbose': False, 'ncpu': 1,
+                 'algorithm': self.props.algorithm, 'mode': self.props.mode, 'num_routes': self.num_routes}
+
+        return nodes, t_start, cp, ri, kwds
+
+    def run_route_windows(self, t_start, dt):
+        # Initialize variables
+        pool = self.__class__._schedule_pool
+        tmax = self._contacts_df.tend.max()
+
+        # Submit the computation of the next window
+        job = pool.apply_async(_build_route_window, self.route_window_inputs(t_start, t_start+dt))
+
+        while job is not None:
+            # Wait until the simulation reaches this window
+            yield self.env.timeout(max(0.0, t_start - self.t))
+
+            # Get the routes for this window. This blocks if they are not ready yet
+            routes = job.get()
+
+            # Submit the computation of the next window, if any contacts are left
+            t_start += dt
+            job = pool.apply_async(_build_route_window, self.route_window_inputs(t_start, t_start+dt)) \
+                  if t_start < tmax else None
+
+            # Merge the routes for this window into the route schedule
+            self.merge_route_window(routes)
+
+        # All windows have been computed, stop the background worker
+        pool.close()
+        self.__class__._schedule_pool = None
+
+    def merge_route_window(self, routes):
+        # Merge the new routes with the routes that have not expired yet
+        if self.__class__._routes_df is not None:
+            routes = pd.concat([self.__class__._routes_df, routes])
+            routes = routes.loc[routes.tend > self.t]
+
+        # Eliminate duplicated routes and sort them for each o-d pair
+        routes = routes.drop_duplicates(subset=['orig', 'dest', 'contacts'])
+        routes = routes.sort_values(by=['orig', 'dest', 'EAT', 'nhops', 'tstart', 'tend'], kind='stable')
+        routes = routes.reset_index(drop=True)
+        self.__class__._routes_df = routes
+
+        # Validate and prepare the route schedule
+        self.__class__._all_routes = self.prepare_route_list(self.validate_route_list(routes))
+
     def find_routes(self, bundle, first_time, **kwargs):
         """ Find a route for a bundle. This is comprised of four steps:
 
@@ -148,7 +260,8 @@ class DtnLookupRouter(DtnAbstractRouter):
         routes = build_route_list(self.parent.nid, bundle.dest, self.t, self._contacts_df, self._ranges_df,
                                   relays=self.relays, max_speed=self.props.max_speed,
                                   verbose=False, ncpu=1, algorithm=self.props.algorithm,
-                                  mode=self.props.mode)
+                                  mode=self.props.mode, graph=self.contact_graph,
+                                  num_routes=self.num_routes)
 
         # Validate the route list generated
         routes = self.validate_route_list(routes)
@@ -164,11 +277,39 @@ class DtnLookupRouter(DtnAbstractRouter):
         nodes  = list(self.env.nodes.keys())
         routes = build_route_list(nodes, nodes, 0.0, self._contacts_df, self._ranges_df, relays=self.relays,
                                   ncpu=self.props.num_cores, algorithm=self.props.algorithm,
-                                  mode=self.props.mode, verbose=verbose)
+                                  mode=self.props.mode, verbose=verbose, graph=self.contact_graph,
+                                  num_routes=self.num_routes)
 
         # Return the route schedule
         return routes
 
+    def build_route_schedule_key(self):
+        """ Key of the route schedule computed by ``build_route_schedule`` in the route
+            schedule cache. The range column of the contact plan is excluded since it is
+            derived from the range intervals.
+        """
+        cp = self._contacts_df.drop(columns='range', errors='ignore')
+        return cache_key(cp, self._ranges_df, sorted(self.env.nodes.keys()), sorted(self.relays),
+                                  self.props.algorithm, self.props.mode, self.props.max_speed,
+                                  self.num_routes)
+
+    def load_cached_route_schedule(self, key):
+        # If no cache is used, return
+        if self.cache_dir is None: return None
+
+        # Load the route schedule if available
+        routes = load_route_schedule_cache(self.cache_dir / '{}.npz'.format(key))
+        if routes is not None: print('Loading route schedule from cache')
+
+        return routes
+
+    def cache_route_schedule(self, key, routes):
+        # If no cache is used, return
+        if self.cache_dir is None: return
+
+        # Save the route schedule
+        save_route_schedule_cache(routes, self.cache_dir / '{}.npz'.format(key))
+
     def validate_route_list(self, routes):
         # Initialize variables
         to_keep  = []
@@ -213,12 +354,21 @@ class DtnLookupRouter(DtnAbstractRouter):
         prepared_routes = {}
         routes          = {c: routes[c].values for c in routes.columns}    # {column -> [values]}
         contacts        = self.__class__._all_contacts
+        ids             = self.env.ids
 
-        # Process route schedule
-        for o, d in pd.unique(list(zip(routes['orig'], routes['dest']))):
-            # Get the indices for this o-d pair
-            idx = (routes['orig'] == o) & (routes['dest'] == d)
+        # Each node uses the bit given by its code in the simulation id registry. Register
+        # any node in the route schedule that is not in the contact plan.
+        for r in routes['route']: ids.add_nodes(r)
+        node_bits = ids.node_codes
+
+        # Group the routes by o-d pair with a single stable sort. Routes keep their
+        # order within each group.
+        codes, pairs = pd.MultiIndex.from_arrays([routes['orig'], routes['dest']]).factorize()
+        order  = np.argsort(codes, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1) if len(order) > 0 else []
 
+        # Process route schedule
+        for (o, d), idx in zip(pairs, groups):
             # Construct the data structure
             data = {}
             data['EAT']      = routes['EAT'][idx]
@@ -227,14 +377,22 @@ class DtnLookupRouter(DtnAbstractRouter):
             data['tend']     = routes['tend'][idx]
             data['route']    = routes['route'][idx]
             data['contacts'] = routes['contacts'][idx]
-            data['contacts_set'] = [set(c) for c in data['contacts']]
-            data['nodes']    = [set(r) for r in data['route']]     # Full list of nodes visited, including origin
-            data['hops']     = [r - {o} for r in data['nodes']]     # List of nodes visited, without the origin
             data['next_hop'] = np.array([r[1] for r in data['route']])
             data['next_cid'] = np.array([r[0] for r in data['contacts']])
             data['capacity'] = [min(contacts[cid]['capacity'] for cid in cts) for cts in data['contacts']]
             data['capacity'] = np.array(data['capacity'], dtype='float64')
 
+            # Nodes visited by each route, without the origin, as a bitmask
+            data['hops_mask'] = _bitmasks([[node_bits[n] for n in r if n != o] for r in data['route']])
+
+            # Contacts used by each route as a bitmask. Bits are assigned per o-d pair
+            cid_bits = {}
+            for cts in data['contacts']:
+                for cid in cts:
+                    if cid not in cid_bits: cid_bits[cid] = len(cid_bits)
+            data['cid_bits']      = cid_bits
+            data['contacts_mask'] = _bitmasks([[cid_bits[cid] for cid in cts] for cts in data['contacts']])
+
             # Store the routes for this o-d pair
             prepared_routes[o, d] = data
 
@@ -249,14 +407,15 @@ class DtnLookupRouter(DtnAbstractRouter):
 
         # Filter routes that go through already visited nodes
         if bundle.visited:
-            tmp = set(bundle.visited)
-            idx &= np.array([n.isdisjoint(tmp) for n in opts['hops']])
+            node_bits = self.env.ids.node_codes
+            mask = _bitmask([node_bits[n] for n in bundle.visited if n in node_bits], opts['hops_mask'])
+            idx &= ((opts['hops_mask'] & mask) == 0).astype(bool)
 
         # Filter routes that go through excluded contacts
-        #if bundle.excluded: idx &= ~np.isin(opts['next_cid'], bundle.excluded)
         if bundle.excluded:
-            tmp = set(bundle.excluded)
-            idx &= np.array([c.isdisjoint(tmp) for c in opts['contacts_set']])
+            cid_bits = opts['cid_bits']
+            mask = _bitmask([cid_bits[c] for c in bundle.excluded if c in cid_bits], opts['contacts_mask'])
+            idx &= ((opts['contacts_mask'] & mask) == 0).astype(bool)
 
         # Filter routes that do not have enough capacity for this bundle
         idx &= (opts['capacity'] >= bundle.data_vol)
@@ -264,45 +423,33 @@ class DtnLookupRouter(DtnAbstractRouter):
         # If all opts have been invalidated, return None
         if not idx.any(): return
 
-        # Initialize variables
-        candidates   = opts['next_hop'][idx]
-        next_cids    = opts['next_cid'][idx]
-        contacts     = opts['contacts'][idx]
-        tstart_route = opts['tstart'][idx]
-        tend_route   = opts['tend'][idx]
-        rt_records = []
+        # Get the first valid route for each neighbor. This relies on the fact that data
+        # comes in sorted format
+        valid    = np.flatnonzero(idx)
+        _, first = np.unique(opts['next_hop'][valid], return_index=True)
+        valid    = valid[np.sort(first)]
 
         # Figure out the priority of this bundle (0=critical, 1=false)
         priority = self.find_bundle_priority(bundle)
 
-        # Get first contact for each neighbor. This relies on the fact that data
-        # comes in sorted format
-        while candidates.size > 0:
-            idx = candidates == candidates[0]
-            next_cid = next_cids[idx][0]
-            contact  = contacts[idx][0]
-            ts_route = tstart_route[idx][0]
-            te_route = tend_route[idx][0]
+        # Initialize variables
+        rt_records = []
 
+        for i in valid:
             # Compose the DTN record and store it
-            con = self.__class__._all_contacts[next_cid]
+            next_cid   = opts['next_cid'][i]
+            contact    = opts['contacts'][i]
+            con        = self.__class__._all_contacts[next_cid]
             con['cid'] = next_cid
-            rte = {'tstart': ts_route, 'tend': te_route, 'contacts': contact}
+            rte = {'tstart': opts['tstart'][i], 'tend': opts['tend'][i], 'contacts': contact}
             rec = RtRecord(bundle=bundle, contact=con, route=rte, priority=priority, neighbor=con['dest'])
             rt_records.append(rec)
 
             # Check if this routing decision has affected the current route
             if hasattr(bundle, 'cur_route'):
-               if bundle.cur_route !=  contacts:
+               if bundle.cur_route !=  contact:
                    print('Route changed')
 
-            # Eliminate all routes to the node already used
-            candidates   = candidates[~idx]
-            next_cids    = next_cids[~idx]
-            contacts     = contacts[~idx]
-            tstart_route = tstart_route[~idx]
-            tend_route   = tend_route[~idx]
-
         return rt_records
 
     def select_neighbor_critical_bundle(self, rt_records):
@@ -333,7 +480,7 @@ class DtnLookupRouter(DtnAbstractRouter):
 
             # Compute backlog for this neighbor
             if contact['cid'] == mngr.current_cid:
-                backlog = mngr.queue.backlog  # [bits]
+                backlog = mngr.queue.backlog_bits()  # [bits]
             else:
                 backlog = mngr.future_backlog[contact['cid']]
 
@@ -361,4 +508,27 @@ class DtnLookupRouter(DtnAbstractRouter):
             # If the route is valid, keep it
             if valid: to_keep.append(record)
 
-        return to_keep, cids_to_exclude
\ No newline at end of file
+        return to_keep, cids_to_exclude
+
+def _build_route_window(nodes, t_start, contact_plan, range_intervals, kwds):
+    """ Compute the route schedule between all nodes at the start of a time window. The
+        contact plan only contains the contacts that have not ended at the start of the window.
+    """
+    # If no contacts are available, there are no routes
+    if contact_plan.empty: return pd.DataFrame(columns=ROUTE_COLUMNS)
+
+    return build_route_list(nodes, nodes, t_start, contact_plan, range_intervals, allow_empty=True, **kwds)
+
+def _bitmasks(bits):
+    """ Convert a list of lists of bit positions into an array of bitmasks. If all bits
+        fit in 64 bits the array is of type uint64, otherwise it contains Python integers.
+    """
+    masks = [sum(1 << b for b in set(bb)) for bb in bits]
+    if all(m < 2**64 for m in masks): return np.array(masks, dtype='uint64')
+    return np.array(masks, dtype='object')
+
+def _bitmask(bits, masks):
+    """ Convert a list of bit positions into a bitmask compatible with an array of bitmasks """
+    mask = sum(1 << b for b in set(bits))
+    if masks.dtype == 'uint64': return np.uint64(mask & (2**64-1))
+    return mask
@@ -31,8 +31,12 @@ class NwcEcgrBasicRouter(DtnCgrBasicRouter):
         # enough capacity to accommodate this bundle.
         valid_cids = (~cp['suppressed']) & (cp['tend'] > self.t) & (cp['capacity'] >= bundle_size)
 
-        # Eliminate all contacts going to nodes that have already been visited
-        valid_cids &= ~np.in1d(cp['dest'], visited)
+        # Eliminate all contacts going to nodes that have already been visited. Compare
+        # node codes instead of names.
+        ids = self.env.ids
+        cp['dest_code'][idx1] = ids.node(orig)
+        cp['dest_code'][idx2] = ids.node(dest)
+        valid_cids &= ~np.in1d(cp['dest_code'], ids.nodes(visited))
 
         # Eliminate all excluded contacts
         if excluded: valid_cids &= ~np.in1d(cp['index'], excluded)
@@ -1,41 +1,55 @@
 from simulator.utils.basic_utils import new_iterable, Timer
 from simulator.utils.math_utils import combvec
+import gc
 import multiprocessing as mp
+from multiprocessing.util import Finalize
 import pandas as pd
 
-from .cgr import cgr_build_route_list_fast, cgr_build_route_list_slow
+from .contact_graph import ContactGraph
+from .shared_contact_plan import publish_contact_plan, attach_contact_plan, detach_contact_plan, release_contact_plan
+from .cgr import cgr_build_route_list_fast, cgr_build_route_list_slow, cgr_build_route_list_yen, cgr_build_route_tree
 from .bfs import bfs_build_route_list_slow, bfs_build_route_list_fast
 
 # ============================================================================================================
 # === ROUTING FUNCTIONS. CALLED BY DtnBaseRouter and its subclasses to do the routers
 # ============================================================================================================
 
+# Columns of a route schedule
+ROUTE_COLUMNS = ['time', 'orig', 'dest', 'route', 'EAT', 'contacts', 'tstart', 'tend', 'limit_cid', 'nhops']
+
 def build_route_list(orig, dest, time, contact_plan, range_intervals, relays=None, max_speed=125,
-                     verbose=True, ncpu=1, algorithm='bfs', mode='fast'):
+                     verbose=True, ncpu=1, algorithm='bfs', mode='fast', graph=None, num_routes=None,
+                     allow_empty=False):
     # Check inputs
     orig, dest, time = new_iterable(orig), new_iterable(dest), new_iterable(time)
 
     # Check the algorithm selected
-    assert algorithm in ['bfs', 'cgr'], 'Algorithm parameter can only be "bfs" or "cgr". "{}" not valid'.format(
-        algorithm)
+    assert algorithm in ['bfs', 'cgr', 'yen', 'tree'], 'Algorithm parameter can only be "bfs", "cgr", "yen" or "tree". ' \
+                                                       '"{}" not valid'.format(algorithm)
     assert mode in ['fast', 'slow'], 'Mode must be "fast" or "slow". Current mode {} is not valid'.format(mode)
+    assert algorithm not in ['yen', 'tree'] or mode == 'fast', 'Algorithm "{}" is only available in "fast" mode'.format(algorithm)
 
     # Merge the range intervals with the contact plan table
     contact_plan['range'] = [range_intervals.range[range_intervals.cid == cid].max() for cid in contact_plan.index]
 
+    # Build the contact graph index once for all (orig, dest, time) combinations
+    if mode == 'fast' and graph is None: graph = ContactGraph(contact_plan)
+
     # Build route for each destination
     if ncpu == 1:
         data = _build_route_list_serial(orig, dest, time, contact_plan, range_intervals, relays=relays,
-                                        max_speed=max_speed, verbose=verbose, mode=mode, algorithm=algorithm)
+                                        max_speed=max_speed, verbose=verbose, mode=mode, algorithm=algorithm,
+                                        graph=graph, num_routes=num_routes)
     else:
         data = _build_route_list_parallel(orig, dest, time, contact_plan, range_intervals, ncpu, relays=relays,
-                                          max_speed=max_speed, verbose=verbose, mode=mode, algorithm=algorithm)
+                                          max_speed=max_speed, verbose=verbose, mode=mode, algorithm=algorithm,
+                                          graph=graph, num_routes=num_routes)
 
     # Format route schedule
     routes = pd.concat(data)
+    if routes.empty and allow_empty: return pd.DataFrame(columns=ROUTE_COLUMNS)
     if routes.empty: raise RuntimeError('NO ROUTES WERE COMPUTED')
-    cols = ['time', 'orig', 'dest', 'route', 'EAT', 'contacts', 'tstart', 'tend', 'limit_cid', 'nhops']
-    routes = routes[cols]
+    routes = routes[ROUTE_COLUMNS]
 
     # Sort data
     routes = routes.sort_values(by=['time', 'orig', 'dest', 'EAT', 'nhops', 'tstart', 'tend'])
@@ -43,23 +57,24 @@ def build_route_list(orig, dest, time, contact_plan, range_intervals, relays=Non
     return routes.reset_index(drop=True)
 
 def _build_route_list_serial(orig, dest, time, contact_plan, range_intervals, relays=None, max_speed=125,
-                             verbose=True, mode='fast', algorithm='bfs'):
+                             verbose=True, mode='fast', algorithm='bfs', graph=None, num_routes=None):
     # Initialize variables
     data = []
 
     # Select function to get routes
-    fun = _select_routing_function(algorithm, mode)
+    fun  = _select_routing_function(algorithm, mode)
+    kwds = {'max_speed': max_speed, 'relays': relays, 'verbose': verbose}
+    if graph is not None: kwds['graph'] = graph
+    if num_routes is not None: kwds['num_routes'] = num_routes
 
     # Build route for each destination
-    for o, d, t in combvec(orig, dest, time):
-        if o == d: continue
-
+    for o, d, t in _route_jobs(orig, dest, time, algorithm):
         # Compute routes with/without logging
         if verbose == False:
-            routes = fun(o, d, t, contact_plan, relays=relays, max_speed=max_speed, verbose=verbose)
+            routes = fun(o, d, t, contact_plan, **kwds)
         else:
             with Timer('{}, {}, {}'.format(o, d, t)):
-                routes = fun(o, d, t, contact_plan, relays=relays, max_speed=max_speed, verbose=verbose)
+                routes = fun(o, d, t, contact_plan, **kwds)
 
         # Store routes
         data.append(pd.DataFrame(routes))
@@ -67,31 +82,79 @@ def _build_route_list_serial(orig, dest, time, contact_plan, range_intervals, re
     return data
 
 def _build_route_list_parallel(orig, dest, time, contact_plan, range_intervals, ncpu, relays=None,
-                               max_speed=125, verbose=False, mode='fast', algorithm='bfs'):
-    # Initialize pool of workers
-    ncpu = min(mp.cpu_count()-1, ncpu)
-    pool = mp.Pool(ncpu)
-
-    # Select function to get routes
-    fun = _select_routing_function(algorithm, mode)
-
-    # Submit jobs and extract results
-    kwds    = {'max_speed': max_speed, 'relays': relays, 'verbose':verbose}
-    futures = {(o,d,t):pool.apply_async(fun, args=(o, d, t, contact_plan), kwds=kwds) for o, d, t in combvec(orig, dest, time) if o != d}
+                               max_speed=125, verbose=False, mode='fast', algorithm='bfs', graph=None,
+                               num_routes=None):
+    # Publish the contact plan in shared memory once for all workers
+    blocks, meta = publish_contact_plan(contact_plan)
+
+    # Initialize pool of workers. Each worker attaches to the contact plan once
+    ncpu = max(1, min(mp.cpu_count()-1, ncpu))
+    kwds = {'max_speed': max_speed, 'relays': relays, 'verbose':verbose}
+    if num_routes is not None: kwds['num_routes'] = num_routes
+    pool = mp.Pool(ncpu, initializer=_init_worker, initargs=(meta, algorithm, mode, kwds, graph is not None))
+
+    # Submit contiguous chunks of jobs
+    jobs    = _route_jobs(orig, dest, time, algorithm)
+    size    = max(1, -(-len(jobs) // (4*ncpu)))
+    futures = [pool.apply_async(_run_jobs, args=(jobs[i:i+size],)) for i in range(0, len(jobs), size)]
 
     # Collect results
-    data = []
-    for (o,d,t), f in futures.items():
+    try:
+        records = [r for f in futures for r in f.get()]
+    finally:
+        # Clean up
+        pool.close()
+        pool.join()
+        release_contact_plan(blocks)
+
+    return [pd.DataFrame.from_records(records, columns=ROUTE_COLUMNS)]
+
+# Contact plan and routing function of a worker process (see ``_init_worker``)
+_worker = {}
+
+def _init_worker(meta, algorithm, mode, kwds, use_graph):
+    # Attach to the shared contact plan
+    contact_plan = attach_contact_plan(meta)
+
+    # Build the contact graph index once per worker
+    kwds = dict(kwds)
+    if use_graph: kwds['graph'] = ContactGraph(contact_plan)
+
+    # Store the worker state
+    _worker['contact_plan'] = contact_plan
+    _worker['fun']          = _select_routing_function(algorithm, mode)
+    _worker['kwds']         = kwds
+
+    # Detach from the shared contact plan when the worker exits
+    Finalize(None, _release_worker, exitpriority=10)
+
+def _release_worker():
+    # Drop all views of the shared contact plan before closing it
+    _worker.clear()
+    gc.collect()
+    detach_contact_plan()
+
+def _run_jobs(jobs):
+    # Initialize variables
+    records = []
+    fun, kwds, cp = _worker['fun'], _worker['kwds'], _worker['contact_plan']
+
+    # Compute the routes for each job and return them as tuples
+    for o, d, t in jobs:
         try:
-            data.append(pd.DataFrame(f.get()))
+            routes = fun(o, d, t, cp, **kwds)
         except Exception as e:
             e.args += ('Try inputs {}'.format((o,d,t)),)
             raise e
+        records.extend(tuple(r[c] for c in ROUTE_COLUMNS) for r in routes)
 
-    # Clean up
-    pool.close()
+    return records
 
-    return data
+def _route_jobs(orig, dest, time, algorithm):
+    # The earliest arrival tree computes the routes to all destinations at once
+    if algorithm.lower() == 'tree':
+        return [(o, tuple(dest), t) for o, t in combvec(orig, time)]
+    return [(o, d, t) for o, d, t in combvec(orig, dest, time) if o != d]
 
 def _select_routing_function(algorithm, mode):
     if algorithm.lower() == 'cgr' and mode.lower() == 'fast':
@@ -102,6 +165,10 @@ def _select_routing_function(algorithm, mode):
         fun = bfs_build_route_list_fast
     elif algorithm.lower() == 'bfs' and mode.lower() == 'slow':
         fun = bfs_build_route_list_slow
+    elif algorithm.lower() == 'yen' and mode.lower() == 'fast':
+        fun = cgr_build_route_list_yen
+    elif algorithm.lower() == 'tree' and mode.lower() == 'fast':
+        fun = cgr_build_route_tree
     else:
         raise ValueError('Cannot select routers function wuith algorithm {} and mode {}'.format(algorithm, mode))
     return fun
\ No newline at end of file
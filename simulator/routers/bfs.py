@@ -1,6 +1,7 @@
 from copy import deepcopy
 import numpy as np
 import pandas as pd
+from .contact_graph import ContactGraph
 from .utils import isin, str_type
 
 # ============================================================================================================
@@ -119,8 +120,9 @@ def bfs_build_route_list_slow(orig, dest, t, contact_plan, relays=None, max_spee
 
     return routes
 
-def bfs_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_speed=40.0, verbose=False):
+def bfs_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_speed=40.0, verbose=False, graph=None):
     # Initialize variables
+    graph  = graph if graph is not None else ContactGraph(contact_plan)
     cp     = contact_plan.copy(deep=True)
     tinf   = max(cp.tstart.max(), cp.tend.max()) + 100 * 365 * 24 * 3600
     nodes  = set(cp.orig).union(set(cp.dest))
@@ -145,6 +147,10 @@ def bfs_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_spee
     cp  = {c: cp[c].values for c in cp.columns}
     cp['index'] = idx
 
+    # Map the contact graph to this contact plan. Dummy contacts are not part of it
+    graph_pos = graph.localize(idx)
+    dummy_pos = np.flatnonzero(idx < 0)
+
     # Initialize variables
     queue = []
     paths = []
@@ -176,8 +182,12 @@ def bfs_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_spee
         # 3) The contact.tend > current.EAT (i.e. a neighboring contact does not end before data arrives to this contact)
         # 4) The neighbor contact's destination has relay capabilities or is the destination itself
         #    (note: this is not present in the SABR specification or ION code)
-        cids = (c_dest == cp['orig']) & (~isin(cp['dest'], tuple(visited))) & (cp['tend'] > EAT) & \
-               (isin(cp['dest'], list(relays)) | (cp['dest'] == dest))
+        # Only contacts that depart from the current node (plus the dummy contacts) are checked
+        pos  = np.concatenate((graph_pos[graph.span(c_dest)], dummy_pos))
+        pos  = pos[(cp['orig'][pos] == c_dest) & (~isin(cp['dest'][pos], tuple(visited))) & (cp['tend'][pos] > EAT) & \
+                   (isin(cp['dest'][pos], list(relays)) | (cp['dest'][pos] == dest))]
+        cids = np.zeros(len(idx), dtype='bool')
+        cids[pos] = True
 
         # If no neighbors identified, continue
         if not cids.any(): continue
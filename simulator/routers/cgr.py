@@ -1,12 +1,14 @@
+from heapq import heappop, heappush
 import numpy as np
 import pandas as pd
+from .contact_graph import ContactGraph
 from .utils import isin, str_type
 
 # ============================================================================================================
 # === BUILD A COLLECTION OF ROUTES BETWEEN ONE ORIG AND DEST
 # ============================================================================================================
 
-def cgr_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_speed=125, verbose=False):
+def cgr_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_speed=125, verbose=False, graph=None):
     """ Implement the Dijkstra algorithm to find the route that delivers data the earliest
 
         :param orig: Name of the node where the bundle originates (e.g. PSH)
@@ -16,11 +18,14 @@ def cgr_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_spee
         :param tuple relays: Name of the nodes that can be used as relays to construct the route. Default is None, which
                              indicates that all nodes can be relays
         :param float max_speed: Max speed that a spacecraft can move in mph. Default is 125 miles/sec
+        :param ContactGraph graph: Contact graph index of the contact plan. Default is None, which
+                                   indicates that it is built from ``contact_plan``
         :return list: List of routes. See ``find_route`` to see the information in a route
     """
     # Initialize variables
     routes = []
     anchor = None
+    graph  = graph if graph is not None else ContactGraph(contact_plan)
     cp     = contact_plan.copy(deep=True)
     tinf   = max(cp.tstart.max(), cp.tend.max()) + 100 * 365 * 24 * 3600
     nodes  = set(cp.orig).union(set(cp.dest))
@@ -50,13 +55,14 @@ def cgr_build_route_list_fast(orig, dest, t, contact_plan, relays=None, max_spee
     cp['predecessor'] = np.array([None] * Nrows)
     cp['visited']     = np.array([False] * Nrows)
     cp['suppressed']  = np.array([False] * Nrows)
+    cp['graph_pos']   = graph.localize(idx)
 
     # Mark the EAT for the initial contact
     cp['EAT'][idx == -1] = t
 
     while True:
         # Use dijkstra algorithm to find a route
-        route = find_route_fast(orig, dest, cp, tinf, relays)
+        route = find_route_fast(orig, dest, cp, tinf, relays, graph=graph)
 
         # No more routes are available, exit
         if route is None:  break
@@ -202,11 +208,269 @@ def cgr_build_route_list_slow(orig, dest, t, contact_plan, relays=None, max_spee
 
     return routes
 
+# ============================================================================================================
+# === BUILD THE K BEST ROUTES BETWEEN ONE ORIG AND DEST (YEN)
+# ============================================================================================================
+
+def cgr_build_route_list_yen(orig, dest, t, contact_plan, relays=None, max_speed=125, verbose=False,
+                             graph=None, num_routes=10):
+    """ Implement Yen's K shortest paths algorithm over the contact graph to find the ``num_routes``
+        routes that deliver data the earliest. Spur paths are computed with Lawler's modification,
+        i.e. a route is only deviated from the point where it deviated from its parent route since
+        earlier deviations were already computed for the parent.
+
+        :param orig: Name of the node where the bundle originates (e.g. PSH)
+        :param dest: Name of the node where the bundle is destined for (e.g. Earth)
+        :param float t: Time at which the bundle needs to be routed
+        :param pandas.DataFrame contact_plan: Contact table
+        :param tuple relays: Name of the nodes that can be used as relays to construct the route. Default is None, which
+                             indicates that all nodes can be relays
+        :param float max_speed: Max speed that a spacecraft can move in mph. Default is 125 miles/sec
+        :param ContactGraph graph: Contact graph index of the contact plan. Default is None, which
+                                   indicates that it is built from ``contact_plan``
+        :param int num_routes: Maximum number of routes to compute
+        :return list: List of routes sorted by EAT, number of hops and contacts. See ``find_route_fast``
+                      to see the information in a route
+    """
+    # Initialize variables
+    graph  = graph if graph is not None else ContactGraph(contact_plan)
+    routes = []
+    msg    = 'Route {}-{}: [{}]\tEAT={}, Validity=({}, {}), Contacts={}, Hops={}'
+
+    # If the origin or destination are not in the contact plan, no route exists
+    if orig not in graph.codes or dest not in graph.codes: return routes
+
+    # Get the contact properties in the order of the contact graph
+    data = _graph_data(graph, contact_plan, relays, max_speed)
+
+    # Initialize variables
+    src, dst = graph.codes[orig], graph.codes[dest]
+    A, B, seen = [], [], set()
+
+    # Find the best route
+    path = find_route_graph(src, dst, t, graph, data)
+    if path is not None:
+        heappush(B, (path[1], len(path[0]), tuple(graph.cids[list(path[0])]), path[0], 0))
+        seen.add(path[0])
+
+    while B and len(A) < num_routes:
+        # Get the next best route
+        EAT, nhops, cids, path, dev = heappop(B)
+        A.append(path)
+
+        # Store the route
+        route = _build_route_from_graph(orig, dest, path, EAT, graph, data)
+        route['time'] = t
+        routes.append(route)
+
+        # Log the addition of the route
+        if verbose is True:
+            print(msg.format(orig, dest, len(A)-1, route['EAT'], route['tstart'], route['tend'],
+                             route['contacts'], route['route']))
+
+        # Compute the arrival time at the end of each contact of the route
+        arrivals, c_EAT = [], t
+        for pos in path:
+            c_EAT = max(data['tstart'][pos], c_EAT) + data['delay'][pos]
+            arrivals.append(c_EAT)
+
+        # Deviate from the route at each contact after its own deviation point
+        for i in range(dev, len(path)):
+            # The root path is the first i contacts of the route
+            root  = path[:i]
+            spur  = src if i == 0 else data['dest'][path[i-1]]
+            t_spur = t if i == 0 else arrivals[i-1]
+
+            # Contacts used by known routes with the same root path cannot be used
+            banned_contacts = {p[i] for p in A if len(p) > i and p[:i] == root}
+
+            # Nodes in the root path cannot be used to avoid loops
+            banned_nodes = np.zeros(len(graph.nodes), dtype='bool')
+            banned_nodes[src] = True
+            banned_nodes[[data['dest'][pos] for pos in root]] = True
+            banned_nodes[spur] = False
+
+            # Find the spur path
+            spur_path = find_route_graph(spur, dst, t_spur, graph, data, banned_nodes=banned_nodes,
+                                         banned_contacts=banned_contacts)
+            if spur_path is None: continue
+
+            # Store the new candidate if it has not been seen yet
+            candidate = root + spur_path[0]
+            if candidate in seen: continue
+            seen.add(candidate)
+            heappush(B, (spur_path[1], len(candidate), tuple(graph.cids[list(candidate)]), candidate, i))
+
+    return routes
+
+def find_route_graph(src, dst, t, graph, data, banned_nodes=None, banned_contacts=None):
+    """ Implement the Dijkstra algorithm over the contact graph index to find the earliest
+        arrival path between two nodes. See ``find_route_tree``.
+
+        :param int src: Code of the node where the search starts
+        :param int dst: Code of the destination node
+        :param float t: Time at which the search starts
+        :param ContactGraph graph: Contact graph index
+        :param dict data: Contact properties in the order of the contact graph (see ``_graph_data``)
+        :param numpy.ndarray banned_nodes: Boolean array with nodes that cannot be used
+        :param set banned_contacts: Positions in the contact graph of contacts that cannot be used
+        :return tuple: (Positions in the contact graph of the path contacts, EAT). None if no path exists
+    """
+    # Run the search until the destination is reached
+    EAT, pred, done = find_route_tree(src, t, graph, data, dst=dst, banned_nodes=banned_nodes,
+                                      banned_contacts=banned_contacts)
+
+    # If the destination was not reached, return
+    if EAT[dst] == np.inf or not done[dst]: return None
+
+    return _backtrack_graph(src, dst, pred, graph), EAT[dst]
+
+def find_route_tree(src, t, graph, data, dst=None, banned_nodes=None, banned_contacts=None):
+    """ Implement the Dijkstra algorithm over the contact graph index to find the earliest
+        arrival tree rooted at a node. Each node is settled once with its earliest arrival
+        time, which is valid since waiting at a node is always possible.
+
+        :param int src: Code of the node where the search starts
+        :param float t: Time at which the search starts
+        :param ContactGraph graph: Contact graph index
+        :param dict data: Contact properties in the order of the contact graph (see ``_graph_data``)
+        :param int dst: Code of the destination node. If provided, the search stops once it is reached
+        :param numpy.ndarray banned_nodes: Boolean array with nodes that cannot be used
+        :param set banned_contacts: Positions in the contact graph of contacts that cannot be used
+        :return tuple: (EAT to each node, position in the contact graph of the contact used to
+                       reach each node, boolean array with the nodes settled or banned)
+    """
+    # Initialize variables
+    EAT  = np.full(len(graph.nodes), np.inf)
+    pred = np.full(len(graph.nodes), -1, dtype='int64')
+    done = banned_nodes.copy() if banned_nodes is not None else np.zeros(len(graph.nodes), dtype='bool')
+    heap = [(t, src)]
+    EAT[src] = t
+
+    while heap:
+        # Get the next node to explore
+        c_EAT, node = heappop(heap)
+        if done[node]: continue
+        done[node] = True
+
+        # If the destination has been reached, stop
+        if node == dst: break
+
+        # Only relays can be used to continue the route
+        if node != src and not data['relay'][node]: continue
+
+        # Get this node's neighbors. Neighbors meet the following criteria:
+        # 1) The contact departs from this node
+        # 2) The contact.dest has not been explored yet
+        # 3) The contact.tend > current.EAT (i.e. eliminate contacts that end before data arrives)
+        # 4) The contact is not banned
+        span = graph.span(node)
+        pos  = np.arange(span.start, span.stop)
+        pos  = pos[(data['tend'][span] > c_EAT) & ~done[data['dest'][span]]]
+        if banned_contacts: pos = pos[~isin(pos, list(banned_contacts))]
+
+        # Compute early arrival time (EAT) and update the neighbors
+        for p, e in zip(pos, np.maximum(data['tstart'][pos], c_EAT) + data['delay'][pos]):
+            n = data['dest'][p]
+            if e < EAT[n]:
+                EAT[n], pred[n] = e, p
+                heappush(heap, (e, n))
+
+    return EAT, pred, done
+
+def _backtrack_graph(src, dst, pred, graph):
+    # Reconstruct the path from the destination to the source
+    path, node = [], dst
+    while node != src:
+        path.append(pred[node])
+        node = graph.orig_code[pred[node]]
+
+    return tuple(reversed(path))
+
+def _graph_data(graph, contact_plan, relays, max_speed):
+    # Get the contact properties in the order of the contact graph
+    cp   = contact_plan.loc[graph.cids]
+    data = {'tstart': graph.tstart, 'tend': cp.tend.values, 'dest': graph.dest_code,
+            'delay': cp.range.values + cp.range.values*(1+max_speed/186000)}
+    data['relay'] = np.array([relays is None or n in relays for n in graph.nodes])
+    return data
+
+def _build_route_from_graph(orig, dest, path, EAT, graph, data):
+    # Find the limiting contact. Backtrack the route as ``find_route_fast`` does
+    early_end, limit_contact = np.inf, np.inf
+    for pos in reversed(path):
+        if data['tend'][pos] < early_end:
+            early_end, limit_contact = data['tend'][pos], graph.cids[pos]
+
+    # Return route as dictionary
+    route = {}
+    route['orig']      = orig
+    route['dest']      = dest
+    route['contacts']  = tuple(graph.cids[list(path)])
+    route['route']     = (orig,) + tuple(graph.nodes[data['dest'][pos]] for pos in path)
+    route['tstart']    = graph.tstart[path[0]]
+    route['tend']      = early_end
+    route['EAT']       = EAT
+    route['limit_cid'] = limit_contact
+    route['nhops']     = len(path)
+    return route
+
+# ============================================================================================================
+# === BUILD THE BEST ROUTE BETWEEN ONE ORIG AND ALL DEST (EARLIEST ARRIVAL TREE)
+# ============================================================================================================
+
+def cgr_build_route_tree(orig, dests, t, contact_plan, relays=None, max_speed=125, verbose=False, graph=None):
+    """ Compute the earliest arrival tree rooted at ``orig`` and read from it the route that
+        delivers data the earliest to each destination. One search is run for all destinations.
+
+        :param orig: Name of the node where the bundle originates (e.g. PSH)
+        :param tuple dests: Names of the nodes where the bundle is destined for (e.g. Earth)
+        :param float t: Time at which the bundle needs to be routed
+        :param pandas.DataFrame contact_plan: Contact table
+        :param tuple relays: Name of the nodes that can be used as relays to construct the route. Default is None, which
+                             indicates that all nodes can be relays
+        :param float max_speed: Max speed that a spacecraft can move in mph. Default is 125 miles/sec
+        :param ContactGraph graph: Contact graph index of the contact plan. Default is None, which
+                                   indicates that it is built from ``contact_plan``
+        :return list: List of routes, one per reachable destination. See ``find_route_fast`` to see the
+                      information in a route
+    """
+    # Initialize variables
+    graph  = graph if graph is not None else ContactGraph(contact_plan)
+    routes = []
+    msg    = 'Route {}-{}: EAT={}, Validity=({}, {}), Contacts={}, Hops={}'
+
+    # If the origin is not in the contact plan, no route exists
+    if orig not in graph.codes: return routes
+
+    # Compute the earliest arrival tree
+    data = _graph_data(graph, contact_plan, relays, max_speed)
+    src  = graph.codes[orig]
+    EAT, pred, done = find_route_tree(src, t, graph, data)
+
+    # Read the route to each destination from the tree
+    for dest in dests:
+        # If the destination was not reached, skip
+        if dest == orig or dest not in graph.codes: continue
+        dst = graph.codes[dest]
+        if EAT[dst] == np.inf or not done[dst]: continue
+
+        # Store the route
+        route = _build_route_from_graph(orig, dest, _backtrack_graph(src, dst, pred, graph), EAT[dst], graph, data)
+        route['time'] = t
+        routes.append(route)
+
+        # Log the addition of the route
+        if verbose is True:
+            print(msg.format(orig, dest, route['EAT'], route['tstart'], route['tend'], route['contacts'], route['route']))
+
+    return routes
+
 # ============================================================================================================
 # === FIND ONE ROUTE BETWEEN ONE ORIG AND DEST
 # ============================================================================================================
 
-def find_route_fast(orig, dest, cp, tinf, relays, root=-1):
+def find_route_fast(orig, dest, cp, tinf, relays, root=-1, graph=None):
     """ Implement the Dijkstra algorithm to find the route that delivers data earlier
 
         .. Tip:: Dijkstra does not need the full tree to be built prior to its application. Therefore,
@@ -221,6 +485,8 @@ def find_route_fast(orig, dest, cp, tinf, relays, root=-1):
         :param pandas.Timestamp tinf: Timestamp that denotes infinity (by default, 10 years after any event in the contact plan table)
         :param tuple relays: Names for all nodes that can be used as relays to construct routes
         :param int root: Id of the root note (by default -1)
+        :param ContactGraph graph: Contact graph index of the contact plan. If provided, ``cp['graph_pos']``
+                                   must map the graph to positions in ``cp``.
         :return dict: A dictionary with the best route
     """
     # Check inputs
@@ -246,8 +512,16 @@ def find_route_fast(orig, dest, cp, tinf, relays, root=-1):
         # 4) They are not suppressed or already visited
         # 5) The neighbor contact's destination has relay capabilities or is the destination itself
         #    (note: this is not present in the SABR specification or ION code)
-        cids = (c_dest == cp['orig']) & (~isin(cp['dest'], visited_nodes)) & (isin(cp['dest'], relays) | (cp['dest'] == dest)) & \
-               (cp['tend'] > c_EAT) & (cp['suppressed'] == False) & (cp['visited'] == False)
+        if graph is None:
+            cids = (c_dest == cp['orig']) & (~isin(cp['dest'], visited_nodes)) & (isin(cp['dest'], relays) | (cp['dest'] == dest)) & \
+                   (cp['tend'] > c_EAT) & (cp['suppressed'] == False) & (cp['visited'] == False)
+        else:
+            # Only check the contacts that depart from the current node (plus the dummy contacts)
+            pos  = np.concatenate((cp['graph_pos'][graph.span(c_dest[0])], np.flatnonzero(cp['index'] < 0)))
+            pos  = pos[(cp['orig'][pos] == c_dest) & (~isin(cp['dest'][pos], visited_nodes)) & (isin(cp['dest'][pos], relays) | (cp['dest'][pos] == dest)) & \
+                       (cp['tend'][pos] > c_EAT) & (cp['suppressed'][pos] == False) & (cp['visited'][pos] == False)]
+            cids = np.zeros(len(cp['index']), dtype='bool')
+            cids[pos] = True
         if cids.any() == True:
             # Compute early transmission time (ETT) and early arrival time (EAT)
             ETT = np.maximum(cp['tstart'][cids], c_EAT)
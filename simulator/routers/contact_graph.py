@@ -0,0 +1,85 @@
+import numpy as np
+
+# ============================================================================================================
+# === CONTACT GRAPH INDEX
+# ============================================================================================================
+
+class ContactGraph(object):
+    """ Index of a contact plan in compressed sparse row (CSR) format. Node names are mapped
+        to integers and contacts are grouped by origin node and sorted by start time. The
+        contacts departing from node ``n`` are then ``cids[offsets[n]:offsets[n+1]]``, so
+        finding the successors of a contact is a slice instead of a scan of the entire plan.
+
+        Contacts of a node with itself are not part of the graph.
+
+        :param pandas.DataFrame contacts_df: Contact plan indexed by contact id
+        :param DtnIdRegistry ids: If provided, node codes are the ones in this registry
+    """
+    def __init__(self, contacts_df, ids=None):
+        # Eliminate contact with itself if it exists
+        cp = contacts_df.loc[contacts_df.orig != contacts_df.dest]
+
+        # Map node names to integers
+        if ids is None:
+            self.nodes = sorted(set(cp.orig) | set(cp.dest))
+            self.codes = {n: i for i, n in enumerate(self.nodes)}
+        else:
+            ids.add_nodes(sorted(set(cp.orig) | set(cp.dest)))
+            self.nodes = list(ids.node_names)
+            self.codes = dict(ids.node_codes)
+
+        # Encode the contact plan
+        orig = np.array([self.codes[n] for n in cp.orig], dtype='int64')
+        dest = np.array([self.codes[n] for n in cp.dest], dtype='int64')
+
+        # Group contacts by origin and sort them by start time. Ties keep the order of
+        # the contact plan.
+        order = np.lexsort((cp.tstart.values, orig))
+
+        # Store the graph in CSR format
+        self.cids      = cp.index.values[order]
+        self.orig_code = orig[order]
+        self.dest_code = dest[order]
+        self.tstart    = cp.tstart.values[order]
+        self.offsets   = np.zeros(len(self.nodes)+1, dtype='int64')
+        self.offsets[1:] = np.cumsum(np.bincount(orig, minlength=len(self.nodes)))
+
+    def __len__(self):
+        return len(self.cids)
+
+    def span(self, node):
+        """ Return the slice of the graph with the contacts that depart from a node
+
+            :param node: Node name or node code
+            :return slice: Positions in the graph. Empty if the node is not in the graph
+        """
+        c = self.codes.get(node, -1) if not isinstance(node, (int, np.integer)) else node
+        if c < 0: return slice(0, 0)
+        return slice(self.offsets[c], self.offsets[c+1])
+
+    def successors(self, node):
+        """ Return the contact ids of all contacts that depart from a node, sorted by start time """
+        return self.cids[self.span(node)]
+
+    def localize(self, index):
+        """ Map the contacts in the graph to positions in an array of contact ids. This is
+            used by the routing algorithms that operate on a copy of the contact plan in
+            ``{column -> [values]}`` format.
+
+            :param numpy.ndarray index: Contact ids of the copy of the contact plan
+            :return numpy.ndarray: For each contact in the graph, its position in ``index``
+            :raises ValueError: If a contact in the graph is not in ``index``, i.e. the graph
+                                was not built from this contact plan
+        """
+        # Sort the contact ids to search them
+        order = np.argsort(index, kind='stable')
+        pos   = np.searchsorted(index[order], self.cids)
+        pos   = np.minimum(pos, len(index)-1)
+
+        # Check that all contacts are in the index
+        found = index[order][pos] == self.cids if len(index) > 0 else np.zeros(len(self.cids), dtype=bool)
+        if not found.all():
+            raise ValueError('Contacts {} of the contact graph are not in the contact plan'.format(
+                             list(self.cids[~found])))
+
+        return order[pos]
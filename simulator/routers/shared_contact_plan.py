@@ -0,0 +1,81 @@
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# ============================================================================================================
+# === SHARE A CONTACT PLAN BETWEEN PROCESSES
+# ============================================================================================================
+
+# Shared memory blocks attached by this process (see ``attach_contact_plan``)
+_attached = []
+
+def publish_contact_plan(contact_plan):
+    """ Publish a contact plan as shared-memory arrays so that worker processes can attach to
+        it instead of receiving a pickled copy with every task. Numeric columns are shared as
+        they are, all other columns (e.g. node names) are shared as integer codes.
+
+        :param pandas.DataFrame contact_plan: Contact table
+        :return tuple: (List of SharedMemory blocks, metadata to pass to ``attach_contact_plan``).
+                       The owner must call ``release_contact_plan`` on the blocks when done.
+    """
+    # Initialize variables
+    blocks, meta = [], {'columns': [], 'nrows': len(contact_plan)}
+
+    # Share the index and each column
+    columns = [('__index__', contact_plan.index)] + [(c, contact_plan[c]) for c in contact_plan.columns]
+    for col, values in columns:
+        # Encode non-numeric columns
+        uniques = None
+        if values.dtype.kind in 'fiub':
+            arr = np.ascontiguousarray(values.values)
+        else:
+            arr, uniques = pd.factorize(values, sort=False)
+            arr = arr.astype('int64')
+
+        # Copy the column into a shared memory block
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        meta['columns'].append((col, shm.name, arr.dtype.str, uniques))
+
+    return blocks, meta
+
+def attach_contact_plan(meta):
+    """ Attach to a contact plan published with ``publish_contact_plan``. Numeric columns are
+        read-only views of the shared memory blocks, all other columns are decoded. The blocks
+        stay open until ``detach_contact_plan`` is called.
+
+        :param dict meta: Metadata returned by ``publish_contact_plan``
+        :return pandas.DataFrame: Contact table
+    """
+    # Initialize variables
+    data, index = {}, None
+
+    for col, name, dtype, uniques in meta['columns']:
+        # View the column in shared memory. Keep the block open while the view is in use
+        shm = shared_memory.SharedMemory(name=name)
+        _attached.append(shm)
+        arr = np.ndarray((meta['nrows'],), dtype=dtype, buffer=shm.buf)
+        arr.flags.writeable = False
+
+        # Decode non-numeric columns
+        if uniques is not None: arr = np.asarray(uniques.take(arr))
+
+        # Store the index or column
+        if col == '__index__': index = arr
+        else: data[col] = arr
+
+    return pd.DataFrame(data, index=index, copy=False)
+
+def detach_contact_plan():
+    """ Close the shared memory blocks attached by this process. The contact plans returned
+        by ``attach_contact_plan`` cannot be used afterwards.
+    """
+    while _attached:
+        _attached.pop().close()
+
+def release_contact_plan(blocks):
+    """ Close and free the shared memory blocks of a published contact plan """
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from warnings import warn
+
+# ============================================================================================================
+# === CONTACT TIMELINES INDEX
+# ============================================================================================================
+
+class ContactTimeline(object):
+    """ Contacts of one link sorted by start time. All attributes are read-only arrays
+        (views of the arrays in ``ContactTimelines``) with one entry per contact:
+
+            - ``cid``: Contact id in the contact plan
+            - ``tstart``, ``tend``: Start and end time
+            - ``dtstart``: Time between the end of the previous contact and the start of this one
+            - ``duration``, ``rate``, ``range``: Contact properties
+            - ``t_open``, ``t_close``: Times at which the contact opens and closes if the
+              contacts are taken in sequence, i.e. waiting ``dtstart`` and then ``duration``
+              for each of them, as if they were simulated one after the other.
+    """
+    __slots__ = ('orig', 'dest', 'cid', 'tstart', 'tend', 'dtstart', 'duration', 'rate', 'range',
+                 't_open', 't_close')
+
+    def __init__(self, orig, dest, arrays, span):
+        self.orig = orig
+        self.dest = dest
+        for k, v in arrays.items(): setattr(self, k, v[span])
+
+    def __len__(self):
+        return len(self.cid)
+
+    def __repr__(self):
+        return 'ContactTimeline({}, {}, {} contacts)'.format(self.orig, self.dest, len(self))
+
+    def __str__(self):
+        cols = [c for c in self.__slots__ if c not in ('orig', 'dest', 'cid')]
+        return str(pd.DataFrame({c: getattr(self, c) for c in cols}, index=self.cid))
+
+class ContactTimelines(object):
+    """ Index of a contact plan by ordered pair of nodes. The contact plan is sorted by
+        (orig, dest, tstart, tend) once and the contacts of each link are a slice of it,
+        so links get read-only views instead of copies of the contact plan.
+
+        Contacts with zero duration are not part of the timelines.
+
+        :param pandas.DataFrame contacts_df: Contact plan indexed by contact id
+    """
+    def __init__(self, contacts_df):
+        # Initialize variables
+        cp     = contacts_df
+        n      = len(cp)
+        tstart = cp.tstart.values.astype(float)
+        tend   = cp.tend.values.astype(float)
+
+        # Map (orig, dest) pairs to integers
+        pair_code, pairs = pd.factorize(pd.MultiIndex.from_arrays([cp.orig, cp.dest]))
+
+        # Group contacts by link and sort them by start and end time
+        order  = np.lexsort((tend, tstart, pair_code))
+        code   = pair_code[order]
+        tstart = tstart[order]
+        tend   = tend[order]
+        first  = np.ones(n, dtype=bool)
+        first[1:] = code[1:] != code[:-1]
+
+        # Compute the delta in time between gate openings and closings
+        prev    = np.flatnonzero(~first)
+        dtstart = tstart.copy()
+        dtstart[prev] = tstart[prev] - tend[prev-1]
+
+        # Get all contact properties
+        get = lambda c, d: cp[c].values[order].astype(float) if c in cp else np.full(n, d)
+        arrays = {'cid': cp.index.values[order], 'tstart': tstart, 'tend': tend,
+                  'dtstart': dtstart, 'duration': get('duration', np.nan),
+                  'rate': get('rate', np.nan), 'range': get('range', np.nan)}
+        if 'duration' not in cp: arrays['duration'] = tend - tstart
+
+        # Drop contacts with no duration
+        keep   = arrays['duration'] != 0.0
+        arrays = {k: v[keep] for k, v in arrays.items()}
+        code   = code[keep]
+
+        # Find the contacts of each link. Links whose contacts have all been dropped
+        # have an empty span
+        starts = np.searchsorted(code, np.arange(len(pairs)), side='left')
+        ends   = np.searchsorted(code, np.arange(len(pairs)), side='right')
+        self.spans = {p: slice(s, e) for p, s, e in zip(pairs, starts, ends)}
+
+        # Accumulate times in the same order as sequential timeouts would
+        t_open, t_close = np.zeros(len(code)), np.zeros(len(code))
+        for span in self.spans.values():
+            steps = np.stack((np.maximum(0.0, arrays['dtstart'][span]), arrays['duration'][span]), axis=1)
+            times = np.cumsum(steps.ravel())
+            t_open[span], t_close[span] = times[0::2], times[1::2]
+        arrays['t_open'], arrays['t_close'] = t_open, t_close
+
+        # Make all arrays read-only
+        for v in arrays.values(): v.flags.writeable = False
+        self.arrays = arrays
+
+        # Warn the user if something might be wrong
+        for (orig, dest), span in self.spans.items():
+            if (arrays['dtstart'][span] < 0).any(): warn(f'{orig}-{dest}: Check range intervals, dtstart < 0')
+            if (arrays['duration'][span] < 0).any(): warn(f'{orig}-{dest}: Check range intervals, duration < 0')
+
+    def __len__(self):
+        return len(self.arrays['cid'])
+
+    def timeline(self, orig, dest):
+        """ Return the contacts from ``orig`` to ``dest``. If there are none, the link is
+            assumed to be symmetric and the contacts from ``dest`` to ``orig`` are used.
+
+            :return ContactTimeline: None if there are no contacts between these nodes
+        """
+        span = self.spans.get((orig, dest))
+        if span is None:
+            orig, dest = dest, orig
+            span = self.spans.get((orig, dest))
+        if span is None: return None
+        return ContactTimeline(orig, dest, self.arrays, span)
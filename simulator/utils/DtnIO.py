@@ -1,5 +1,6 @@
 import ast
 from copy import deepcopy
+import hashlib
 from lxml import etree
 import networkx as nx
 import numpy as np
@@ -9,53 +10,9 @@ from collections import defaultdict
 import json
 from pathlib import Path
 import os
-from warnings import warn, catch_warnings, simplefilter
+from warnings import catch_warnings, simplefilter
 from simulator.utils.DtnUtils import load_class_dynamically
 
-# ============================================================================================================
-# === FUNCTIONS TO PROCESS CONTACT PLAN FOR A SCHEDULED CONNECTION
-# ============================================================================================================
-
-def prepare_contact_plan(orig, dest, cp):
-    """ Prepare a contact plan for a connection by filtering out not relevant contacts
-
-        :param orig: Name of the origin node
-        :param dest: Name of the destination node
-        :param cp:   Contact plan in dataframe format
-        :return:     Filtered contact plan as a dataframe
-    """
-    # Initialize variables
-    db = cp.copy(deep=True)
-
-    # Get a copy of the contact plan for this contact
-    cp = db.loc[(db.orig == orig) & (db.dest == dest)].copy()
-
-    # If no range intervals are found, invert orig, dest since connection is assumed
-    # to be symmetric
-    if cp.empty: cp = db.loc[(db.orig == dest) & (db.dest == orig)]
-
-    # If no range intervals are available at this point, exit
-    if cp.empty: return
-
-    # Sort range intervals
-    cp = cp.sort_values(by=['tstart', 'tend'])
-
-    # Compute the delta in time between gate openings and closings
-    if cp.shape[0] != 1:
-        cp['dtstart'] = np.insert(cp.tstart.iloc[1:].values - cp.tend.iloc[0:-1].values,
-                                  0, cp.tstart.iloc[0])
-    else:
-        cp['dtstart'] = cp.tstart.iloc[0]
-
-    # Drop rows with no duration
-    cp = cp[cp.duration != 0.0]
-
-    # Warn the user if something might be wrong
-    if any(cp.dtstart < 0): warn(f'{orig}-{dest}: Check range intervals, dtstart < 0')
-    if any(cp.dtstart < 0): warn(f'{orig}-{dest}: Check range intervals, duration < 0')
-
-    return cp
-
 # ============================================================================================================
 # === FUNCTIONS TO PROCESS SCENARIO FILE
 # ============================================================================================================
@@ -192,22 +149,64 @@ def load_network_file(filepath, alias=None):
 
 def norm_time(t, t0): return (t - t0) / np.timedelta64(1, 's')
 
-def load_ezmonte_data(contact_file, ranges_file, t0):
-    # Load contacts and range intervals
-    if contact_file.suffix == '.xlsx':
-        cp = pd.read_excel(contact_file, index_col=0)
-        ri = pd.read_excel(ranges_file, index_col=0)
-    elif contact_file.suffix == '.csv':
-        converters = {'tstart': lambda x: pd.to_datetime(x),
-                      'tend': lambda x: pd.to_datetime(x)}
-        cp = pd.read_csv(contact_file, sep=',', index_col=0, converters=converters)
-        ri = pd.read_csv(ranges_file, sep=',', index_col=0, converters=converters)
-    elif contact_file.suffix == '.h5':
-        cp = pd.read_excel(contact_file)
-        ri = pd.read_excel(ranges_file)
+def read_contact_table(file, index_col=0):
+    """ Read a table of contacts or range intervals. The ``tstart`` and ``tend`` columns
+        are parsed as datetimes.
+
+        :param Path file: Path to the ``.xlsx``, ``.csv`` or ``.h5`` file
+        :param index_col: Column to use as index (see ``pandas.read_csv``)
+        :return pandas.DataFrame: The table
+    """
+    # Read the file
+    if file.suffix == '.xlsx':
+        df = pd.read_excel(file, index_col=index_col)
+    elif file.suffix == '.csv':
+        df = pd.read_csv(file, sep=',', index_col=index_col)
+    elif file.suffix == '.h5':
+        df = pd.read_hdf(file)
     else:
         raise IOError('Contact plan can only be .h5, .xlsx or .csv')
 
+    # Parse timestamps one column at a time
+    for col in ('tstart', 'tend'):
+        if col in df: df[col] = pd.to_datetime(df[col])
+
+    return df
+
+def check_contact_plan(cp):
+    """ Check that a contact plan with relative times is valid. Raises a ``ValueError`` if not """
+    if (cp.tstart < 0).any() or (cp.tend < 0).any():
+        raise ValueError('Contact plan cannot have contacts starting or ending before 0 sec.'
+                         'This is most likely caused by a mismatch between the contact/range file'
+                         'and the simulation epoch.')
+    if 'rate' in cp and (cp.rate < 0).any():
+        raise ValueError('Contact plan cannot have a contact with a data rate < 0')
+    if 'range' in cp and (cp.range < 0).any():
+        raise ValueError('Contact plan cannot have a contact with a range  < 0')
+
+def load_ezmonte_data(contact_file, ranges_file, t0, cache_dir=None):
+    """ Load a contact plan and its range intervals, with times relative to ``t0``. The
+        contact plan is validated when it is read from the files.
+
+        :param Path contact_file: Contact plan
+        :param Path ranges_file: Range intervals
+        :param t0: Simulation epoch
+        :param Path cache_dir: If provided, the normalized tables are cached in this directory
+                               (see ``save_table_cache``), keyed by the content of the files
+                               and the epoch.
+        :return tuple: Contact plan and range intervals as data frames
+    """
+    # If the tables are cached, just load them
+    key = cache_key('ezmonte', contact_file, ranges_file, t0) if cache_dir else None
+    if key:
+        cp = load_table_cache(cache_dir / '{}.cp.npy'.format(key))
+        ri = load_table_cache(cache_dir / '{}.ri.npy'.format(key))
+        if cp is not None and ri is not None: return cp, ri
+
+    # Load contacts and range intervals
+    cp = read_contact_table(contact_file)
+    ri = read_contact_table(ranges_file)
+
     # Merge tables
     cp = pd.merge(cp, ri.loc[:, ['cid', 'range']], left_index=True, right_on='cid')
     cp = cp.set_index('cid')
@@ -218,8 +217,70 @@ def load_ezmonte_data(contact_file, ranges_file, t0):
     ri.tstart = norm_time(ri.tstart, t0)
     ri.tend   = norm_time(ri.tend, t0)
 
+    # Check validity
+    check_contact_plan(cp)
+
+    # Cache the tables
+    if key:
+        save_table_cache(cp, cache_dir / '{}.cp.npy'.format(key))
+        save_table_cache(ri, cache_dir / '{}.ri.npy'.format(key))
+
     return cp, ri
 
+def save_table_cache(df, cache_file):
+    """ Save a table as a structured array in ``.npy`` format, so that it can be memory
+        mapped when loaded. The index is stored as the first field. Only numeric and
+        string columns are supported, otherwise the table is not saved. The file is
+        written atomically so that several processes can share the same cache. If it
+        cannot be written (e.g. read-only directory), the table is not saved.
+
+        :param pandas.DataFrame df: Table to save
+        :param Path cache_file: Path to the ``.npy`` cache file
+        :return bool: True if the table was saved
+    """
+    # Convert the index to a column
+    df = df.reset_index()
+
+    # Get the type of each column. Strings are stored with a fixed width
+    dtypes = []
+    for col in df.columns:
+        vals = df[col]
+        if vals.dtype == object:
+            if not vals.map(type).eq(str).all(): return False
+            dtypes.append((col, 'U{}'.format(max(vals.str.len().max(), 1) if len(vals) else 1)))
+        elif vals.dtype.kind in 'biufM':
+            dtypes.append((col, vals.dtype.str))
+        else:
+            return False
+
+    # Build the structured array
+    arr = np.empty(len(df), dtype=dtypes)
+    for col in df.columns: arr[col] = df[col].values
+
+    # Write to a temporary file and move it in place
+    return _write_cache(cache_file, lambda f: np.save(f, arr))
+
+def load_table_cache(cache_file):
+    """ Load a table saved with ``save_table_cache``. The file is memory mapped copy-on-write:
+        the index and numeric columns are views of the mapped file, so they are only read
+        from disk when used, and modifying them does not change the file. String columns
+        are loaded as Python objects.
+
+        :param Path cache_file: Path to the ``.npy`` cache file
+        :return pandas.DataFrame: The table. None if the file does not exist
+    """
+    # If the cache file does not exist, return
+    if not cache_file.exists(): return None
+
+    # Map the table
+    arr  = np.load(cache_file, mmap_mode='c')
+    idx, cols = arr.dtype.names[0], arr.dtype.names[1:]
+
+    # Restore the index. Unnamed indices are stored as ``index`` by ``reset_index``
+    index = pd.Index(arr[idx], name=None if idx == 'index' else idx, copy=False)
+
+    return pd.DataFrame({col: arr[col] for col in cols}, index=index, columns=cols, copy=False)
+
 def load_route_schedule_file(routes_file, t0):
     # Load route schedule
     converter  = lambda x: ast.literal_eval(x)
@@ -238,6 +299,106 @@ def load_route_schedule_file(routes_file, t0):
 
     return routes
 
+def cache_key(*args):
+    """ Compute a key that identifies cached data (e.g. a route schedule) from the inputs
+        used to create it. Dataframes are hashed by content, paths by the content of the
+        file and any other input by its representation.
+
+        :return str: Hexadecimal SHA-256 digest
+    """
+    h = hashlib.sha256()
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            h.update(repr(list(arg.columns)).encode())
+            h.update(pd.util.hash_pandas_object(arg, index=True).values.tobytes())
+        elif isinstance(arg, Path):
+            h.update(arg.read_bytes())
+        else:
+            h.update(repr(arg).encode())
+    return h.hexdigest()
+
+def resolve_cache_dir(globs, cache):
+    """ Get the directory of a cache. Caches are shared by all simulations with the same
+        inputs, so relative paths are resolved against the ``cache_dir`` global setting or,
+        if it is not provided, the input directory (never the output directory of a run).
+
+        :param globs: Global settings of the simulation (see ``DtnGlobalsParser``)
+        :param str cache: Cache directory. If None, no cache is used
+        :return Path: Absolute path of the cache directory, or None
+    """
+    if not cache: return None
+    base = globs.cache_dir if globs.cache_dir is not None else globs.indir
+    return base / cache
+
+def save_route_schedule_cache(routes, cache_file):
+    """ Save a route schedule in binary columnar format. The variable-length ``route`` and
+        ``contacts`` tuples are stored as flat arrays plus offset arrays. The file is written
+        atomically so that several processes can share the same cache. If it cannot be
+        written (e.g. read-only directory), the route schedule is not saved.
+
+        :param pandas.DataFrame routes: Route schedule
+        :param Path cache_file: Path to the ``.npz`` cache file
+        :return bool: True if the route schedule was saved
+    """
+    # Map node names to integers
+    nodes = sorted(set(routes.orig) | set(routes.dest) | {n for r in routes.route for n in r})
+    codes = {n: i for i, n in enumerate(nodes)}
+
+    # Scalar columns
+    data = {c: pd.to_numeric(routes[c]).values for c in ['time', 'EAT', 'tstart', 'tend', 'limit_cid', 'nhops']}
+    data['orig']  = np.array([codes[n] for n in routes.orig], dtype='int64')
+    data['dest']  = np.array([codes[n] for n in routes.dest], dtype='int64')
+    data['nodes'] = np.array(nodes, dtype='str')
+
+    # Variable-length columns
+    data['route']            = np.array([codes[n] for r in routes.route for n in r], dtype='int64')
+    data['route_offsets']    = np.cumsum([0] + [len(r) for r in routes.route], dtype='int64')
+    data['contacts']         = np.array([c for cts in routes.contacts for c in cts], dtype='int64')
+    data['contacts_offsets'] = np.cumsum([0] + [len(c) for c in routes.contacts], dtype='int64')
+
+    # Write to a temporary file and move it in place
+    return _write_cache(cache_file, lambda f: np.savez(f, **data))
+
+def load_route_schedule_cache(cache_file):
+    """ Load a route schedule saved with ``save_route_schedule_cache``
+
+        :param Path cache_file: Path to the ``.npz`` cache file
+        :return pandas.DataFrame: Route schedule. None if the file does not exist
+    """
+    # If the cache file does not exist, return
+    if not cache_file.exists(): return None
+
+    with np.load(cache_file) as f:
+        # Scalar columns
+        nodes  = f['nodes'].tolist()
+        routes = {c: f[c] for c in ['time', 'EAT', 'tstart', 'tend', 'limit_cid', 'nhops']}
+        routes['orig'] = [nodes[i] for i in f['orig'].tolist()]
+        routes['dest'] = [nodes[i] for i in f['dest'].tolist()]
+
+        # Variable-length columns
+        rv, ro = f['route'].tolist(), f['route_offsets'].tolist()
+        cv, co = f['contacts'].tolist(), f['contacts_offsets'].tolist()
+        routes['route']    = [tuple(nodes[i] for i in rv[a:b]) for a, b in zip(ro[:-1], ro[1:])]
+        routes['contacts'] = [tuple(cv[a:b]) for a, b in zip(co[:-1], co[1:])]
+
+    # Return the route schedule with the standard column order
+    cols = ['time', 'orig', 'dest', 'route', 'EAT', 'contacts', 'tstart', 'tend', 'limit_cid', 'nhops']
+    return pd.DataFrame(routes, columns=cols)
+
+def _write_cache(cache_file, write):
+    """ Write a cache file atomically: ``write(f)`` writes the content to a temporary file
+        that is then moved in place. Returns False if the file could not be written.
+    """
+    tmp = cache_file.with_name('{}.{}.tmp'.format(cache_file.name, os.getpid()))
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, 'wb') as f: write(f)
+        os.replace(tmp, cache_file)
+    except OSError:
+        if tmp.exists(): tmp.unlink()
+        return False
+    return True
+
 #========================================================================
 #=== EXPORT FUNCTIONS
 #========================================================================
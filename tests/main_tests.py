@@ -1,24 +1,33 @@
 import sys
 sys.path.append('../')
 
+import itertools
 import numpy as np
 import os
 import pandas as pd
 from pathlib import Path
 import shutil
+import simpy
+import tempfile
 from simulator.utils.DtnIO import load_traffic_file
 import traceback
+from types import SimpleNamespace
 import unittest
+from unittest import mock
 import warnings
 import yaml
 
 # Get to the right directory
 base_dir = './' if 'tests' in os.getcwd() else './tests/'
 
-def _run_test(test_id):
+def _load_test(test_id):
     # Load the config file
     with open(base_dir + f'test_{test_id}.yaml') as f:
-        config = yaml.load(f)
+        return yaml.load(f)
+
+def _run_test(test_id):
+    # Load the config file
+    config = _load_test(test_id)
 
     # Run the simulation (avoid circular import)
     from bin.main import run_simulation
@@ -181,6 +190,383 @@ class WalkerConsTests(unittest.TestCase):
             self.assertAlmostEqual(df1.data_vol.sum(),
                                    df2.data_vol.sum())
 
+class RouteWindowTests(unittest.TestCase):
+    """ Check that the routes computed in time windows are the same as the
+        routes of the full route schedule
+    """
+    # Contacts from N1 to N2 as (tstart, tend) in [sec]. Some of them start several
+    # windows ahead of the simulation time or span more than one window
+    contacts = [(100, 400), (900, 1000), (2500, 4000), (5000, 5100)]
+
+    # Duration of a route window [sec]
+    window = 600
+
+    def test_4(self):
+        self.compare_route_windows(4)
+
+    def test_5(self):
+        self.compare_route_windows(5)
+
+    def compare_route_windows(self, test_id):
+        # Avoid circular import
+        from simulator.environments.DtnSimEnvironment import DtnSimEnviornment
+        from simulator.utils.DtnConfigParser import parse_configuration_dict
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Create the environment
+            config = self.window_config(_load_test(test_id), tmp)
+            env = DtnSimEnviornment(parse_configuration_dict(config))
+            env.initialize()
+
+            # Compute the full route schedule
+            router = env.nodes['N1'].router
+            full   = router.build_route_schedule()
+
+            # Compare the routes available at the start of each window
+            for t in np.arange(0, self.contacts[-1][1], self.window):
+                env.run(until=t + 1e-3)
+                self.assertEqual(self.route_set(router._routes_df, env.now),
+                                 self.route_set(full, env.now), msg=f'Window at t={t}')
+
+            # Finish the simulation
+            env.run()
+            env.reset()
+
+    def window_config(self, config, indir):
+        # Write the contact plan and range intervals
+        epoch = pd.Timestamp(config['scenario']['epoch'].replace(' UTC', ''))
+        cp = pd.DataFrame([{'orig': 'N1', 'dest': 'N2', 'tstart': epoch + pd.Timedelta(seconds=ts),
+                            'tend': epoch + pd.Timedelta(seconds=te), 'duration': te - ts}
+                           for ts, te in self.contacts])
+        ri = cp[['orig', 'dest', 'tstart', 'tend']].assign(cid=cp.index, range=1.0)
+        cp.to_csv(Path(indir) / 'contacts.csv')
+        ri.to_csv(Path(indir) / 'ranges.csv')
+
+        # Use a scheduled mobility model and a lookup router with route windows
+        config['globals'].update({'indir': indir, 'outdir': indir, 'track': False})
+        config['scenario']['until'] = self.contacts[-1][1]
+        config['scheduled_model'] = {'class': 'DtnScheduledMobilityModel', 'contacts': 'contacts.csv',
+                                     'ranges': 'ranges.csv'}
+        config['lookup_router'] = {'class': 'DtnLookupRouter', 'routes': 'routes.xlsx',
+                                   'excluded_routes': [], 'route_window': self.window}
+        config['connection'].update({'class': 'DtnScheduledConnection', 'mobility_model': 'scheduled_model'})
+        for node in ('node1', 'node2'):
+            config[node].update({'router': 'lookup_router', 'mobility_model': 'scheduled_model'})
+
+        return config
+
+    @staticmethod
+    def route_set(routes, t):
+        # Routes that have not ended at time t
+        routes = routes.loc[routes.tend > t]
+        return set(zip(routes.orig, routes.dest, routes.contacts.map(tuple)))
+
+class RandomWaypointTests(unittest.TestCase):
+    """ Check the contacts of the random waypoint mobility model against a brute-force
+        search of the distance between nodes sampled at a fine time step
+    """
+    # Scenario with a small seeded swarm
+    props = SimpleNamespace(x_max=300, y_max=300, v_max=15, v_min=5, wait_min=0, wait_max=30,
+                            time_step=1, until=2000)
+    num_nodes, seed, max_dist = 6, 2, 50.0
+
+    # Time step of the brute-force search [sec]
+    fine_step = 0.01
+
+    def test_contacts(self):
+        # Avoid circular import
+        from simulator.mobility_models.DtnRandomWaypointMobilityModel import DtnRandomWaypointMobilityModel
+
+        # Create the trajectories of the swarm
+        env = SimpleNamespace(do_log=False, nodes={f'N{i}': None for i in range(self.num_nodes)})
+        np.random.seed(self.seed)
+        model = DtnRandomWaypointMobilityModel(env, self.props)
+        nodes = list(env.nodes)
+
+        # Find the contacts using windows of two knots, so that many contacts span
+        # more than one window
+        contacts = model.compute_contacts(self.max_dist, knots_per_window=2, knots_per_chunk=16)
+        grid     = np.unique(np.concatenate([model.knots[n][0] for n in nodes]))
+        edges    = grid[::2]
+        spanning = [c for cc in contacts.values() for c in cc if ((edges > c[0]) & (edges < c[1])).any()]
+        short    = [c for cc in contacts.values() for c in cc if self.fine_step < c[1] - c[0] < self.props.time_step]
+        self.assertTrue(spanning, msg='No contact spans a window boundary')
+        self.assertTrue(short, msg='No contact is shorter than the time step')
+
+        # The window size does not change the contacts
+        self.assertEqual(contacts, model.compute_contacts(self.max_dist))
+
+        # Sample the distance between all nodes
+        h    = self.fine_step
+        t    = np.arange(0, self.props.until + h/2, h)
+        x, y = model.positions(t, nodes=nodes)
+
+        for a, b in itertools.combinations(range(len(nodes)), 2):
+            # Find the periods during which these nodes are in contact
+            inside = (x[a]-x[b])**2 + (y[a]-y[b])**2 <= self.max_dist**2
+            edge   = np.diff(np.r_[0, inside.astype(int), 0])
+            brute  = list(zip(t[np.flatnonzero(edge == 1)], t[np.flatnonzero(edge == -1) - 1]))
+
+            # Compare them with the exact contacts. Contacts shorter than the fine step
+            # may not be sampled
+            exact = [c for c in contacts.get((nodes[a], nodes[b]), []) if c[1] - c[0] > h]
+            self.assertEqual(len(brute), len(exact), msg=f'{nodes[a]}-{nodes[b]}')
+            for (bs, be), (ts, te, _) in zip(brute, exact):
+                self.assertTrue(ts - 1e-9 <= bs <= ts + h + 1e-9, msg=f'{nodes[a]}-{nodes[b]}: start {ts}')
+                self.assertTrue(te - h - 1e-9 <= be <= te + 1e-9, msg=f'{nodes[a]}-{nodes[b]}: end {te}')
+
+class TimerServiceTests(unittest.TestCase):
+    """ Check the cancellable timers of ``DtnTimerService`` """
+    def setUp(self):
+        # Avoid circular import
+        from simulator.core.DtnTimerService import DtnTimerService
+
+        # Create a bare environment with a timer service
+        self.env = simpy.Environment()
+        self.env.do_log = False
+        self.timers = DtnTimerService(self.env)
+
+        # Times and arguments of all callbacks, and number of wake-ups
+        self.calls, self.wakeups = [], 0
+        fire = self.timers.fire
+        def count_wakeups(event):
+            self.wakeups += 1
+            fire(event)
+        self.timers.fire = count_wakeups
+
+    def callback(self, *args):
+        self.calls.append((self.env.now, *args))
+
+    def run_at(self, t, fun, *args):
+        # Call a function at time t
+        def process():
+            yield self.env.timeout(t - self.env.now)
+            fun(*args)
+        self.env.process(process())
+
+    def test_cancel_before_deadline(self):
+        # Start two timers and cancel the first one before its deadline
+        timer = self.timers.schedule(10, self.callback, 'cancelled')
+        self.timers.schedule(20, self.callback, 'active')
+        self.run_at(5, timer.cancel)
+        self.env.run()
+
+        # Only the second timer is called, and no timer is left
+        self.assertEqual(self.calls, [(20, 'active')])
+        self.assertEqual(len(self.timers), 0)
+        self.assertEqual(self.timers.heap, [])
+
+        # Cancelling a timer again has no effect
+        timer.cancel()
+        self.assertEqual(len(self.timers), 0)
+
+    def test_shared_deadline(self):
+        # Start three timers with the same deadline at different times
+        self.timers.schedule(10, self.callback, 1)
+        self.timers.schedule(10, self.callback, 2)
+        self.run_at(4, self.timers.schedule, 6, self.callback, 3)
+        self.env.run()
+
+        # All timers are called in the order they were started with a single wake-up
+        self.assertEqual(self.calls, [(10, 1), (10, 2), (10, 3)])
+        self.assertEqual(self.wakeups, 1)
+        self.assertEqual(len(self.timers), 0)
+
+    def test_reschedule_in_callback(self):
+        # Callback that starts itself again until it has been called three times, and
+        # starts and cancels timers with the same deadline as itself
+        def periodic(n):
+            self.callback('periodic', n)
+            if n == 3: return
+            self.timers.schedule(2, periodic, n+1)
+            self.timers.schedule(0, self.callback, 'now', n)
+            self.timers.schedule(2, self.callback, 'cancelled', n).cancel()
+
+        self.timers.schedule(1, periodic, 1)
+        self.env.run()
+
+        # Timers started from a callback run at their deadline, even if it is now
+        self.assertEqual(self.calls, [(1, 'periodic', 1), (1, 'now', 1), (3, 'periodic', 2),
+                                      (3, 'now', 2), (5, 'periodic', 3)])
+        self.assertEqual(self.wakeups, 3)
+        self.assertEqual(len(self.timers), 0)
+
+class ConnectionMonitorTests(unittest.TestCase):
+    """ Check the levels of the connection transmission monitor on ``test_7`` """
+    @classmethod
+    def setUpClass(cls):
+        # Avoid circular import
+        from simulator.connections.DtnAbstractConnection import DtnAbstractConnection
+
+        # Record transmissions as connections did before the monitor existed, i.e. one
+        # entry per message id with its departure, volume, type and arrival
+        cls.baseline, cls.num_tx = {}, 0
+        tx_start, tx_end = DtnAbstractConnection.monitor_tx_start, DtnAbstractConnection.monitor_tx_end
+
+        def monitor_tx_start(conn, message):
+            cls.num_tx += 1
+            cls.baseline.setdefault((conn.orig.nid, conn.dest.nid), {})[str(message.mid)] = \
+                {'departure': conn.t, 'dv': message.num_bits, 'type': message.__class__.__name__}
+            return tx_start(conn, message)
+
+        def monitor_tx_end(conn, message, token):
+            cls.baseline[conn.orig.nid, conn.dest.nid][str(message.mid)]['arrival'] = conn.t
+            tx_end(conn, message, token)
+
+        # Run the test with the full monitor
+        with mock.patch.object(DtnAbstractConnection, 'monitor_tx_start', monitor_tx_start), \
+             mock.patch.object(DtnAbstractConnection, 'monitor_tx_end', monitor_tx_end):
+            cls.full = cls.run_test_7('full')
+
+    @staticmethod
+    def run_test_7(level, every=100):
+        # Avoid circular import
+        from bin.main import run_simulation
+
+        # Run the test with this monitor level and keep the transmissions of each connection
+        config = _load_test(7)
+        config['globals'].update({'conn_monitor': level, 'conn_monitor_every': every})
+        with tempfile.TemporaryDirectory() as tmp:
+            config['globals']['outdir'] = tmp
+            env, _, _ = run_simulation(config=config, return_env=True)
+        monitors = {cid: conn.tx_monitor for cid, conn in env.connections.items()}
+        sent     = {cid: conn.list_sent() for cid, conn in env.connections.items()}
+        env.reset()
+
+        return monitors, sent
+
+    def test_off(self):
+        # No connection has a monitor or records
+        monitors, sent = self.run_test_7('off')
+        for cid in monitors:
+            self.assertIsNone(monitors[cid], msg=cid)
+            self.assertTrue(sent[cid].empty, msg=cid)
+
+    def test_sampled(self):
+        # Record one in every seven transmissions
+        every = 7
+        monitors, sent = self.run_test_7('sampled', every=every)
+        full_monitors, full_sent = self.full
+        self.assertGreater(sum(m.count for m in monitors.values()), every)
+
+        for cid, monitor in monitors.items():
+            # All transmissions are counted, and one in every ``every`` is recorded
+            self.assertEqual(monitor.count, full_monitors[cid].count, msg=cid)
+            self.assertEqual(sum(monitor.num_sent), monitor.count, msg=cid)
+            self.assertEqual(len(sent[cid]), -(-monitor.count // every), msg=cid)
+
+            # The records are the ones of the full monitor. Message ids of segments
+            # change between runs, so they are not compared
+            cols = ['departure', 'dv', 'type', 'arrival']
+            pd.testing.assert_frame_equal(sent[cid][cols], full_sent[cid][cols].iloc[::every].reset_index(drop=True))
+
+    def test_full(self):
+        _, sent = self.full
+
+        # Every transmission is recorded
+        self.assertEqual(sum(len(df) for df in sent.values()), self.num_tx)
+
+        # The bundle records are the same as the ones in the baseline format. Other
+        # messages are identified by their object id, which the baseline reused
+        num_bundles = 0
+        for cid, df in sent.items():
+            # Connections that did not transmit have no records
+            if df.empty:
+                self.assertNotIn(cid, self.baseline)
+                continue
+
+            # Compare the bundle records
+            baseline = pd.DataFrame.from_dict(self.baseline[cid], orient='index').reset_index()
+            baseline = baseline.loc[baseline.type == 'Bundle'].reset_index(drop=True)
+            bundles  = df.loc[df.type == 'Bundle'].reset_index(drop=True)
+            pd.testing.assert_frame_equal(bundles, baseline[bundles.columns], obj=str(cid))
+            num_bundles += len(bundles)
+        self.assertGreater(num_bundles, 0)
+
+class QueueWaiterTests(unittest.TestCase):
+    """ Check that consumers that stop waiting do not leave events in unbounded queues """
+    def setUp(self):
+        # Create a bare environment
+        self.env = simpy.Environment()
+        self.env.do_log = False
+
+    def test_interrupted_getter(self):
+        # Avoid circular import
+        from simulator.core.DtnQueue import DtnQueue
+        from simulator.core.DtnPriorityQueue import DtnPriorityQueue
+
+        for queue, put in [(DtnQueue(self.env), lambda q: q.put_nowait('item')),
+                           (DtnPriorityQueue(self.env), lambda q: q.put_nowait('item', 0))]:
+            # Start a getter and interrupt it before anything is put in the queue
+            def getter():
+                try: yield from queue.get()
+                except simpy.Interrupt: pass
+            proc = self.env.process(getter())
+            self.env.run(until=self.env.now + 1)
+            proc.interrupt()
+            self.env.run(until=self.env.now + 1)
+            self.assertEqual(queue.waiters, [])
+
+            # A new getter still receives the next item
+            proc = self.env.process(queue.get())
+            put(queue)
+            self.assertEqual(self.env.run(until=proc), 'item')
+
+    def test_timeout(self):
+        # Avoid circular import
+        from simulator.core.DtnQueue import DtnQueue
+
+        # Wait for the queue with a timeout many times before anything is put in it
+        queue = DtnQueue(self.env)
+        def consumer():
+            while not queue: yield queue.is_empty() | self.env.timeout(1)
+            return queue.get_nowait()
+        proc = self.env.process(consumer())
+        self.env.run(until=100.5)
+
+        # Only the event of the current wait is left
+        self.assertEqual(len(queue.waiters), 1)
+        queue.put_nowait('item')
+        self.assertEqual(self.env.run(until=proc), 'item')
+        self.assertEqual(queue.waiters, [])
+
+class BatchTests(unittest.TestCase):
+    """ Check the batches of bundles released by generators (see ``batch_bundles``) """
+    def test_destinations(self):
+        # Avoid circular import
+        from simulator.generators.DtnAbstractGenerator import batch_bundles
+
+        # Bundles to two destinations are batched separately within each segment
+        batches = batch_bundles(range(10), ['A', 'B']*5, 4)
+        self.assertEqual(batches, [(2, 2, 'A'), (3, 2, 'B'), (6, 2, 'A'),
+                                   (7, 2, 'B'), (8, 1, 'A'), (9, 1, 'B')])
+
+    def test_max_count(self):
+        # Avoid circular import
+        from simulator.generators.DtnAbstractGenerator import batch_bundles
+
+        # Segments with more bundles than the maximum are split
+        batches = batch_bundles(range(10), ['A']*10, 4, max_count=3)
+        self.assertEqual(batches, [(2, 3, 'A'), (3, 1, 'A'), (6, 3, 'A'), (7, 1, 'A'), (9, 2, 'A')])
+
+    def test_data_vol(self):
+        # Avoid circular import
+        from bin.main import run_simulation
+
+        # Run test_1 with batches of at most 3 bundles
+        config = _load_test(1)
+        config['voice_generator'].update({'batch_step': 60, 'batch_max_volume': 3e4})
+        with tempfile.TemporaryDirectory() as tmp:
+            config['globals']['outdir'] = tmp
+            env, _, _ = run_simulation(config=config, return_env=True)
+
+        # The generator releases the same data volume in fewer bundles
+        gen = env.nodes['N1'].generators['voice_generator']
+        df  = gen.list_bundles()
+        self.assertAlmostEqual(df.data_vol.sum(), gen.predicted_data_vol())
+        self.assertLess(len(df), gen.predicted_data_vol() / gen.bundle_sz)
+        self.assertLessEqual(df.data_vol.max(), 3e4)
+
 class MobilityTests(unittest.TestCase):
     def test_epidemic_router(self):
         # Run the test
@@ -201,6 +587,20 @@ def get_test_suite():
     suite.addTest(BasicTests('test_9'))
     suite.addTest(BasicTests('test_static_router'))
     suite.addTest(WalkerConsTests('test_network'))
+    suite.addTest(RouteWindowTests('test_4'))
+    suite.addTest(RouteWindowTests('test_5'))
+    suite.addTest(RandomWaypointTests('test_contacts'))
+    suite.addTest(TimerServiceTests('test_cancel_before_deadline'))
+    suite.addTest(TimerServiceTests('test_shared_deadline'))
+    suite.addTest(TimerServiceTests('test_reschedule_in_callback'))
+    suite.addTest(ConnectionMonitorTests('test_off'))
+    suite.addTest(ConnectionMonitorTests('test_sampled'))
+    suite.addTest(ConnectionMonitorTests('test_full'))
+    suite.addTest(QueueWaiterTests('test_interrupted_getter'))
+    suite.addTest(QueueWaiterTests('test_timeout'))
+    suite.addTest(BatchTests('test_destinations'))
+    suite.addTest(BatchTests('test_max_count'))
+    suite.addTest(BatchTests('test_data_vol'))
     #suite.addTest(MobilityTests('test_epidemic_router'))
 
     return suite